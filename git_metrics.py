@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os
+import sys
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -15,13 +16,62 @@ from rich.table import Table
 from dateutil.relativedelta import relativedelta
 from openpyxl.utils.dataframe import dataframe_to_rows
 
+# Adiciona o diretório src ao PYTHONPATH
+sys.path.append(str(Path(__file__).parent / 'src'))
+
+from infrastructure.ingestion.branch_history import BranchHistory
+from infrastructure.ingestion.log_stream import build_filter_args
+from infrastructure.ingestion.stats_cache import CommitStatsCache, cache_directory
+from infrastructure.ingestion.fact_table import FactTableStore
+from infrastructure.ingestion.daily_totals import DailyTotals
+from infrastructure.ingestion.path_filter import PathFilter
+from infrastructure.ingestion.stats_backend import StatsBackend
+from domain.enums.merge_policy import MergePolicy
+from application.queries.aggregation_cube import AggregationCube
+
+# Nomes das colunas do cubo nas estatísticas
+ANALYZER_COLUMNS = {
+    'day': 'data',
+    'month': 'mes',
+    'name': 'nome_autor',
+    'email': 'email_autor',
+    'environment': 'ambiente',
+    'files': 'arquivos_alterados',
+    'insertions': 'linhas_adicionadas',
+    'deletions': 'linhas_removidas',
+    'lines': 'total_linhas',
+    'commits': 'total_commits',
+    'branches': 'total_branches'
+}
+
 app = typer.Typer()
 console = Console()
 
 class GitAnalyzer:
-    def __init__(self, repo_path: str):
+    def __init__(self, repo_path: str, use_cache: bool = True, jobs: int = 1,
+                 path_filter: Optional[PathFilter] = None,
+                 merge_policy: MergePolicy = MergePolicy.DIFF,
+                 backend: Optional[StatsBackend] = None):
         self.repo_path = Path(repo_path).resolve()
         self.repo = Repo(str(self.repo_path))
+        # Arquivos considerados nas estatísticas; cada filtro tem seus próprios caches
+        self.path_filter = path_filter or PathFilter()
+        # Tratamento dos commits de merge; políticas que mudam as estatísticas também têm caches próprios
+        self.merge_policy = merge_policy
+        self.stats_cache = (
+            CommitStatsCache.for_repository(str(self.repo_path), self.repo.git_dir,
+                                            path_filter=self.path_filter, merge_policy=self.merge_policy)
+            if use_cache else None
+        )
+        self.history = BranchHistory(str(self.repo_path), stats_cache=self.stats_cache, jobs=jobs,
+                                     path_filter=self.path_filter, merge_policy=self.merge_policy,
+                                     backend=backend or StatsBackend.default())
+        self.fact_store = FactTableStore(
+            self.history,
+            cache_directory(str(self.repo_path), self.repo.git_dir, path_filter=self.path_filter,
+                            merge_policy=self.merge_policy)
+            if use_cache else None
+        )
         self.reports_dir = Path("relatorios")
         self.reports_dir.mkdir(exist_ok=True)
         self.power_bi_dir = Path("power_bi_data")
@@ -32,6 +82,31 @@ class GitAnalyzer:
         recent_commit = self.repo.head.commit
         return recent_commit.author.name, recent_commit.author.email
 
+    def find_author_names(self, author_emails: List[str]) -> Dict[str, str]:
+        """
+        Retorna o nome de cada email no commit mais recente do HEAD em que aparece.
+        
+        Usa um git log sem numstat, filtrado pelos emails, e para assim
+        que todos foram encontrados: nenhum diff é calculado.
+        
+        Returns:
+            Dicionário email -> nome, na ordem em que foram encontrados
+        """
+        names: Dict[str, str] = {}
+        wanted = set(author_emails or [])
+        if not wanted:
+            return names
+        records = self.history.log_stream.iter_commits(['HEAD'], build_filter_args(wanted), with_stats=False)
+        try:
+            for record in records:
+                if record.author_email in wanted and record.author_email not in names:
+                    names[record.author_email] = record.author_name
+                    if len(names) == len(wanted):
+                        break
+        finally:
+            records.close()
+        return names
+
     def get_all_branches(self) -> List[str]:
         """Retorna lista de todas as branches do repositório."""
         return [ref.name for ref in self.repo.references if not ref.name.startswith('origin/')]
@@ -42,157 +117,70 @@ class GitAnalyzer:
             return 'PRD'
         return 'HML'
 
-    def get_most_recent_name_for_email(self, commits_data: List[Dict]) -> Dict[str, str]:
-        """Retorna o nome mais recente usado para cada email."""
-        email_to_name = {}
-        email_to_date = {}
+    def analyze_commits(self, author_emails: List[str] = None, streaming: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Analisa commits e retorna estatísticas.
         
-        for commit in commits_data:
-            email = commit['email_autor']
-            date = commit['data']
-            name = commit['nome_autor']
-            
-            if email not in email_to_date or date > email_to_date[email]:
-                email_to_date[email] = date
-                email_to_name[email] = name
-        
-        return email_to_name
-
-    def analyze_commits(self, author_emails: List[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-        """Analisa commits e retorna estatísticas."""
-        commits_data = []
-        branch_commits = defaultdict(list)
-        
-        # Analisa commits em cada branch
-        for branch in self.get_all_branches():
-            try:
-                ambiente = self.classify_branch(branch)
-                for commit in self.repo.iter_commits(branch):
-                    # Se author_emails está definido, verifica se o email do commit está na lista
-                    if author_emails and commit.author.email not in author_emails:
-                        continue
-                    
-                    stats = commit.stats.total
-                    commit_date = pd.to_datetime(commit.committed_datetime).tz_convert('UTC').tz_localize(None)
-                    
-                    commit_info = {
-                        'data': commit_date,
-                        'nome_autor': commit.author.name,
-                        'email_autor': commit.author.email,
-                        'branch': branch,
-                        'ambiente': ambiente,
-                        'arquivos_alterados': stats['files'],
-                        'linhas_adicionadas': stats['insertions'],
-                        'linhas_removidas': stats['deletions'],
-                        'total_linhas': stats['insertions'] + stats['deletions'],
-                        'commit_hash': commit.hexsha[:8]  # Primeiros 8 caracteres do hash
-                    }
-                    
-                    commits_data.append(commit_info)
-                    branch_commits[branch].append(commit_info)
-            except:
-                console.print(f"[yellow]Aviso: Não foi possível analisar a branch {branch}[/yellow]")
-        
-        if not commits_data:
+        Com streaming=True os commits são somados por (branch, autor, dia)
+        durante a leitura do histórico, sem montar a tabela de fatos: a
+        memória depende só do número de dias, autores e branches.
+        """
+        # Cubo autor × ambiente × branch × dia (com o nome mais recente de cada email);
+        # todas as estatísticas abaixo são agregações dele
+        try:
+            if streaming:
+                totals = DailyTotals().add_all(self.history.stream_commits(self.get_all_branches()),
+                                               set(author_emails) if author_emails else None)
+                cube = AggregationCube.from_daily_rows(totals.to_rows(), totals.latest_names())
+            else:
+                # Lê a tabela de fatos (uma linha por commit); só percorre o histórico
+                # se as branches mudaram desde a última análise
+                cube = AggregationCube.from_facts(
+                    self.fact_store.get(self.get_all_branches(), author_emails or None)
+                )
+        except Exception:
+            console.print("[yellow]Aviso: Não foi possível analisar o histórico das branches[/yellow]")
+            cube = None
+        
+        if cube is None or cube.empty:
             return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
-        # Obtém o nome mais recente para cada email
-        email_to_name = self.get_most_recent_name_for_email(commits_data)
+        measures = ['files', 'insertions', 'deletions', 'lines', 'commits']
         
-        # Atualiza os nomes dos autores para usar o mais recente
-        for commit in commits_data:
-            commit['nome_autor'] = email_to_name[commit['email_autor']]
-            
-        df = pd.DataFrame(commits_data)
+        def select(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+            return df[columns].rename(columns=ANALYZER_COLUMNS)
         
         # Estatísticas diárias
-        daily_stats = df.groupby([df['data'].dt.date, 'email_autor', 'branch', 'ambiente']).agg({
-            'nome_autor': 'first',
-            'arquivos_alterados': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum',
-            'commit_hash': 'count'  # Conta número de commits
-        }).reset_index()
-        daily_stats.rename(columns={'commit_hash': 'total_commits'}, inplace=True)
+        daily_stats = cube.rollup(['day', 'email', 'branch', 'environment', 'name'])
+        daily_stats['day'] = daily_stats['day'].dt.date
+        daily_stats = select(daily_stats, ['day', 'email', 'branch', 'environment', 'name', *measures])
         
         # Estatísticas mensais
-        df['mes'] = df['data'].dt.to_period('M')
-        monthly_stats = df.groupby(['mes', 'email_autor', 'branch', 'ambiente']).agg({
-            'nome_autor': 'first',
-            'arquivos_alterados': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum',
-            'commit_hash': 'count'  # Conta número de commits
-        }).reset_index()
-        monthly_stats.rename(columns={'commit_hash': 'total_commits'}, inplace=True)
+        monthly_stats = cube.rollup(['month', 'email', 'branch', 'environment', 'name'])
+        monthly_stats = select(monthly_stats, ['month', 'email', 'branch', 'environment', 'name', *measures])
         
         # Totais diários
-        daily_totals = df.groupby([df['data'].dt.date, 'ambiente']).agg({
-            'arquivos_alterados': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum',
-            'commit_hash': 'count'  # Conta número de commits
-        }).reset_index()
-        daily_totals.rename(columns={'commit_hash': 'total_commits'}, inplace=True)
-        daily_totals = daily_totals.sort_values('data', ascending=False)
+        daily_totals = cube.rollup(['day', 'environment'])
+        daily_totals['day'] = daily_totals['day'].dt.date
+        daily_totals = select(daily_totals, ['day', 'environment', *measures])
+        # Mais recentes primeiro e, no mesmo dia ou mês, por ambiente: ordem determinística
+        daily_totals = daily_totals.sort_values(['data', 'ambiente'], ascending=[False, True], kind='mergesort')
         
         # Totais mensais
-        monthly_totals = df.groupby(['mes', 'ambiente']).agg({
-            'arquivos_alterados': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum',
-            'commit_hash': 'count'  # Conta número de commits
-        }).reset_index()
-        monthly_totals.rename(columns={'commit_hash': 'total_commits'}, inplace=True)
-        monthly_totals = monthly_totals.sort_values('mes', ascending=False)
+        monthly_totals = select(cube.rollup(['month', 'environment']), ['month', 'environment', *measures])
+        monthly_totals = monthly_totals.sort_values(['mes', 'ambiente'], ascending=[False, True], kind='mergesort')
         
         # Estatísticas por branch
-        branch_stats = df.groupby(['branch', 'ambiente', 'email_autor']).agg({
-            'nome_autor': 'first',
-            'arquivos_alterados': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum',
-            'commit_hash': 'count'  # Conta número de commits
-        }).reset_index()
-        branch_stats.rename(columns={'commit_hash': 'total_commits'}, inplace=True)
+        branch_stats = cube.rollup(['branch', 'environment', 'email', 'name'])
+        branch_stats = select(branch_stats, ['branch', 'environment', 'email', 'name', *measures])
         
         # Resumo por ambiente
-        env_stats = df.groupby(['ambiente']).agg({
-            'arquivos_alterados': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum',
-            'commit_hash': 'count',  # Conta número de commits
-            'branch': 'nunique'  # Conta número único de branches
-        }).reset_index()
-        env_stats.rename(columns={
-            'commit_hash': 'total_commits',
-            'branch': 'total_branches'
-        }, inplace=True)
+        env_stats = cube.rollup(['environment'], distinct_branches=True)
+        env_stats = select(env_stats, ['environment', *measures, 'branches'])
         
         # Resumo geral
-        summary_stats = df.groupby(['email_autor', 'ambiente']).agg({
-            'nome_autor': 'first',
-            'arquivos_alterados': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum',
-            'commit_hash': 'count',  # Conta número de commits
-            'branch': 'nunique'  # Conta número único de branches
-        }).reset_index()
-        summary_stats.rename(columns={
-            'commit_hash': 'total_commits',
-            'branch': 'total_branches'
-        }, inplace=True)
-        
-        # Converte o período mensal para string para melhor visualização no Excel
-        monthly_stats['mes'] = monthly_stats['mes'].astype(str)
-        monthly_totals['mes'] = monthly_totals['mes'].astype(str)
+        summary_stats = cube.rollup(['email', 'environment', 'name'], distinct_branches=True)
+        summary_stats = select(summary_stats, ['email', 'environment', 'name', *measures, 'branches'])
         
         return daily_stats, monthly_stats, branch_stats, summary_stats, daily_totals, monthly_totals, env_stats
 
@@ -466,7 +454,8 @@ class GitAnalyzer:
         daily_table.add_column("Linhas Removidas", justify="right")
         daily_table.add_column("Total de Linhas", justify="right")
         
-        recent_daily = daily_stats.sort_values('data', ascending=False).head(7)
+        recent_daily = daily_stats.sort_values(['data', 'email_autor', 'ambiente', 'branch'],
+                                               ascending=[False, True, True, True], kind='mergesort').head(7)
         for _, row in recent_daily.iterrows():
             daily_table.add_row(
                 str(row['data']),
@@ -492,7 +481,8 @@ class GitAnalyzer:
         monthly_table.add_column("Linhas Removidas", justify="right")
         monthly_table.add_column("Total de Linhas", justify="right")
         
-        recent_monthly = monthly_stats.sort_values('mes', ascending=False).head(3)
+        recent_monthly = monthly_stats.sort_values(['mes', 'email_autor', 'ambiente', 'branch'],
+                                                   ascending=[False, True, True, True], kind='mergesort').head(3)
         for _, row in recent_monthly.iterrows():
             monthly_table.add_row(
                 str(row['mes']),
@@ -546,11 +536,7 @@ class GitAnalyzer:
             # Formata a data e hora no padrão solicitado
             data_hora = datetime.now().strftime("%d-%m-%Y-%H-%M")
             # Obtém o nome do autor do primeiro commit encontrado
-            author_name = "desconhecido"
-            for commit in self.repo.iter_commits():
-                if commit.author.email in author_emails:
-                    author_name = commit.author.name
-                    break
+            author_name = next(iter(self.find_author_names(author_emails).values()), "desconhecido")
             
             # Limpa o nome do autor para usar no nome do arquivo (remove caracteres especiais)
             nome_autor_limpo = "".join(c for c in author_name.lower() if c.isalnum() or c == '_')
@@ -739,30 +725,41 @@ def validate_path(path: str) -> str:
 @app.command()
 def analyze(
     repo_path: str = typer.Option(..., "--path", "-p", help="Caminho do repositório git para análise"),
-    author_emails: Optional[List[str]] = typer.Option(None, "--author", "-a", help="Filtrar por email(s) do(s) autor(es). Pode ser especificado múltiplas vezes.")
+    author_emails: Optional[List[str]] = typer.Option(None, "--author", "-a", help="Filtrar por email(s) do(s) autor(es). Pode ser especificado múltiplas vezes."),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignora o cache de estatísticas e recalcula tudo pelo git"),
+    jobs: int = typer.Option(1, "--jobs", "-j", min=1, help="Número de processos git em paralelo para calcular as estatísticas"),
+    streaming: bool = typer.Option(False, "--streaming", help="Soma os commits por dia durante a leitura do histórico (memória limitada, para históricos muito grandes)"),
+    include: Optional[List[str]] = typer.Option(None, "--include", help="Pathspec dos arquivos considerados nas estatísticas. Pode ser especificado múltiplas vezes."),
+    exclude: Optional[List[str]] = typer.Option(None, "--exclude", help="Pathspec dos arquivos ignorados, ex: vendor/ ou package-lock.json. Pode ser especificado múltiplas vezes."),
+    skip_binary: bool = typer.Option(False, "--skip-binary", help="Não conta arquivos binários (nem os maiores que --max-file-size) como arquivos alterados"),
+    max_file_size: Optional[str] = typer.Option(None, "--max-file-size", help="Não diferencia arquivos maiores que este tamanho, ex: 1M (contam como binários)"),
+    merges: MergePolicy = typer.Option(MergePolicy.DIFF, "--merges", case_sensitive=False, help="Commits de merge: diff (contra o primeiro pai), skip (ignora), first-parent (só a linha principal de cada branch) ou no-diff (contam sem linhas)"),
+    backend: Optional[StatsBackend] = typer.Option(None, "--backend", case_sensitive=False, help="Cálculo das estatísticas: git (processos git) ou pygit2 (diff dos commits pela libgit2 no próprio processo; a caminhada usa o git); padrão: GIT_METRICS_BACKEND ou git")
 ):
     """Analisa um repositório git e gera relatórios de contribuição em Excel e Power BI."""
     try:
         repo_path = validate_path(repo_path)
-        analyzer = GitAnalyzer(repo_path)
+        try:
+            path_filter = PathFilter.from_options(include, exclude, skip_binary, max_file_size)
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+        analyzer = GitAnalyzer(repo_path, use_cache=not no_cache, jobs=jobs, path_filter=path_filter,
+                               merge_policy=merges, backend=backend)
         
         if not author_emails:
             author_name, author_email = analyzer.get_recent_developer()
             author_emails = [author_email]
             console.print(f"[yellow]Nenhum autor especificado. Usando contribuidor mais recente: {author_name} ({author_email})[/yellow]\n")
         
-        # Obtém os nomes dos autores
-        author_names = {}
-        for commit in analyzer.repo.iter_commits():
-            if commit.author.email in author_emails and commit.author.email not in author_names:
-                author_names[commit.author.email] = commit.author.name
+        # Obtém os nomes dos autores (sem diffs)
+        author_names = analyzer.find_author_names(author_emails)
         
         # Se algum email não foi encontrado, usa "Desconhecido"
         for email in author_emails:
             if email not in author_names:
                 author_names[email] = "Desconhecido"
         
-        daily_stats, monthly_stats, branch_stats, summary_stats, daily_totals, monthly_totals, env_stats = analyzer.analyze_commits(author_emails)
+        daily_stats, monthly_stats, branch_stats, summary_stats, daily_totals, monthly_totals, env_stats = analyzer.analyze_commits(author_emails, streaming=streaming)
         
         if daily_stats.empty:
             console.print(f"[red]Nenhum commit encontrado para os autores especificados[/red]")
@@ -797,6 +794,9 @@ def analyze(
         console.print(f"1. Relatório Excel: {excel_file}")
         console.print(f"2. Dados Power BI: {json_file}")
         console.print("3. Documentação: power_bi_data/README.md")
+        if analyzer.stats_cache is not None:
+            cache_size = analyzer.stats_cache.size()
+            console.print(f"\nCache de estatísticas: {cache_size['commits']} commits ({cache_size['bytes'] / 1024:.1f} KB) em {analyzer.stats_cache.path}")
         console.print("\n[bold blue]Próximos passos:[/bold blue]")
         console.print("1. Abra o relatório Excel para análise detalhada")
         console.print("2. Importe os dados JSON no Power BI Desktop")
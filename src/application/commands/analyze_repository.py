@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pathlib import Path
 from domain.entities.author import Author
 from infrastructure.repositories.git_repository import GitRepository
@@ -8,39 +8,65 @@ from datetime import datetime
 import pandas as pd
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from openpyxl.utils.dataframe import dataframe_to_rows
-from application.queries.repository_metrics import RepositoryMetricsQuery
+from application.queries.analysis_session import AnalysisSession
 
 class AnalyzeRepositoryCommand:
-    def __init__(self, repository: GitRepository):
+    def __init__(self, repository: GitRepository, incremental: bool = False,
+                 streaming: bool = False, path_month: Optional[str] = None,
+                 path_top: int = 20, include_paths: bool = False):
         self.repository = repository
+        self.incremental = incremental
+        self.streaming = streaming
+        # Abas por arquivo (só se pedidas), com o mês e o tamanho dos rankings
+        self.include_paths = include_paths
+        self.path_month = path_month
+        self.path_top = path_top
         self.output_dir = Path("reports")
 
+    def create_session(self, authors: List[Author]) -> AnalysisSession:
+        """
+        Cria a sessão de análise dos autores com as opções do comando.
+        
+        Args:
+            authors: Autores a analisar
+            
+        Returns:
+            AnalysisSession: Sessão cujas métricas podem ser reaproveitadas
+            fora do relatório (ex: resposta JSON do servidor web)
+        """
+        return AnalysisSession(self.repository, authors, incremental=self.incremental,
+                               streaming=self.streaming, path_month=self.path_month,
+                               path_top=self.path_top, include_paths=self.include_paths)
+
     def execute(self, authors: List[Author]) -> str:
         """
         Executa a análise do repositório e gera o relatório Excel.
         Retorna o caminho do arquivo Excel gerado.
         """
-        # Verifica se há dados para os autores
-        has_data = False
-        for author in authors:
-            if self.repository.get_commits_by_author(author):
-                has_data = True
-                break
-                
-        if not has_data:
+        return self.write_report(self.create_session(authors))
+
+    def write_report(self, session: AnalysisSession) -> str:
+        """
+        Gera o relatório Excel a partir das métricas da sessão (calculadas uma vez).
+        Retorna o caminho do arquivo Excel gerado.
+        """
+        # Métricas por arquivo primeiro, se pedidas: a indexação diferencia os
+        # commits novos uma única vez e já preenche o cache usado pelas demais
+        path_metrics = session.path_metrics
+        metrics = session.metrics
+        authors = session.authors
+        
+        # Verifica se há dados para os autores (sem percorrer o histórico de novo)
+        if not session.has_data:
             raise ValueError("Nenhum dado encontrado para gerar o relatório")
         
         # Cria diretório de saída se não existir
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Gera nome do arquivo com timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Gera nome do arquivo com timestamp (com microssegundos: análises simultâneas não colidem)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         excel_path = self.output_dir / f"git_metrics_{timestamp}.xlsx"
         
-        # Obtém métricas do repositório
-        query = RepositoryMetricsQuery(self.repository)
-        metrics = query.execute(authors)
-        
         # Cria DataFrames para cada seção
         dfs = {
             'Resumo Geral': pd.DataFrame(metrics['resumo_autor_ambiente']),
@@ -48,6 +74,12 @@ class AnalyzeRepositoryCommand:
             'Totais Diários': pd.DataFrame(metrics['totais_diarios']),
             'Totais Mensais': pd.DataFrame(metrics['totais_mensais'])
         }
+        if path_metrics is not None:
+            dfs.update({
+                'Linhas por Extensão': pd.DataFrame(path_metrics['linhas_por_extensao']),
+                f"Diretórios {path_metrics['mes']}": pd.DataFrame(path_metrics['diretorios_mes']),
+                'Churn por Arquivo': pd.DataFrame(path_metrics['churn_por_arquivo'])
+            })
         
         # Cria o arquivo Excel
         with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
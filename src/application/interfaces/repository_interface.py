@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from datetime import datetime
 
 from domain.entities.commit import Commit
@@ -15,7 +15,7 @@ class GitRepositoryInterface(ABC):
     def get_commits(self, 
                    authors: Optional[List[Author]] = None,
                    since: Optional[datetime] = None,
-                   until: Optional[datetime] = None) -> List[Commit]:
+                   until: Optional[datetime] = None) -> Sequence[Commit]:
         """
         Retorna lista de commits do repositório.
         
@@ -25,7 +25,7 @@ class GitRepositoryInterface(ABC):
             until: Data final opcional
             
         Returns:
-            List[Commit]: Lista de commits encontrados
+            Sequence[Commit]: Commits encontrados
         """
         pass
 
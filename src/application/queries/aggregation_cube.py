@@ -0,0 +1,182 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from domain.enums.environment_type import EnvironmentType
+from infrastructure.ingestion.fact_table import CommitFacts
+from infrastructure.ingestion.time_buckets import (
+    day_values, epoch_days, month_labels, week_values
+)
+
+# Medidas somadas em cada célula do cubo
+MEASURES = ['commits', 'files', 'insertions', 'deletions']
+
+
+class AggregationCube:
+    """
+    Cubo autor × ambiente × branch × dia com os totais de commits.
+
+    É montado numa única passada vetorizada sobre a tabela de fatos (uma
+    ordenação das chaves e somas por segmento). Os resumos por autor,
+    ambiente, mês etc. são agregações das células do cubo, que são muito
+    menos numerosas que as linhas (commit, branch).
+
+    Cada célula tem as colunas email, name, environment, branch, day
+    (datetime), week (segunda-feira da semana ISO), month ('AAAA-MM') e as
+    medidas commits, files, insertions e deletions. O nome é o mais
+    recente usado com o email. Os dias vêm de aritmética inteira sobre os
+    timestamps, sem criar um Timestamp por commit.
+    """
+
+    def __init__(self, cells: pd.DataFrame):
+        """
+        Inicializa o cubo.
+
+        Args:
+            cells: Células já agregadas
+        """
+        self.cells = cells
+
+    @property
+    def empty(self) -> bool:
+        return self.cells.empty
+
+    @classmethod
+    def from_facts(cls, facts: CommitFacts, local_time: bool = False) -> 'AggregationCube':
+        """
+        Monta o cubo a partir da tabela de fatos.
+
+        Args:
+            facts: Tabela de fatos dos commits
+            local_time: Se True, o dia é o do fuso original de cada commit;
+                senão, o dia em UTC
+
+        Returns:
+            AggregationCube: Cubo com uma célula por (autor, branch, dia)
+        """
+        if not len(facts):
+            return cls(_empty_cells())
+
+        # Dimensão de email (um autor pode ter vários nomes)
+        email_ids: Dict[str, int] = {}
+        author_email_id = np.array([email_ids.setdefault(email, len(email_ids))
+                                    for _, email in facts.authors], dtype=np.int64)
+        emails = list(email_ids)
+        commit_email = author_email_id[facts.author_id]
+
+        commit_day = epoch_days(facts.timestamp, facts.tz_offset if local_time else None)
+
+        rows, branch_ids = facts.branch_rows()
+        day = commit_day[rows]
+        first_day = day.min()
+        day_span = int(day.max() - first_day) + 1
+        keys = ((commit_email[rows] * len(facts.branches) + branch_ids) * day_span
+                + (day - first_day))
+
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        cell_keys = sorted_keys[starts]
+        cell_rows = rows[order]
+
+        measures = {
+            'commits': np.diff(np.r_[starts, len(sorted_keys)]),
+            'files': np.add.reduceat(facts.files[cell_rows].astype(np.int64), starts),
+            'insertions': np.add.reduceat(facts.insertions[cell_rows], starts),
+            'deletions': np.add.reduceat(facts.deletions[cell_rows], starts),
+        }
+
+        cell_days = cell_keys % day_span + first_day
+        cell_branches = cell_keys // day_span % len(facts.branches)
+        cell_emails = cell_keys // day_span // len(facts.branches)
+
+        names = _latest_names(facts, commit_email, len(emails))
+        environments = [str(EnvironmentType.from_branch(branch)) for branch in facts.branches]
+        cells = pd.DataFrame({
+            'email': np.array(emails, dtype=object)[cell_emails],
+            'name': np.array(names, dtype=object)[cell_emails],
+            'environment': np.array(environments, dtype=object)[cell_branches],
+            'branch': np.array(facts.branches, dtype=object)[cell_branches],
+            'day': day_values(cell_days),
+            'week': week_values(cell_days),
+            'month': month_labels(cell_days),
+            **measures,
+        })
+        return cls(cells)
+
+    @classmethod
+    def from_daily_rows(cls, rows: Sequence[tuple], names: Dict[str, str]) -> 'AggregationCube':
+        """
+        Monta o cubo a partir de totais diários já agregados.
+
+        Args:
+            rows: Tuplas (branch, email, dia 'AAAA-MM-DD', commits, arquivos,
+                adições, remoções), como em IncrementalMetrics.load
+            names: Dicionário email -> nome mais recente
+
+        Returns:
+            AggregationCube: Cubo com as mesmas células
+        """
+        if not rows:
+            return cls(_empty_cells())
+        branches, emails, days, commits, files, insertions, deletions = zip(*rows)
+        day_numbers = np.array(days, dtype='datetime64[D]').astype(np.int64)
+        cells = pd.DataFrame({
+            'email': list(emails),
+            'name': [names.get(email, email) for email in emails],
+            'environment': [str(EnvironmentType.from_branch(branch)) for branch in branches],
+            'branch': list(branches),
+            'day': day_values(day_numbers),
+            'week': week_values(day_numbers),
+            'month': month_labels(day_numbers),
+            'commits': np.array(commits, dtype=np.int64),
+            'files': np.array(files, dtype=np.int64),
+            'insertions': np.array(insertions, dtype=np.int64),
+            'deletions': np.array(deletions, dtype=np.int64),
+        })
+        return cls(cells)
+
+    def select_emails(self, emails: Sequence[str]) -> 'AggregationCube':
+        """Retorna só as células dos emails informados."""
+        return AggregationCube(self.cells[self.cells['email'].isin(list(emails))])
+
+    def rollup(self, dimensions: List[str], distinct_branches: bool = False) -> pd.DataFrame:
+        """
+        Agrega as células pelas dimensões informadas.
+
+        Args:
+            dimensions: Colunas de agrupamento (ex: ['environment', 'month'])
+            distinct_branches: Se True, inclui a coluna `branches` com o
+                número de branches distintas
+
+        Returns:
+            DataFrame ordenado pelas dimensões, com as medidas somadas e
+            `lines` (adições + remoções)
+        """
+        aggregations = {measure: (measure, 'sum') for measure in MEASURES}
+        if distinct_branches:
+            aggregations['branches'] = ('branch', 'nunique')
+        result = self.cells.groupby(dimensions).agg(**aggregations).reset_index()
+        result.insert(len(dimensions) + len(MEASURES), 'lines',
+                      result['insertions'] + result['deletions'])
+        return result
+
+
+def _latest_names(facts: CommitFacts, commit_email: np.ndarray, email_count: int) -> List[str]:
+    """
+    Retorna o nome do commit mais recente de cada email.
+
+    Em caso de empate vale o primeiro commit na ordem do git log.
+    """
+    order = np.lexsort((np.arange(len(facts)), -facts.timestamp, commit_email))
+    first = order[np.r_[True, commit_email[order][1:] != commit_email[order][:-1]]]
+    names = [''] * email_count
+    for commit in first:
+        names[commit_email[commit]] = facts.authors[facts.author_id[commit]][0]
+    return names
+
+
+def _empty_cells() -> pd.DataFrame:
+    return pd.DataFrame({column: [] for column in
+                         ['email', 'name', 'environment', 'branch', 'day', 'week', 'month', *MEASURES]})
@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+from domain.entities.author import Author
+from infrastructure.repositories.git_repository import GitRepository
+from application.queries.repository_metrics import RepositoryMetricsQuery
+from application.queries.path_metrics import PathMetricsQuery
+
+class AnalysisSession:
+    """
+    Uma análise de um conjunto de autores, calculada uma única vez.
+
+    As métricas do repositório e as métricas por arquivo são calculadas
+    no primeiro acesso e reaproveitadas por quem consumir a sessão (o
+    relatório Excel, a resposta JSON do servidor web). As métricas por
+    arquivo só existem se pedidas (`include_paths`): a indexação dos
+    arquivos diferencia todos os commits dos autores, sem os filtros de
+    data que as demais métricas aplicam no próprio git.
+    """
+
+    def __init__(self, repository: GitRepository, authors: List[Author],
+                 incremental: bool = False, streaming: bool = False,
+                 path_month: Optional[str] = None, path_top: int = 20,
+                 include_paths: bool = False):
+        """
+        Inicializa a sessão (nada é calculado até o primeiro acesso).
+
+        Args:
+            repository: Repositório a analisar
+            authors: Autores a analisar
+            incremental: Se True, atualiza os totais armazenados só com os commits novos
+            streaming: Se True, soma os commits por dia durante a caminhada (memória limitada)
+            path_month: Mês (AAAA-MM) dos diretórios mais alterados (padrão: mês atual)
+            path_top: Número de diretórios e arquivos nos rankings
+            include_paths: Se True, calcula as métricas por arquivo
+        """
+        self.repository = repository
+        self.authors = authors
+        self.incremental = incremental
+        self.streaming = streaming
+        self.path_month = path_month
+        self.path_top = path_top
+        self.include_paths = include_paths
+        self._metrics: Optional[Dict[str, Any]] = None
+        self._path_metrics: Optional[Dict[str, Any]] = None
+
+    @property
+    def path_metrics(self) -> Optional[Dict[str, Any]]:
+        """Métricas por arquivo (PathMetricsQuery), calculadas uma vez; None se não foram pedidas."""
+        if self.include_paths and self._path_metrics is None:
+            self._path_metrics = PathMetricsQuery(self.repository, top=self.path_top).execute(
+                self.authors, month=self.path_month
+            )
+        return self._path_metrics
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Métricas do repositório (RepositoryMetricsQuery), calculadas uma vez."""
+        if self._metrics is None:
+            query = RepositoryMetricsQuery(self.repository, incremental=self.incremental,
+                                           streaming=self.streaming)
+            self._metrics = query.execute(self.authors)
+        return self._metrics
+
+    @property
+    def has_data(self) -> bool:
+        """Indica se há commits dos autores (sem percorrer o histórico de novo)."""
+        return bool(self.metrics['resumo_autor_ambiente'])
@@ -3,11 +3,25 @@ import pandas as pd
 from datetime import datetime
 from domain.entities.author import Author
 from infrastructure.repositories.git_repository import GitRepository
+from application.queries.aggregation_cube import AggregationCube
+
+# Nomes das colunas do cubo nos resultados
+COLUMN_NAMES = {
+    'day': 'data',
+    'month': 'mes',
+    'files': 'arquivos_alterados',
+    'insertions': 'linhas_adicionadas',
+    'deletions': 'linhas_removidas',
+    'lines': 'total_linhas',
+    'commits': 'total_commits'
+}
 
 class CommitStatisticsQuery:
-    def __init__(self, repository: GitRepository, authors: List[Author]):
+    def __init__(self, repository: GitRepository, authors: List[Author], streaming: bool = False):
         self.repository = repository
         self.authors = authors
+        # Soma os commits por dia durante a caminhada, sem a tabela de fatos
+        self.streaming = streaming
 
     def execute(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """
@@ -19,70 +33,39 @@ class CommitStatisticsQuery:
             - DataFrame com estatísticas mensais
             - DataFrame com estatísticas por branch
         """
-        # Inicializa as listas para armazenar os dados
-        daily_data = []
-        monthly_data = []
-        branch_data = []
-
-        for author in self.authors:
-            commits = self.repository.get_commits_by_author(author)
-            
-            # Processa cada commit
-            for commit in commits:
-                date = commit.committed_datetime
-                
-                # Estatísticas do commit
-                stats = {
-                    'autor': str(author),  # Usa str(author) para obter o formato nome <email>
-                    'data': date.date(),
-                    'mes': date.strftime('%Y-%m'),
-                    'arquivos_alterados': len(commit.stats.files),
-                    'linhas_adicionadas': sum(f['insertions'] for f in commit.stats.files.values()),
-                    'linhas_removidas': sum(f['deletions'] for f in commit.stats.files.values()),
-                    'total_linhas': sum(f['lines'] for f in commit.stats.files.values()),
-                    'hash': commit.hexsha[:8],
-                    'mensagem': commit.message.strip(),
-                    'branch': 'main',  # Simplificado para apenas main
-                    'ambiente': 'PRD'   # Simplificado para apenas PRD
-                }
-                
-                daily_data.append({**stats, 'data': stats['data']})
-                monthly_data.append({**stats, 'data': stats['mes']})
-                branch_data.append(stats)
-
-        # Cria os DataFrames
-        daily_df = pd.DataFrame(daily_data) if daily_data else pd.DataFrame()
-        monthly_df = pd.DataFrame(monthly_data) if monthly_data else pd.DataFrame()
-        branch_df = pd.DataFrame(branch_data) if branch_data else pd.DataFrame()
-
+        if not self.authors:
+            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        
+        # Cubo autor × ambiente × branch × dia, com o dia no fuso original do commit
+        author_emails = {author.email for author in self.authors}
+        if self.streaming:
+            totals = self.repository.get_daily_totals(author_emails, local_time=True)
+            cube = AggregationCube.from_daily_rows(totals.to_rows(), totals.latest_names())
+        else:
+            facts = self.repository.get_commit_facts(author_emails)
+            cube = AggregationCube.from_facts(facts, local_time=True)
+        
+        # Uma cópia das células por autor selecionado, identificada por nome <email>
+        cells = [cube.select_emails([author.email]).cells.assign(autor=str(author))
+                 for author in self.authors]
+        cells = [author_cells for author_cells in cells if not author_cells.empty]
+        if not cells:
+            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        cube = AggregationCube(pd.concat(cells, ignore_index=True))
+        measures = ['files', 'insertions', 'deletions', 'lines', 'commits']
+        
         # Agrupa os dados diários
-        if not daily_df.empty:
-            daily_df = daily_df.groupby(['data', 'autor']).agg({
-                'arquivos_alterados': 'sum',
-                'linhas_adicionadas': 'sum',
-                'linhas_removidas': 'sum',
-                'total_linhas': 'sum',
-                'hash': 'count'
-            }).reset_index().rename(columns={'hash': 'total_commits'})
-
+        daily_df = cube.rollup(['day', 'autor'])
+        daily_df['day'] = daily_df['day'].dt.date
+        daily_df = daily_df[['day', 'autor', *measures]].rename(columns=COLUMN_NAMES)
+        
         # Agrupa os dados mensais
-        if not monthly_df.empty:
-            monthly_df = monthly_df.groupby(['mes', 'autor']).agg({
-                'arquivos_alterados': 'sum',
-                'linhas_adicionadas': 'sum',
-                'linhas_removidas': 'sum',
-                'total_linhas': 'sum',
-                'hash': 'count'
-            }).reset_index().rename(columns={'hash': 'total_commits'})
-
+        monthly_df = cube.rollup(['month', 'autor'])
+        monthly_df = monthly_df[['month', 'autor', *measures]].rename(columns=COLUMN_NAMES)
+        
         # Agrupa os dados por branch
-        if not branch_df.empty:
-            branch_df = branch_df.groupby(['autor', 'branch', 'ambiente']).agg({
-                'arquivos_alterados': 'sum',
-                'linhas_adicionadas': 'sum',
-                'linhas_removidas': 'sum',
-                'total_linhas': 'sum',
-                'hash': 'count'
-            }).reset_index().rename(columns={'hash': 'total_commits'})
-
-        return daily_df, monthly_df, branch_df 
\ No newline at end of file
+        branch_df = cube.rollup(['autor'])[['autor', *measures]].rename(columns=COLUMN_NAMES)
+        branch_df.insert(1, 'branch', 'main')  # Simplificado para apenas main
+        branch_df.insert(2, 'ambiente', 'PRD')  # Simplificado para apenas PRD
+        
+        return daily_df, monthly_df, branch_df
@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from domain.entities.author import Author
+from infrastructure.repositories.git_repository import GitRepository
+
+class PathMetricsQuery:
+    def __init__(self, repository: GitRepository, top: int = 20):
+        """
+        Inicializa a query.
+
+        Args:
+            repository: Repositório a analisar
+            top: Número de diretórios e arquivos nos rankings
+        """
+        self.repository = repository
+        self.top = top
+
+    @staticmethod
+    def _month_range(month: str):
+        """Converte 'AAAA-MM' em (início, fim) em segundos desde epoch (UTC)."""
+        start = datetime.strptime(month, '%Y-%m').replace(tzinfo=timezone.utc)
+        end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+        return int(start.timestamp()), int(end.timestamp())
+
+    def execute(self, authors: List[Author], month: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Calcula as métricas por arquivo a partir do índice de arquivos.
+
+        Cada commit conta uma vez, mesmo que esteja em várias branches.
+
+        Args:
+            authors: Autores a analisar
+            month: Mês dos diretórios mais alterados, 'AAAA-MM' (padrão: mês atual)
+
+        Returns:
+            Dicionário com linhas por extensão e autor, diretórios mais
+            alterados no mês e churn por arquivo
+        """
+        month = month or datetime.now(timezone.utc).strftime('%Y-%m')
+        author_emails = {author.email for author in authors}
+        names = {author.email: author.name for author in authors}
+
+        try:
+            index = self.repository.get_path_index(author_emails)
+        except Exception as e:
+            print(f"Aviso: Não foi possível indexar os arquivos alterados: {str(e)}")
+            return {'mes': month, 'linhas_por_extensao': [], 'diretorios_mes': [], 'churn_por_arquivo': []}
+
+        lines_by_extension = [
+            {
+                'nome_autor': names.get(email, email),
+                'email_autor': email,
+                'extensao': extension,
+                'total_commits': commits,
+                'arquivos': files,
+                'linhas_adicionadas': insertions,
+                'linhas_removidas': deletions,
+                'total_linhas': insertions + deletions
+            }
+            for email, extension, commits, files, insertions, deletions
+            in index.lines_by_extension(author_emails)
+        ]
+
+        since, until = self._month_range(month)
+        top_directories = [
+            {
+                'diretorio': directory,
+                'total_commits': commits,
+                'arquivos': files,
+                'linhas_adicionadas': insertions,
+                'linhas_removidas': deletions,
+                'total_linhas': insertions + deletions
+            }
+            for directory, commits, files, insertions, deletions
+            in index.top_directories(author_emails, since, until, limit=self.top)
+        ]
+
+        path_churn = [
+            {
+                'arquivo': path,
+                'total_commits': commits,
+                'linhas_adicionadas': insertions,
+                'linhas_removidas': deletions,
+                'total_linhas': insertions + deletions
+            }
+            for path, commits, _, insertions, deletions
+            in index.path_churn(author_emails, limit=self.top)
+        ]
+
+        return {
+            'mes': month,
+            'linhas_por_extensao': lines_by_extension,
+            'diretorios_mes': top_directories,
+            'churn_por_arquivo': path_churn
+        }
@@ -1,29 +1,80 @@
 from typing import List, Dict, Any
 from datetime import datetime
 import pandas as pd
-from collections import defaultdict
 from domain.entities.author import Author
 from infrastructure.repositories.git_repository import GitRepository
+from infrastructure.ingestion.time_buckets import day_labels
+from application.queries.aggregation_cube import AggregationCube
+
+# Nomes das colunas do cubo nos resultados
+COLUMN_NAMES = {
+    'name': 'nome_autor',
+    'email': 'email_autor',
+    'environment': 'ambiente',
+    'day': 'data',
+    'month': 'mes',
+    'files': 'arquivos',
+    'insertions': 'linhas_adicionadas',
+    'deletions': 'linhas_removidas',
+    'lines': 'total_linhas',
+    'branches': 'total_branches'
+}
 
 class RepositoryMetricsQuery:
-    def __init__(self, repository: GitRepository):
+    def __init__(self, repository: GitRepository, incremental: bool = False,
+                 streaming: bool = False):
+        """
+        Inicializa a query.
+        
+        Args:
+            repository: Repositório a analisar
+            incremental: Se True, atualiza os totais armazenados percorrendo
+                apenas os commits novos desde a última análise
+            streaming: Se True, soma os commits por dia durante a caminhada,
+                sem montar a tabela de fatos (memória limitada)
+        """
         self.repository = repository
+        self.incremental = incremental
+        self.streaming = streaming
 
-    def get_most_recent_name_for_email(self, commits_data: List[Dict]) -> Dict[str, str]:
-        """Obtém o nome mais recente usado para cada email."""
-        email_to_name = {}
-        email_to_date = {}
-        
-        for commit in commits_data:
-            email = commit['email_autor']
-            date = commit['data']
-            name = commit['nome_autor']
-            
-            if email not in email_to_date or date > email_to_date[email]:
-                email_to_name[email] = name
-                email_to_date[email] = date
-        
-        return email_to_name
+    def _build_cube(self, authors: List[Author]) -> AggregationCube:
+        """Agrega a tabela de fatos dos autores num cubo autor × ambiente × branch × dia."""
+        author_emails = {author.email for author in authors}
+        if not author_emails:
+            return AggregationCube.from_daily_rows([], {})
+        
+        try:
+            facts = self.repository.get_commit_facts(author_emails)
+        except Exception as e:
+            print(f"Aviso: Não foi possível analisar o histórico: {str(e)}")
+            return AggregationCube.from_daily_rows([], {})
+        
+        return AggregationCube.from_facts(facts)
+
+    def _build_streaming_cube(self, authors: List[Author]) -> AggregationCube:
+        """Soma os commits dos autores por (branch, autor, dia) durante a caminhada do histórico."""
+        author_emails = {author.email for author in authors}
+        if not author_emails:
+            return AggregationCube.from_daily_rows([], {})
+        
+        try:
+            totals = self.repository.get_daily_totals(author_emails)
+        except Exception as e:
+            print(f"Aviso: Não foi possível analisar o histórico: {str(e)}")
+            return AggregationCube.from_daily_rows([], {})
+        
+        return AggregationCube.from_daily_rows(totals.to_rows(), totals.latest_names())
+
+    def _build_incremental_cube(self, authors: List[Author]) -> AggregationCube:
+        """
+        Atualiza os totais armazenados com os commits novos e monta o cubo
+        a partir das linhas por (branch, autor, dia).
+        """
+        author_emails = {author.email for author in authors}
+        incremental = self.repository.incremental_metrics
+        incremental.update(self.repository.get_branches(), author_emails)
+        rows, names = incremental.load(author_emails)
+        return AggregationCube.from_daily_rows(rows, names)
 
     def execute(self, authors: List[Author]) -> Dict[str, Any]:
         """
@@ -35,129 +86,39 @@ class RepositoryMetricsQuery:
         Returns:
             Dicionário com as métricas organizadas como na aba Resumo Geral do Excel
         """
-        commits_data = []
-        branch_commits = defaultdict(list)
-        
-        # Analisa commits em cada branch
-        for branch in self.repository.get_branches():
-            try:
-                ambiente = 'PRD' if branch.lower() in ['main', 'master'] else 'HML'
-                for commit in self.repository.repo.iter_commits(branch):
-                    # Verifica se o commit é de um dos autores selecionados
-                    if not any(author.email == commit.author.email for author in authors):
-                        continue
-                    
-                    stats = commit.stats.total
-                    commit_date = pd.to_datetime(commit.committed_datetime).tz_convert('UTC').tz_localize(None)
-                    
-                    commit_info = {
-                        'data': commit_date,
-                        'nome_autor': commit.author.name,
-                        'email_autor': commit.author.email,
-                        'branch': branch,
-                        'ambiente': ambiente,
-                        'arquivos': stats['files'],
-                        'linhas_adicionadas': stats['insertions'],
-                        'linhas_removidas': stats['deletions'],
-                        'total_linhas': stats['insertions'] + stats['deletions'],
-                        'commits': 1  # Cada commit conta como 1
-                    }
-                    
-                    commits_data.append(commit_info)
-                    branch_commits[branch].append(commit_info)
-            except Exception as e:
-                print(f"Aviso: Não foi possível analisar a branch {branch}: {str(e)}")
-                continue
-        
-        if not commits_data:
+        if self.incremental:
+            cube = self._build_incremental_cube(authors)
+        elif self.streaming:
+            cube = self._build_streaming_cube(authors)
+        else:
+            cube = self._build_cube(authors)
+        
+        if cube.empty:
             return {
                 'resumo_autor_ambiente': [],
                 'resumo_ambiente': [],
                 'totais_diarios': [],
                 'totais_mensais': []
             }
-
-        # Obtém o nome mais recente para cada email
-        email_to_name = self.get_most_recent_name_for_email(commits_data)
-        
-        # Atualiza os nomes dos autores para usar o mais recente
-        for commit in commits_data:
-            commit['nome_autor'] = email_to_name[commit['email_autor']]
-        
-        # Converte para DataFrame
-        df = pd.DataFrame(commits_data)
         
+        # Todos os resumos são agregações do mesmo cubo (já com o nome mais recente de cada email)
         # 1. RESUMO POR AUTOR E AMBIENTE
-        resumo_autor = df.groupby(['nome_autor', 'email_autor', 'ambiente']).agg({
-            'commits': 'sum',
-            'arquivos': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum',
-            'branch': 'nunique'  # Conta número único de branches
-        }).reset_index()
-        
-        # Renomeia a coluna branch para total_branches
-        resumo_autor = resumo_autor.rename(columns={'branch': 'total_branches'})
+        resumo_autor = cube.rollup(['name', 'email', 'environment'], distinct_branches=True)
         
         # 2. RESUMO POR AMBIENTE
-        resumo_ambiente = df.groupby(['ambiente']).agg({
-            'commits': 'sum',
-            'arquivos': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum',
-            'branch': 'nunique'  # Conta número único de branches
-        }).reset_index()
-        
-        # Renomeia a coluna branch para total_branches
-        resumo_ambiente = resumo_ambiente.rename(columns={'branch': 'total_branches'})
+        resumo_ambiente = cube.rollup(['environment'], distinct_branches=True)
         
         # 3. TOTAIS DIÁRIOS
-        df['data'] = df['data'].dt.strftime('%Y-%m-%d')
-        totais_diarios = df.groupby(['data', 'ambiente']).agg({
-            'commits': 'sum',
-            'arquivos': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum'
-        }).reset_index()
-        
-        # Soma os ambientes para cada dia
-        totais_diarios = totais_diarios.groupby('data').agg({
-            'commits': 'sum',
-            'arquivos': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum'
-        }).reset_index()
-        
-        totais_diarios = totais_diarios.sort_values('data', ascending=False)
+        totais_diarios = cube.rollup(['day'])
+        totais_diarios['day'] = day_labels(totais_diarios['day'].to_numpy())
+        totais_diarios = totais_diarios.sort_values('day', ascending=False)
         
         # 4. TOTAIS MENSAIS
-        df['mes'] = pd.to_datetime(df['data']).dt.strftime('%Y-%m')
-        totais_mensais = df.groupby(['mes', 'ambiente']).agg({
-            'commits': 'sum',
-            'arquivos': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum'
-        }).reset_index()
-        
-        # Soma os ambientes para cada mês
-        totais_mensais = totais_mensais.groupby('mes').agg({
-            'commits': 'sum',
-            'arquivos': 'sum',
-            'linhas_adicionadas': 'sum',
-            'linhas_removidas': 'sum',
-            'total_linhas': 'sum'
-        }).reset_index()
-        
-        totais_mensais = totais_mensais.sort_values('mes', ascending=False)
+        totais_mensais = cube.rollup(['month']).sort_values('month', ascending=False)
         
         return {
-            'resumo_autor_ambiente': resumo_autor.to_dict('records'),
-            'resumo_ambiente': resumo_ambiente.to_dict('records'),
-            'totais_diarios': totais_diarios.to_dict('records'),
-            'totais_mensais': totais_mensais.to_dict('records')
-        } 
\ No newline at end of file
+            'resumo_autor_ambiente': resumo_autor.rename(columns=COLUMN_NAMES).to_dict('records'),
+            'resumo_ambiente': resumo_ambiente.rename(columns=COLUMN_NAMES).to_dict('records'),
+            'totais_diarios': totais_diarios.rename(columns=COLUMN_NAMES).to_dict('records'),
+            'totais_mensais': totais_mensais.rename(columns=COLUMN_NAMES).to_dict('records')
+        }
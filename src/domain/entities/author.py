@@ -1,13 +1,19 @@
+import sys
 from typing import Optional
 
 class Author:
     """
     Representa um autor de commits no repositório.
     
+    Usa __slots__ e internaliza nome e email: o mesmo autor aparece em
+    milhares de commits, então as strings são compartilhadas.
+    
     Attributes:
         name (str): Nome do autor
         email (str): Email do autor
     """
+    __slots__ = ('name', 'email')
+    
     def __init__(self, name: str, email: Optional[str] = None):
         """
         Inicializa um autor.
@@ -18,11 +24,11 @@ class Author:
         """
         # Se apenas o email for fornecido no name, usa ele como identificador
         if '@' in name and not email:
-            self.email = name
-            self.name = name.split('@')[0]  # Usa parte antes do @ como nome
+            self.email = sys.intern(name)
+            self.name = sys.intern(name.split('@')[0])  # Usa parte antes do @ como nome
         else:
-            self.name = name
-            self.email = email or name  # Se não tiver email, usa o nome como identificador
+            self.name = sys.intern(name)
+            self.email = sys.intern(email or name)  # Se não tiver email, usa o nome como identificador
     
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Author):
@@ -1,14 +1,41 @@
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
+from array import array
+from dataclasses import FrozenInstanceError, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from domain.entities.author import Author
+from domain.enums.environment_type import EnvironmentType
 
-@dataclass(frozen=True)
+# Função que carrega a mensagem de um commit a partir do hash completo
+MessageLoader = Callable[[str], Optional[str]]
+
+# Função que calcula (arquivos, adições, remoções) de um commit
+StatsLoader = Callable[[], Tuple[int, int, int]]
+
+# Função que calcula as estatísticas de vários commits: hashes -> {hash: (arquivos, adições, remoções)}
+BatchStatsLoader = Callable[[List[str]], Dict[str, Tuple[int, int, int]]]
+
+# Valor das colunas de estatísticas ainda não calculadas
+PENDING = -1
+
+# Tamanho do hash SHA-1 em bytes
+SHA_SIZE = 20
+
+
+@dataclass(init=False, repr=False, eq=False)
 class Commit:
     """
     Representa um commit no repositório.
-    
+
+    Objeto imutável com __slots__. A mensagem e as estatísticas (arquivos,
+    adições e remoções) podem ser informadas já prontas ou como funções,
+    chamadas só no primeiro acesso: quem usa apenas hash, autor e data
+    nunca dispara um diff.
+
+    Continua sendo um dataclass (`fields`, `asdict` e `replace` funcionam);
+    esses helpers leem as propriedades, então carregam a mensagem e as
+    estatísticas pendentes.
+
     Attributes:
         hash (str): Hash do commit
         author (Author): Autor do commit
@@ -20,6 +47,8 @@ class Commit:
         deletions (int): Número de linhas removidas
         message (Optional[str]): Mensagem do commit
     """
+    __slots__ = ('hash', 'author', 'date', 'branch', 'environment', '_stats', '_message')
+
     hash: str
     author: Author
     date: datetime
@@ -28,17 +57,258 @@ class Commit:
     files_changed: int
     insertions: int
     deletions: int
-    message: Optional[str] = None
+    message: Optional[str]
+
+    def __init__(self, hash: str, author: Author, date: datetime, branch: str,
+                 environment: str, files_changed: Optional[int] = None,
+                 insertions: Optional[int] = None, deletions: Optional[int] = None,
+                 message: Union[str, Callable[[], Optional[str]], None] = None,
+                 stats_loader: Optional[StatsLoader] = None):
+        """
+        Inicializa o commit.
+
+        Args:
+            hash: Hash do commit
+            author: Autor do commit
+            date: Data do commit
+            branch: Branch onde o commit foi feito
+            environment: Ambiente (PRD/HML)
+            files_changed: Número de arquivos alterados
+            insertions: Número de linhas adicionadas
+            deletions: Número de linhas removidas
+            message: Mensagem, ou função que a carrega sob demanda
+            stats_loader: Função que calcula (arquivos, adições, remoções) no
+                primeiro acesso, usada quando as estatísticas não foram informadas
+
+        Raises:
+            TypeError: Se as estatísticas não foram informadas (todas) nem há stats_loader
+        """
+        stats = (files_changed, insertions, deletions)
+        if None in stats:
+            if stats_loader is None:
+                raise TypeError('Commit requer files_changed, insertions e deletions, ou stats_loader')
+            stats = stats_loader
+        for name, value in (('hash', hash), ('author', author), ('date', date),
+                            ('branch', branch), ('environment', environment),
+                            ('_stats', stats), ('_message', message)):
+            object.__setattr__(self, name, value)
+
+    @property
+    def message(self) -> Optional[str]:
+        """Mensagem do commit (carregada no primeiro acesso, se for o caso)."""
+        if callable(self._message):
+            object.__setattr__(self, '_message', self._message())
+        return self._message
+
+    def _get_stats(self) -> Tuple[int, int, int]:
+        """Retorna (arquivos, adições, remoções), calculando no primeiro acesso."""
+        if callable(self._stats):
+            object.__setattr__(self, '_stats', tuple(self._stats()))
+        return self._stats
+
+    @property
+    def files_changed(self) -> int:
+        return self._get_stats()[0]
+
+    @property
+    def insertions(self) -> int:
+        return self._get_stats()[1]
+
+    @property
+    def deletions(self) -> int:
+        return self._get_stats()[2]
+
+    @property
+    def stats_loaded(self) -> bool:
+        """Indica se as estatísticas já foram calculadas."""
+        return not callable(self._stats)
 
     @property
     def total_lines(self) -> int:
         """Retorna o total de linhas alteradas (adições + remoções)."""
         return self.insertions + self.deletions
 
+    def __setattr__(self, name: str, value: object) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Commit):
             return NotImplemented
         return self.hash == other.hash
 
     def __hash__(self) -> int:
-        return hash(self.hash) 
\ No newline at end of file
+        return hash(self.hash)
+
+    def __repr__(self) -> str:
+        # Não força o cálculo das estatísticas só para exibir o commit
+        stats = (f"files_changed={self._stats[0]!r}, insertions={self._stats[1]!r}, "
+                 f"deletions={self._stats[2]!r}" if self.stats_loaded else "stats=<pendente>")
+        return (f"Commit(hash={self.hash!r}, author={self.author!r}, date={self.date!r}, "
+                f"branch={self.branch!r}, environment={self.environment!r}, {stats})")
+
+
+class CommitBatch(Sequence[Commit]):
+    """
+    Lote de commits guardado em colunas (struct-of-arrays).
+
+    Cada commit é guardado uma única vez (hash em 20 bytes, ids de autor e
+    datas e totais em arrays de inteiros), mesmo que esteja em várias
+    branches; as entradas (commit, branch) são só dois inteiros. Autores e
+    branches são internalizados em listas e referenciados por id, e as
+    mensagens não são guardadas: são carregadas por `message_loader`
+    quando `Commit.message` é acessado.
+
+    Commits adicionados sem estatísticas ficam pendentes: no primeiro
+    acesso a `files_changed`, `insertions` ou `deletions` de qualquer um
+    deles, `stats_loader` calcula todos os pendentes de uma vez.
+
+    Indexar ou percorrer o lote retorna objetos `Commit`, criados sob
+    demanda a partir das colunas.
+    """
+
+    def __init__(self, message_loader: Optional[MessageLoader] = None,
+                 stats_loader: Optional[BatchStatsLoader] = None):
+        """
+        Inicializa um lote vazio.
+
+        Args:
+            message_loader: Função hash completo -> mensagem (opcional)
+            stats_loader: Função hashes -> estatísticas, para os commits
+                adicionados sem elas (opcional)
+        """
+        self.message_loader = message_loader
+        self.stats_loader = stats_loader
+        self.authors: List[Author] = []
+        self.branches: List[str] = []
+        self._author_ids: Dict[str, int] = {}
+        self._branch_ids: Dict[str, int] = {}
+        self._environments: List[str] = []
+        # Colunas por commit
+        self._shas = bytearray()
+        self._commit_authors = array('i')
+        self._timestamps = array('q')
+        self._tz_offsets = array('i')
+        self._files = array('q')
+        self._insertions = array('q')
+        self._deletions = array('q')
+        # Colunas por entrada (commit, branch)
+        self._rows = array('i')
+        self._entry_branches = array('i')
+
+    def add_commit(self, sha: str, author: Author, timestamp: int, tz_offset: int,
+                   files: Optional[int] = None, insertions: Optional[int] = None,
+                   deletions: Optional[int] = None) -> int:
+        """
+        Guarda os dados de um commit (ainda sem branch).
+
+        Args:
+            sha: Hash completo
+            author: Autor do commit
+            timestamp: Data do commit em segundos desde epoch
+            tz_offset: Offset do fuso em segundos a leste de UTC
+            files: Número de arquivos alterados (None para calcular sob demanda)
+            insertions: Número de linhas adicionadas
+            deletions: Número de linhas removidas
+
+        Returns:
+            Número da linha do commit, usado em `add_entry`
+        """
+        if files is None:
+            files = insertions = deletions = PENDING
+        author_id = self._author_ids.get(author.email)
+        if author_id is None:
+            author_id = self._author_ids[author.email] = len(self.authors)
+            self.authors.append(author)
+        self._shas += bytes.fromhex(sha)
+        self._commit_authors.append(author_id)
+        self._timestamps.append(timestamp)
+        self._tz_offsets.append(tz_offset)
+        self._files.append(files)
+        self._insertions.append(insertions)
+        self._deletions.append(deletions)
+        return len(self._timestamps) - 1
+
+    def add_entry(self, row: int, branch: str) -> None:
+        """Registra que o commit da linha `row` está na branch."""
+        branch_id = self._branch_ids.get(branch)
+        if branch_id is None:
+            branch_id = self._branch_ids[branch] = len(self.branches)
+            self.branches.append(branch)
+            self._environments.append(str(EnvironmentType.from_branch(branch)))
+        self._rows.append(row)
+        self._entry_branches.append(branch_id)
+
+    def sha(self, row: int) -> str:
+        """Retorna o hash completo do commit da linha `row`."""
+        return self._shas[row * SHA_SIZE:(row + 1) * SHA_SIZE].hex()
+
+    def row_stats(self, row: int) -> Tuple[int, int, int]:
+        """
+        Retorna (arquivos, adições, remoções) do commit da linha `row`.
+
+        Se o commit está pendente, calcula antes todos os commits pendentes
+        do lote numa única chamada a `stats_loader`.
+        """
+        if self._files[row] == PENDING:
+            self.load_stats()
+        return self._files[row], self._insertions[row], self._deletions[row]
+
+    def load_stats(self) -> None:
+        """Calcula as estatísticas de todos os commits pendentes do lote."""
+        pending = [row for row, files in enumerate(self._files) if files == PENDING]
+        if not pending:
+            return
+        if self.stats_loader is None:
+            raise RuntimeError('o lote não tem como calcular as estatísticas pendentes')
+        stats = self.stats_loader([self.sha(row) for row in pending])
+        for row in pending:
+            files, insertions, deletions = stats.get(self.sha(row), (0, 0, 0))
+            self._files[row] = files
+            self._insertions[row] = insertions
+            self._deletions[row] = deletions
+
+    def nbytes(self) -> int:
+        """Retorna os bytes ocupados pelas colunas (sem autores e branches)."""
+        columns = (self._commit_authors, self._timestamps, self._tz_offsets, self._files,
+                   self._insertions, self._deletions, self._rows, self._entry_branches)
+        return len(self._shas) + sum(column.itemsize * len(column) for column in columns)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('índice fora do lote')
+        row = self._rows[index]
+        branch_id = self._entry_branches[index]
+        sha = self.sha(row)
+        zone = timezone(timedelta(seconds=self._tz_offsets[row]))
+        message = None
+        if self.message_loader is not None:
+            loader = self.message_loader
+            message = lambda: loader(sha)
+        if self._files[row] == PENDING:
+            stats = {'stats_loader': lambda: self.row_stats(row)}
+        else:
+            stats = {'files_changed': self._files[row], 'insertions': self._insertions[row],
+                     'deletions': self._deletions[row]}
+        return Commit(
+            hash=sha[:8],
+            author=self.authors[self._commit_authors[row]],
+            date=datetime.fromtimestamp(self._timestamps[row], zone),
+            branch=self.branches[branch_id],
+            environment=self._environments[branch_id],
+            message=message,
+            **stats
+        )
+
+    def __iter__(self) -> Iterator[Commit]:
+        for index in range(len(self)):
+            yield self[index]
@@ -0,0 +1,18 @@
+from enum import Enum
+
+class MergePolicy(Enum):
+    """
+    Tratamento dos commits de merge nas estatísticas.
+    """
+    DIFF = 'diff'  # Conta os merges com diff contra o primeiro pai (padrão)
+    SKIP = 'skip'  # Ignora os merges
+    FIRST_PARENT = 'first-parent'  # Percorre só a cadeia de primeiros pais de cada branch
+    NO_DIFF = 'no-diff'  # Conta os merges como commits, sem diff (0 arquivos e linhas)
+
+    @property
+    def diffs_merges(self) -> bool:
+        """Indica se os merges são diferenciados contra o primeiro pai."""
+        return self in (MergePolicy.DIFF, MergePolicy.FIRST_PARENT)
+
+    def __str__(self) -> str:
+        return self.value
@@ -4,20 +4,44 @@ from typing import List, Dict, Set, Tuple, Optional
 from collections import defaultdict
 from git.objects.commit import Commit
 from domain.entities.author import Author
+from infrastructure.ingestion.author_index import AuthorEntry
+from infrastructure.ingestion.batch_stats import FileStat
+from infrastructure.ingestion.branch_history import BranchHistory
+from infrastructure.ingestion.commit_index import AuthorCommitIndex
+from infrastructure.ingestion.identity_table import IdentityTable
+from infrastructure.ingestion.path_index import PathIndex
 
 from git import Repo
 
 class GitRepository:
-    def __init__(self, path: str):
+    def __init__(self, path: str, use_cache: bool = True):
         """
         Inicializa o repositório Git.
         
         Args:
             path: Caminho para o repositório Git
+            use_cache: Se True, o índice de arquivos é persistente (no
+                diretório de cache); senão, temporário
         """
         self.path = Path(path).resolve()
         self.repo = Repo(str(self.path))
+        self.history = BranchHistory(str(self.path))
+        self.batch_stats = self.history.batch_stats
+        self.commit_index = AuthorCommitIndex(self.history)
+        self.use_cache = use_cache
+        self._path_index: Optional[PathIndex] = None
         self._authors_cache = None
+        self._identity_table = None
+    
+    @property
+    def path_index(self) -> PathIndex:
+        """Índice de arquivos, criado no primeiro uso (nenhum arquivo é criado antes disso)."""
+        if self._path_index is None:
+            self._path_index = (
+                PathIndex.for_repository(self.history, str(self.path), self.repo.git_dir)
+                if self.use_cache else PathIndex(self.history)
+            )
+        return self._path_index
     
     def get_all_authors(self) -> List[Tuple[str, str]]:
         """
@@ -27,64 +51,57 @@ class GitRepository:
             Lista de tuplas (nome, email) de todos os autores
         """
         if self._authors_cache is None:
-            authors = set()
-            for commit in self.repo.iter_commits():
-                authors.add((commit.author.name, commit.author.email))
+            # Um único git log só com nome e email, sem criar objetos por commit
+            output = self.repo.git.log('--no-use-mailmap', '--format=%an%x00%ae')
+            authors = {tuple(line.split('\0', 1)) for line in output.splitlines() if '\0' in line}
             self._authors_cache = list(authors)
         return self._authors_cache
 
+    def get_identity_table(self) -> IdentityTable:
+        """
+        Retorna a tabela de identidades dos autores, consolidada pelo .mailmap.
+        
+        Montada uma única vez, com índices por email, nome e n-gramas.
+        """
+        if self._identity_table is None:
+            entries = [AuthorEntry(name, email, 0, 0, 0) for name, email in sorted(self.get_all_authors())]
+            self._identity_table = IdentityTable.build(entries, str(self.path))
+        return self._identity_table
+
     def find_author_variations(self, author) -> List[Tuple[str, str]]:
         """
         Encontra todas as variações de um autor no repositório.
         
+        Busca o email e o nome (exatos ou parciais) na tabela de
+        identidades e retorna todos os pares das identidades encontradas,
+        incluindo os consolidados pelo .mailmap.
+        
         Args:
             author: Objeto Author para buscar
             
         Returns:
             Lista de tuplas (nome, email) que correspondem ao autor
         """
-        variations = []
-        search_email = author.email.lower() if author.email else None
-        search_name = author.name.lower() if author.name else None
-        
-        for name, email in self.get_all_authors():
-            name_lower = name.lower()
-            email_lower = email.lower()
-            
-            # Correspondência exata por email
-            if search_email and search_email == email_lower:
-                variations.append((name, email))
-                continue
-                
-            # Correspondência por nome se não encontrou por email
-            if search_name and search_name == name_lower:
-                variations.append((name, email))
-                continue
-                
-            # Correspondência parcial por email (se o email do autor estiver contido)
-            if search_email and search_email in email_lower:
-                variations.append((name, email))
-                continue
-                
-            # Correspondência parcial por nome (se o nome do autor estiver contido)
-            if search_name and search_name in name_lower:
-                variations.append((name, email))
-        
-        return variations
+        table = self.get_identity_table()
+        identities = [identity for text in (author.email, author.name) if text
+                      for identity in table.search(text)]
+        return list(dict.fromkeys(alias for identity in identities for alias in identity.aliases))
         
     def get_commits_by_author(self, author: Author) -> List[Commit]:
         """
         Retorna todos os commits feitos por um autor específico.
         """
-        commits = []
-        for branch in self.get_all_branches():
-            try:
-                for commit in self.repo.iter_commits(branch):
-                    if commit.author.email == author.email:
-                        commits.append(commit)
-            except:
-                print(f"Aviso: Não foi possível analisar a branch {branch}")
-        return commits
+        return [Commit(self.repo, bytes.fromhex(sha)) for sha in self._get_author_shas(author)]
+
+    def _get_author_shas(self, author: Author) -> List[str]:
+        """
+        Retorna os hashes dos commits do autor, uma vez por branch que os contém.
+        
+        Vem do índice email -> commits (montado sem diffs), sem criar
+        objetos de commit.
+        """
+        by_branch = self.commit_index.lookup(self.get_all_branches(), author.email)
+        return [sha for shas in by_branch.values() for sha in shas]
 
     def get_all_branches(self) -> List[str]:
         """
@@ -121,7 +138,26 @@ class GitRepository:
         Returns:
             Número total de commits
         """
-        return len(self.get_commits_by_author(author))
+        # Só conta os hashes do índice: nenhum objeto de commit nem diff
+        return len(self._get_author_shas(author))
+    
+    def _get_file_stats_by_author(self, author) -> List[List[FileStat]]:
+        """
+        Retorna o numstat por arquivo de cada commit do autor, lido do índice de arquivos.
+        
+        O índice é atualizado antes com os commits novos do autor; cada
+        commit é diferenciado uma única vez entre chamadas e execuções.
+        
+        Args:
+            author: Objeto Author
+            
+        Returns:
+            Lista com os arquivos de cada commit, na ordem de get_commits_by_author
+        """
+        shas = self._get_author_shas(author)
+        self.path_index.update(self.get_all_branches(), [author.email])
+        file_stats = self.path_index.get_file_stats(shas)
+        return [file_stats.get(sha, []) for sha in shas]
     
     def get_lines_changed_by_author(self, author) -> int:
         """
@@ -134,9 +170,9 @@ class GitRepository:
             Número total de linhas alteradas
         """
         total_lines = 0
-        for commit in self.get_commits_by_author(author):
-            for file in commit.stats.files:
-                total_lines += commit.stats.files[file]['lines']
+        for files in self._get_file_stats_by_author(author):
+            for _, insertions, deletions in files:
+                total_lines += insertions + deletions
         return total_lines
     
     def get_file_types_by_author(self, author) -> dict:
@@ -150,8 +186,8 @@ class GitRepository:
             Dicionário com contagem de tipos de arquivo
         """
         file_types = {}
-        for commit in self.get_commits_by_author(author):
-            for file in commit.stats.files:
+        for files in self._get_file_stats_by_author(author):
+            for file, _, _ in files:
                 extension = file.split('.')[-1] if '.' in file else 'other'
                 file_types[extension] = file_types.get(extension, 0) + 1
         return file_types 
\ No newline at end of file
@@ -0,0 +1,215 @@
+import sqlite3
+import subprocess
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from infrastructure.ingestion.branch_history import BranchHistory
+from infrastructure.ingestion.stats_cache import cache_directory
+
+INDEX_FILE_NAME = 'authors.sqlite'
+
+# Só os campos do autor: sem numstat e sem mensagem, o git não abre as árvores
+AUTHOR_LOG_FORMAT = '%ct%x00%ae%x00%an'
+
+
+@dataclass
+class AuthorEntry:
+    """
+    Autor do repositório com o resumo de seus commits.
+
+    Attributes:
+        name (str): Nome mais recente usado com o email
+        email (str): Email do autor
+        commits (int): Número de commits distintos alcançáveis pelas branches
+        first_timestamp (int): Data (committer) do primeiro commit, em segundos desde epoch
+        last_timestamp (int): Data (committer) do último commit, em segundos desde epoch
+    """
+    name: str
+    email: str
+    commits: int
+    first_timestamp: int
+    last_timestamp: int
+
+    @property
+    def first_commit(self) -> datetime:
+        """Data do primeiro commit em UTC."""
+        return datetime.fromtimestamp(self.first_timestamp, timezone.utc)
+
+    @property
+    def last_commit(self) -> datetime:
+        """Data do último commit em UTC."""
+        return datetime.fromtimestamp(self.last_timestamp, timezone.utc)
+
+
+class AuthorIndex:
+    """
+    Índice de autores (commits, primeira e última data) do repositório.
+
+    É montado com um único `git log` sem diffs sobre todas as branches e,
+    se houver um arquivo de índice, gravado junto com as pontas das refs:
+    nas próximas chamadas só os commits novos (`novo --not antigo`) são
+    lidos. Refs removidas ou reescritas provocam uma reconstrução.
+    """
+
+    def __init__(self, history: BranchHistory, path: Optional[Path] = None):
+        """
+        Inicializa o índice.
+
+        Args:
+            history: Leitor de histórico do repositório
+            path: Caminho do arquivo SQLite (None para não persistir)
+        """
+        self.history = history
+        self.path = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with closing(self._connect()) as connection, connection:
+                connection.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS author_tips (
+                        ref TEXT PRIMARY KEY,
+                        sha TEXT NOT NULL
+                    );
+                    CREATE TABLE IF NOT EXISTS authors (
+                        email TEXT PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        name_timestamp INTEGER NOT NULL,
+                        commits INTEGER NOT NULL,
+                        first_timestamp INTEGER NOT NULL,
+                        last_timestamp INTEGER NOT NULL
+                    );
+                    CREATE TABLE IF NOT EXISTS author_index_state (
+                        built INTEGER NOT NULL
+                    );
+                    """
+                )
+
+    @classmethod
+    def for_repository(cls, history: BranchHistory, repo_path: str, git_dir: str,
+                       cache_dir: Optional[str] = None) -> 'AuthorIndex':
+        """Cria o índice no mesmo diretório do cache de estatísticas (da política de merges)."""
+        directory = cache_directory(repo_path, git_dir, cache_dir, merge_policy=history.merge_policy)
+        return cls(history, directory / INDEX_FILE_NAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.path), timeout=30)
+        connection.execute('PRAGMA journal_mode = WAL')
+        return connection
+
+    def get_authors(self, branches: Sequence[str]) -> List[AuthorEntry]:
+        """
+        Retorna os autores das branches, do mais recente para o mais antigo.
+
+        Args:
+            branches: Branches consideradas
+
+        Returns:
+            List[AuthorEntry]: Um registro por email
+        """
+        return self.get_authors_at(self.history.resolve_tips(branches))
+
+    def get_authors_at(self, tips: Dict[str, str]) -> List[AuthorEntry]:
+        """
+        Igual a `get_authors`, a partir das pontas já resolvidas.
+
+        Args:
+            tips: Dicionário branch -> hash, como retornado por resolve_tips
+
+        Returns:
+            List[AuthorEntry]: Um registro por email
+        """
+        if self.path is None:
+            entries = self._scan(list(tips.values()))
+        else:
+            entries = self._update(tips)
+        return sorted(entries.values(), key=lambda entry: (-entry.last_timestamp, entry.email))
+
+    def _update(self, tips: Dict[str, str]) -> Dict[str, AuthorEntry]:
+        """Atualiza o índice persistido a partir das pontas das refs."""
+        stored_tips, entries, name_times = self._load()
+        if stored_tips is not None and stored_tips == tips:
+            return entries
+
+        if stored_tips is None or self.history.tips_rewritten(stored_tips, tips):
+            entries, name_times = {}, {}
+            revisions = list(tips.values())
+        else:
+            revisions = [*tips.values(), '--not', *stored_tips.values()]
+
+        self._scan(revisions, entries, name_times)
+        self._save(tips, entries, name_times)
+        return entries
+
+    def _scan(self, revisions: List[str], entries: Optional[Dict[str, AuthorEntry]] = None,
+              name_times: Optional[Dict[str, int]] = None) -> Dict[str, AuthorEntry]:
+        """Soma ao índice os commits alcançáveis pelas revisões."""
+        entries = {} if entries is None else entries
+        name_times = {} if name_times is None else name_times
+        if not revisions:
+            return entries
+        for timestamp, email, name in self._iter_author_lines(revisions):
+            entry = entries.get(email)
+            if entry is None:
+                entries[email] = AuthorEntry(name, email, 1, timestamp, timestamp)
+                name_times[email] = timestamp
+                continue
+            entry.commits += 1
+            entry.first_timestamp = min(entry.first_timestamp, timestamp)
+            entry.last_timestamp = max(entry.last_timestamp, timestamp)
+            if timestamp > name_times[email]:
+                entry.name = name
+                name_times[email] = timestamp
+        return entries
+
+    def _iter_author_lines(self, revisions: List[str]) -> Iterator[Tuple[int, str, str]]:
+        """Executa o git log e retorna (timestamp, email, nome) de cada commit."""
+        process = subprocess.Popen(
+            [self.history.git_binary, 'log', '--no-use-mailmap', *self.history.walk_args(),
+             f'--format={AUTHOR_LOG_FORMAT}', *revisions, '--'],
+            cwd=str(self.history.repo_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            for line in process.stdout:
+                timestamp, email, name = line.rstrip(b'\n').decode('utf-8', 'replace').split('\0', 2)
+                yield int(timestamp), email, name
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read()
+            process.stderr.close()
+            returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"git log falhou: {stderr.decode('utf-8', 'replace').strip()}")
+
+    def _load(self) -> Tuple[Optional[Dict[str, str]], Dict[str, AuthorEntry], Dict[str, int]]:
+        """Lê as pontas das refs e os autores gravados."""
+        with closing(self._connect()) as connection:
+            if connection.execute('SELECT 1 FROM author_index_state').fetchone() is None:
+                return None, {}, {}
+            tips = dict(connection.execute('SELECT ref, sha FROM author_tips').fetchall())
+            entries, name_times = {}, {}
+            rows = connection.execute(
+                'SELECT email, name, name_timestamp, commits, first_timestamp, last_timestamp FROM authors'
+            )
+            for email, name, name_timestamp, commits, first_timestamp, last_timestamp in rows:
+                entries[email] = AuthorEntry(name, email, commits, first_timestamp, last_timestamp)
+                name_times[email] = name_timestamp
+        return tips, entries, name_times
+
+    def _save(self, tips: Dict[str, str], entries: Dict[str, AuthorEntry],
+              name_times: Dict[str, int]) -> None:
+        """Grava o índice e as pontas das refs numa única transação."""
+        with closing(self._connect()) as connection, connection:
+            for table in ('author_tips', 'authors', 'author_index_state'):
+                connection.execute(f'DELETE FROM {table}')
+            connection.execute('INSERT INTO author_index_state VALUES (1)')
+            connection.executemany('INSERT INTO author_tips VALUES (?, ?)', list(tips.items()))
+            connection.executemany(
+                'INSERT INTO authors VALUES (?, ?, ?, ?, ?, ?)',
+                [(entry.email, entry.name, name_times[entry.email], entry.commits,
+                  entry.first_timestamp, entry.last_timestamp) for entry in entries.values()],
+            )
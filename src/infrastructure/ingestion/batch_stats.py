@@ -0,0 +1,287 @@
+import subprocess
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Sequence, Tuple
+
+from domain.enums.merge_policy import MergePolicy
+from infrastructure.ingestion.log_stream import (CommitRecord, diff_merges_args, parse_numstat_value,
+                                                 parse_raw_date)
+from infrastructure.ingestion.path_filter import PathFilter
+
+# Linha ecoada pelo `diff-tree --stdin` (linhas que não são hashes são
+# copiadas para a saída), usada para saber onde termina cada commit
+SENTINEL = b'#git-metrics-batch-end'
+
+DIFF_TREE_ARGS = ['diff-tree', '--stdin', '-z', '-r', '--numstat', '--no-renames', '--root']
+CAT_FILE_ARGS = ['cat-file', '--batch']
+
+CHUNK_SIZE = 1 << 16
+
+# Estatística de um arquivo: (caminho, adições, remoções)
+FileStat = Tuple[str, int, int]
+
+
+def _terminate(processes: List[subprocess.Popen]) -> None:
+    """Encerra os processos git persistentes."""
+    for process in processes:
+        if process.poll() is None:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            process.terminate()
+            process.wait()
+
+
+class BatchStatsService:
+    """
+    Calcula estatísticas de uma lista de commits conhecida.
+
+    Mantém processos `git diff-tree --stdin --numstat` e
+    `git cat-file --batch` abertos e envia todos os hashes pelo mesmo pipe,
+    em vez de um `git diff` por commit (como faz o `commit.stats` do
+    GitPython). As chamadas são serializadas; use uma instância por thread
+    para paralelizar.
+
+    Com um filtro de arquivos, os pathspecs e o limite de tamanho vão
+    para o próprio `diff-tree`, então arquivos excluídos ou grandes
+    demais não são diferenciados.
+    """
+
+    def __init__(self, repo_path: str, git_binary: str = 'git',
+                 path_filter: Optional[PathFilter] = None,
+                 merge_policy: MergePolicy = MergePolicy.DIFF):
+        """
+        Inicializa o serviço (os processos são criados no primeiro uso).
+
+        Args:
+            repo_path: Caminho para o repositório Git
+            git_binary: Executável do git
+            path_filter: Filtro de arquivos aplicado ao numstat (opcional)
+            merge_policy: Se a política não diferencia merges, eles saem sem
+                arquivos nem linhas (o diff-tree nem calcula o diff)
+        """
+        self.repo_path = Path(repo_path)
+        self.git_binary = git_binary
+        self.path_filter = path_filter or PathFilter()
+        self.merge_policy = merge_policy
+        self._lock = threading.Lock()
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._finalizer = weakref.finalize(self, _terminate, [])
+
+    def close(self) -> None:
+        """Encerra os processos git."""
+        with self._lock:
+            _terminate(list(self._processes.values()))
+            self._processes.clear()
+
+    def __enter__(self) -> 'BatchStatsService':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_file_stats(self, shas: Sequence[str]) -> Dict[str, List[FileStat]]:
+        """
+        Retorna o numstat por arquivo de cada commit.
+
+        Mesma semântica do `commit.stats.files` do GitPython: diff contra o
+        primeiro pai, sem renomeações, arquivos binários com 0 linhas (ou
+        omitidos, se o filtro pedir `skip_binary`). Merges ficam sem
+        arquivos se a política de merges não os diferencia.
+
+        Args:
+            shas: Hashes dos commits
+
+        Returns:
+            Dicionário hash -> lista de (caminho, adições, remoções)
+        """
+        if not shas:
+            return {}
+        with self._lock:
+            process = self._process('diff-tree', [*self.path_filter.config_args(), *DIFF_TREE_ARGS,
+                                                  *diff_merges_args(self.merge_policy),
+                                                  '--', *self.path_filter.pathspec()])
+            payload = b''.join(sha.encode('ascii') + b'\n' + SENTINEL + b'\n' for sha in shas)
+            writer = self._write_async(process.stdin, payload)
+            try:
+                return self._read_diff_tree(process.stdout, shas)
+            finally:
+                writer.join()
+
+    def get_records(self, shas: Sequence[str]) -> Dict[str, CommitRecord]:
+        """
+        Retorna os registros completos (cabeçalho e totais) dos commits.
+
+        Args:
+            shas: Hashes dos commits
+
+        Returns:
+            Dicionário hash -> registro
+        """
+        return self.get_records_with_files(shas)[0]
+
+    def get_records_with_files(self, shas: Sequence[str]) -> Tuple[Dict[str, CommitRecord],
+                                                                   Dict[str, List[FileStat]]]:
+        """
+        Retorna os registros completos e o numstat por arquivo dos commits.
+
+        Os totais de cada registro são somados a partir dos arquivos, com um
+        único diff por commit.
+
+        Args:
+            shas: Hashes dos commits
+
+        Returns:
+            Tupla (hash -> registro, hash -> lista de (caminho, adições, remoções))
+        """
+        records = self._read_commits(shas)
+        file_stats = self.get_file_stats(list(records))
+        for sha, files in file_stats.items():
+            record = records[sha]
+            record.files = len(files)
+            record.insertions = sum(insertions for _, insertions, _ in files)
+            record.deletions = sum(deletions for _, _, deletions in files)
+        return records, file_stats
+
+    def get_message(self, sha: str) -> Optional[str]:
+        """
+        Lê a mensagem de um commit pelo `cat-file --batch` já aberto.
+
+        Args:
+            sha: Hash completo do commit
+
+        Returns:
+            Mensagem completa, ou None se o commit não existe
+        """
+        record = self._read_commits([sha]).get(sha)
+        return record.message if record is not None else None
+
+    def _process(self, name: str, args: List[str]) -> subprocess.Popen:
+        """Retorna o processo persistente, criando-o se necessário."""
+        process = self._processes.get(name)
+        if process is None or process.poll() is not None:
+            process = subprocess.Popen(
+                [self.git_binary, *args],
+                cwd=str(self.repo_path),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            self._processes[name] = process
+            self._finalizer.detach()
+            self._finalizer = weakref.finalize(self, _terminate, list(self._processes.values()))
+        return process
+
+    @staticmethod
+    def _write_async(stream: IO[bytes], payload: bytes) -> threading.Thread:
+        """Escreve no stdin em outra thread para não travar com o pipe cheio."""
+        def write():
+            stream.write(payload)
+            stream.flush()
+        thread = threading.Thread(target=write, daemon=True)
+        thread.start()
+        return thread
+
+    def _read_diff_tree(self, stdout: IO[bytes], shas: Sequence[str]) -> Dict[str, List[FileStat]]:
+        """Lê a saída do diff-tree até encontrar um sentinela por commit."""
+        marker = SENTINEL + b'\n'
+        skip_binary = self.path_filter.skip_binary
+        results: Dict[str, List[FileStat]] = {}
+        current: List[FileStat] = []
+        index = 0
+        pending = b''
+
+        def consume(token: bytes) -> bytes:
+            nonlocal current, index
+            while token.startswith(marker):
+                results[shas[index]] = current
+                current = []
+                index += 1
+                token = token[len(marker):]
+            return token
+
+        while index < len(shas):
+            chunk = stdout.read1(CHUNK_SIZE)
+            if not chunk:
+                raise RuntimeError("git diff-tree terminou antes do esperado")
+            tokens = (pending + chunk).split(b'\0')
+            pending = tokens.pop()
+            for token in tokens:
+                token = consume(token)
+                if token.count(b'\t') >= 2:
+                    insertions, deletions, path = token.decode('utf-8', 'replace').split('\t', 2)
+                    if skip_binary and insertions == '-':
+                        continue
+                    current.append((path, parse_numstat_value(insertions), parse_numstat_value(deletions)))
+            pending = consume(pending)
+        return results
+
+    def _read_commits(self, shas: Sequence[str]) -> Dict[str, CommitRecord]:
+        """Lê os objetos dos commits com o `cat-file --batch`."""
+        if not shas:
+            return {}
+        with self._lock:
+            process = self._process('cat-file', CAT_FILE_ARGS)
+            payload = b''.join(sha.encode('ascii') + b'\n' for sha in shas)
+            writer = self._write_async(process.stdin, payload)
+            records = {}
+            try:
+                for sha in shas:
+                    header = process.stdout.readline().split()
+                    if len(header) < 3 or header[1] != b'commit':
+                        if len(header) == 3:
+                            process.stdout.read(int(header[2]) + 1)
+                        continue
+                    data = process.stdout.read(int(header[2]) + 1)[:-1]
+                    records[sha] = parse_commit_object(header[0].decode('ascii'), data)
+            finally:
+                writer.join()
+            return records
+
+
+def parse_commit_object(sha: str, data: bytes) -> CommitRecord:
+    """
+    Converte o conteúdo bruto de um objeto commit em registro (sem totais).
+
+    Args:
+        sha: Hash do commit
+        data: Conteúdo do objeto, como retornado pelo `cat-file`
+
+    Returns:
+        CommitRecord: Registro com cabeçalho e mensagem
+    """
+    header, _, message = data.partition(b'\n\n')
+    parents: List[str] = []
+    name = email = ''
+    timestamp = tz_offset = 0
+    for line in header.split(b'\n'):
+        if line.startswith(b' '):
+            continue
+        key, _, value = line.partition(b' ')
+        if key == b'parent':
+            parents.append(value.decode('ascii'))
+        elif key == b'author':
+            name, email, _, _ = _parse_ident(value)
+        elif key == b'committer':
+            _, _, timestamp, tz_offset = _parse_ident(value)
+    return CommitRecord(
+        sha=sha,
+        parents=tuple(parents),
+        author_name=name,
+        author_email=email,
+        timestamp=timestamp,
+        tz_offset=tz_offset,
+        message=message.decode('utf-8', 'replace'),
+    )
+
+
+def _parse_ident(value: bytes) -> Tuple[str, str, int, int]:
+    """Converte `Nome <email> 1700000000 -0300` em (nome, email, timestamp, offset)."""
+    start = value.rfind(b'<')
+    end = value.rfind(b'>')
+    name = value[:start].strip().decode('utf-8', 'replace')
+    email = value[start + 1:end].decode('utf-8', 'replace')
+    timestamp, offset = parse_raw_date(value[end + 1:].strip().decode('ascii') or '0')
+    return name, email, timestamp, offset
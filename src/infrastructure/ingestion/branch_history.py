@@ -0,0 +1,457 @@
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from domain.enums.merge_policy import MergePolicy
+from infrastructure.ingestion.log_stream import GitLogStream, CommitRecord, git_version, merge_walk_args
+from infrastructure.ingestion.batch_stats import BatchStatsService, FileStat
+from infrastructure.ingestion.path_filter import PathFilter
+from infrastructure.ingestion.stats_backend import StatsBackend, create_stats_service
+from infrastructure.ingestion.stats_cache import CommitStatsCache
+
+# Quantidade de commits consultados no cache (e calculados) por vez
+CACHE_BATCH_SIZE = 2000
+
+# Abaixo deste número de commits não compensa dividir o trabalho entre processos
+MIN_SHARD_SIZE = 200
+
+
+class BranchHistory:
+    """
+    Percorre o histórico de várias branches uma única vez.
+
+    Cada commit é lido e tem suas estatísticas calculadas apenas uma vez,
+    junto com a lista de branches que o contêm. Isso substitui o padrão
+    de chamar `iter_commits(branch)` para cada branch, que repete todo o
+    histórico compartilhado.
+    """
+
+    def __init__(self, repo_path: str, log_stream: Optional[GitLogStream] = None,
+                 git_binary: str = 'git', stats_cache: Optional[CommitStatsCache] = None,
+                 jobs: int = 1, path_filter: Optional[PathFilter] = None,
+                 merge_policy: MergePolicy = MergePolicy.DIFF,
+                 backend: StatsBackend = StatsBackend.GIT):
+        """
+        Inicializa o leitor de histórico.
+
+        Args:
+            repo_path: Caminho para o repositório Git
+            log_stream: Leitor de git log a reutilizar (opcional)
+            git_binary: Executável do git
+            stats_cache: Cache persistente de estatísticas (opcional)
+            jobs: Número de processos git usados em paralelo para calcular o numstat
+            path_filter: Filtro de arquivos das estatísticas (opcional); o cache
+                informado deve ser o do mesmo filtro
+            merge_policy: Tratamento dos merges: diff contra o primeiro pai
+                (padrão), ignorados, só a cadeia de primeiros pais ou contados
+                sem diff
+            backend: Implementação que calcula o numstat (processos git ou
+                libgit2 dentro do processo); a caminhada usa sempre o git
+        """
+        self.repo_path = Path(repo_path)
+        self.git_binary = git_binary
+        self.log_stream = log_stream or GitLogStream(str(self.repo_path), git_binary)
+        self.stats_cache = stats_cache
+        self.jobs = max(1, jobs)
+        self.path_filter = path_filter or PathFilter()
+        self.merge_policy = merge_policy
+        self.backend = backend
+        self._git_version: Optional[Tuple[int, ...]] = None
+        # Um serviço (com seus processos git persistentes) por worker
+        self._batch_services = [create_stats_service(backend, str(self.repo_path), git_binary,
+                                                     self.path_filter, merge_policy)
+                                for _ in range(self.jobs)]
+
+    @property
+    def batch_stats(self) -> BatchStatsService:
+        """Serviço de estatísticas em lote para listas de commits conhecidas."""
+        return self._batch_services[0]
+
+    def resolve_tips(self, branches: Sequence[str]) -> Dict[str, str]:
+        """
+        Resolve o commit apontado por cada branch.
+
+        Branches que não apontam para um commit são ignoradas com aviso.
+
+        Args:
+            branches: Nomes das branches
+
+        Returns:
+            Dicionário branch -> hash do commit, na ordem recebida
+        """
+        if not branches:
+            return {}
+        query = ''.join(f'{branch}^{{commit}}\n' for branch in branches)
+        result = subprocess.run(
+            [self.git_binary, 'cat-file', '--batch-check=%(objectname) %(objecttype)'],
+            cwd=str(self.repo_path),
+            input=query.encode('utf-8'),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        tips = {}
+        lines = result.stdout.decode('utf-8', 'replace').splitlines()
+        for branch, line in zip(branches, lines):
+            parts = line.split()
+            if len(parts) == 2 and parts[1] == 'commit':
+                tips[branch] = parts[0]
+            else:
+                print(f"Aviso: Não foi possível analisar a branch {branch}")
+        return tips
+
+    def compute_membership(self, tips: Dict[str, str]) -> Dict[str, int]:
+        """
+        Calcula, para cada commit, o conjunto de branches que o alcançam.
+
+        Usa um único `git rev-list --topo-order --parents` (sem diffs) e
+        propaga uma máscara de bits dos filhos para os pais. Com a política
+        `first-parent`, só a cadeia de primeiros pais de cada branch.
+
+        Args:
+            tips: Dicionário branch -> hash, como retornado por resolve_tips
+
+        Returns:
+            Dicionário hash -> máscara de bits (bit i = i-ésima branch de tips)
+        """
+        masks: Dict[str, int] = {}
+        for index, sha in enumerate(tips.values()):
+            masks[sha] = masks.get(sha, 0) | (1 << index)
+        if not masks:
+            return masks
+
+        first_parent = self.merge_policy is MergePolicy.FIRST_PARENT
+        # Os merges ignorados (skip) ainda ligam as branches aos commits das branches integradas
+        walk_args = ['--first-parent'] if first_parent else []
+        process = subprocess.Popen(
+            [self.git_binary, 'rev-list', '--topo-order', '--parents', *walk_args,
+             *set(tips.values()), '--'],
+            cwd=str(self.repo_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            for line in process.stdout:
+                shas = line.split()
+                if not shas:
+                    continue
+                mask = masks.get(shas[0].decode('ascii'), 0)
+                for parent in shas[1:2] if first_parent else shas[1:]:
+                    parent = parent.decode('ascii')
+                    masks[parent] = masks.get(parent, 0) | mask
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError("git rev-list falhou ao calcular as branches dos commits")
+        return masks
+
+    def walk_args(self) -> List[str]:
+        """
+        Argumentos do git log/rev-list que aplicam a política de merges à caminhada.
+
+        Com `first-parent`, as revisões negadas (`^antigo`, `--not`) também
+        excluem só a cadeia de primeiros pais, se o git suportar (2.38+).
+        """
+        walk_args = merge_walk_args(self.merge_policy)
+        if self.merge_policy is MergePolicy.FIRST_PARENT:
+            if self._git_version is None:
+                self._git_version = git_version(self.git_binary)
+            if self._git_version >= (2, 38):
+                walk_args.append('--exclude-first-parent-only')
+        return walk_args
+
+    def rev_list(self, revisions: Sequence[str], extra_args: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Lista os commits de um conjunto de revisões, sem diffs.
+
+        Segue a política de merges: sem os merges (skip) ou só a cadeia de
+        primeiros pais (first-parent; as revisões negadas também excluem
+        só a cadeia de primeiros pais, se o git suportar).
+
+        Args:
+            revisions: Revisões no formato do rev-list (ex: [novo, '^antigo'])
+            extra_args: Argumentos adicionais (ex: filtros de build_filter_args)
+
+        Returns:
+            Lista de hashes
+        """
+        result = subprocess.run(
+            [self.git_binary, 'rev-list', *self.walk_args(), *(extra_args or ()), *revisions, '--'],
+            cwd=str(self.repo_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        return result.stdout.decode('ascii').split()
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        """
+        Verifica se um commit é ancestral de outro.
+
+        Retorna False também quando o ancestral não existe mais no
+        repositório (ex: removido após um force-push). Com a política
+        `first-parent`, o ancestral precisa estar na cadeia de primeiros
+        pais do descendente.
+        """
+        if self.merge_policy is MergePolicy.FIRST_PARENT:
+            result = subprocess.run(
+                [self.git_binary, 'rev-list', '--first-parent', '--parents', descendant, f'^{ancestor}', '--'],
+                cwd=str(self.repo_path),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            lines = result.stdout.decode('ascii').splitlines()
+            if result.returncode != 0 or not lines:
+                return result.returncode == 0 and ancestor == descendant
+            return lines[-1].split()[1:2] == [ancestor]
+        result = subprocess.run(
+            [self.git_binary, 'merge-base', '--is-ancestor', ancestor, descendant],
+            cwd=str(self.repo_path),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return result.returncode == 0
+
+    def tips_rewritten(self, old_tips: Dict[str, str], new_tips: Dict[str, str]) -> bool:
+        """
+        Detecta refs removidas ou que não avançaram de forma linear.
+
+        Se retornar False, o histórico antigo está contido no novo e os
+        commits novos são exatamente `novas_pontas --not pontas_antigas`.
+
+        Args:
+            old_tips: Pontas das refs na análise anterior
+            new_tips: Pontas atuais das refs
+
+        Returns:
+            True se alguma ref foi removida ou reescrita (force-push)
+        """
+        for ref, old in old_tips.items():
+            new = new_tips.get(ref)
+            if new is None:
+                return True
+            if new != old and not self.is_ancestor(old, new):
+                return True
+        return False
+
+    def get_records(self, shas: Sequence[str]) -> Dict[str, CommitRecord]:
+        """
+        Retorna os registros com estatísticas dos commits informados.
+
+        Usa o cache quando disponível; commits vindos do cache não trazem
+        mensagem nem pais.
+
+        Args:
+            shas: Hashes completos
+
+        Returns:
+            Dicionário hash -> registro
+        """
+        records: Dict[str, CommitRecord] = {}
+        if self.stats_cache is not None:
+            records.update(self.stats_cache.get_many(list(shas)))
+        missing = [sha for sha in shas if sha not in records]
+        batch_size = CACHE_BATCH_SIZE * self.jobs
+        for start in range(0, len(missing), batch_size):
+            computed = self._compute_stats(missing[start:start + batch_size])
+            if self.stats_cache is not None:
+                self.stats_cache.put_many(computed.values())
+            records.update(computed)
+        return records
+
+    def iter_commits(self, branches: Sequence[str],
+                     extra_args: Optional[Sequence[str]] = None,
+                     with_stats: bool = True) -> Iterator[Tuple[CommitRecord, Tuple[str, ...]]]:
+        """
+        Percorre uma única vez os commits de todas as branches.
+
+        Args:
+            branches: Nomes das branches
+            extra_args: Argumentos adicionais repassados ao git log
+            with_stats: Se False, não calcula o numstat
+
+        Yields:
+            Tupla (registro do commit, branches que contêm o commit)
+        """
+        tips = self.resolve_tips(branches)
+        if not tips:
+            return
+        masks = self.compute_membership(tips)
+        names = list(tips)
+        decoded: Dict[int, Tuple[str, ...]] = {}
+
+        revisions = list(dict.fromkeys(tips.values()))
+        extra_args = [*self.walk_args(), *(extra_args or ())]
+        if self._batched(with_stats):
+            records = self._iter_batched(revisions, extra_args)
+        else:
+            records = self.log_stream.iter_commits(revisions, extra_args, with_stats, self.merge_policy)
+
+        for record in records:
+            mask = masks.get(record.sha, 0)
+            if mask not in decoded:
+                decoded[mask] = tuple(name for index, name in enumerate(names) if mask >> index & 1)
+            yield record, decoded[mask]
+
+    def stream_commits(self, branches: Sequence[str],
+                       with_stats: bool = True) -> Iterator[Tuple[CommitRecord, Tuple[str, ...]]]:
+        """
+        Percorre os commits de todas as branches com memória limitada.
+
+        Igual a `iter_commits`, mas o git log roda em `--topo-order` (cada
+        commit só aparece depois de todos os filhos), então as branches de
+        cada commit são propagadas para os pais durante a própria leitura
+        e descartadas em seguida. Só a fronteira da caminhada fica em
+        memória, em vez de um mapa com todos os commits do histórico.
+
+        Args:
+            branches: Nomes das branches
+            with_stats: Se False, não calcula o numstat
+
+        Yields:
+            Tupla (registro do commit, branches que contêm o commit)
+        """
+        tips = self.resolve_tips(branches)
+        if not tips:
+            return
+        masks: Dict[str, int] = {}
+        for index, sha in enumerate(tips.values()):
+            masks[sha] = masks.get(sha, 0) | (1 << index)
+        names = list(tips)
+        decoded: Dict[int, Tuple[str, ...]] = {}
+
+        # Sem filtros de autor ou data: um commit omitido interromperia a propagação.
+        # Pelo mesmo motivo os merges ignorados (skip) são lidos, sem diff, e descartados aqui
+        revisions = list(dict.fromkeys(tips.values()))
+        first_parent = self.merge_policy is MergePolicy.FIRST_PARENT
+        extra_args = ['--topo-order', '--first-parent'] if first_parent else ['--topo-order']
+        if self._batched(with_stats):
+            records = self._iter_batched(revisions, extra_args)
+        else:
+            records = self.log_stream.iter_commits(revisions, extra_args, with_stats, self.merge_policy)
+
+        for record in records:
+            mask = masks.pop(record.sha, 0)
+            for parent in record.parents[:1] if first_parent else record.parents:
+                masks[parent] = masks.get(parent, 0) | mask
+            if self.merge_policy is MergePolicy.SKIP and len(record.parents) > 1:
+                continue
+            if mask not in decoded:
+                decoded[mask] = tuple(name for index, name in enumerate(names) if mask >> index & 1)
+            yield record, decoded[mask]
+
+    def _batched(self, with_stats: bool) -> bool:
+        """
+        Indica se as estatísticas vêm em lotes (cache e diff-tree) em vez do git log.
+
+        Com um filtro de arquivos é sempre em lotes: um pathspec no git log
+        também omitiria os commits que só alteram arquivos filtrados. Com
+        outro backend também, já que o numstat do git log é o do git.
+        """
+        return with_stats and (self.stats_cache is not None or self.jobs > 1
+                               or self.path_filter.is_active or self.backend is not StatsBackend.GIT)
+
+    def _iter_batched(self, revisions: List[str],
+                      extra_args: Optional[Sequence[str]]) -> Iterator[CommitRecord]:
+        """
+        Percorre o histórico sem diffs e preenche as estatísticas em lotes.
+
+        Cada lote é consultado no cache (se houver) e só os commits
+        ausentes são diferenciados pelo git, divididos entre `jobs`
+        processos. A ordem do git log é preservada.
+        """
+        batch_size = CACHE_BATCH_SIZE * self.jobs
+        batch: List[CommitRecord] = []
+        for record in self.log_stream.iter_commits(revisions, extra_args, with_stats=False):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield from self._fill_stats(batch)
+                batch = []
+        if batch:
+            yield from self._fill_stats(batch)
+
+    def _fill_stats(self, batch: List[CommitRecord]) -> List[CommitRecord]:
+        """Preenche as estatísticas de um lote usando o cache e o git."""
+        if not self.merge_policy.diffs_merges:
+            # Merges ficam com 0 arquivos e linhas, sem consultar o cache nem o git
+            diffed = [record for record in batch if len(record.parents) < 2]
+        else:
+            diffed = batch
+        cached = self.stats_cache.get_many([record.sha for record in diffed]) if self.stats_cache else {}
+        missing = [record.sha for record in diffed if record.sha not in cached]
+        if missing:
+            computed = self._compute_stats(missing)
+            if self.stats_cache is not None:
+                self.stats_cache.put_many(computed.values())
+            cached.update(computed)
+        for record in batch:
+            stats = cached.get(record.sha)
+            if stats is not None:
+                record.files = stats.files
+                record.insertions = stats.insertions
+                record.deletions = stats.deletions
+        return batch
+
+    def get_records_with_files(self, shas: Sequence[str]) -> Tuple[Dict[str, CommitRecord],
+                                                                   Dict[str, List[FileStat]]]:
+        """
+        Calcula o numstat total e por arquivo dos commits informados.
+
+        Como `_compute_stats`, divide os commits entre os `jobs` serviços.
+        Não consulta nem grava o cache de estatísticas.
+
+        Args:
+            shas: Hashes completos
+
+        Returns:
+            Tupla (hash -> registro, hash -> lista de (caminho, adições, remoções))
+        """
+        records: Dict[str, CommitRecord] = {}
+        file_stats: Dict[str, List[FileStat]] = {}
+        for shard_records, shard_files in self._map_shards('get_records_with_files', list(shas)):
+            records.update(shard_records)
+            file_stats.update(shard_files)
+        return records, file_stats
+
+    def get_file_stats(self, shas: Sequence[str]) -> Dict[str, List[FileStat]]:
+        """
+        Calcula o numstat por arquivo dos commits, dividido entre os `jobs` serviços.
+
+        Args:
+            shas: Hashes completos
+
+        Returns:
+            Dicionário hash -> lista de (caminho, adições, remoções)
+        """
+        file_stats: Dict[str, List[FileStat]] = {}
+        for shard_files in self._map_shards('get_file_stats', list(shas)):
+            file_stats.update(shard_files)
+        return file_stats
+
+    def _compute_stats(self, shas: List[str]) -> Dict[str, CommitRecord]:
+        """
+        Calcula o numstat dos commits informados.
+
+        Os hashes passam pelos processos persistentes do BatchStatsService.
+        Com `jobs` > 1 a lista é dividida em fatias contíguas, uma por
+        serviço; o resultado é indexado por hash, então não depende da
+        ordem de término.
+        """
+        computed: Dict[str, CommitRecord] = {}
+        for shard_records in self._map_shards('get_records', shas):
+            computed.update(shard_records)
+        return computed
+
+    def _map_shards(self, method: str, shas: List[str]) -> List[Any]:
+        """Chama `method` dos serviços com fatias contíguas dos commits, em paralelo."""
+        shard_count = min(self.jobs, max(1, len(shas) // MIN_SHARD_SIZE))
+        if shard_count <= 1:
+            return [getattr(self.batch_stats, method)(shas)]
+
+        shard_size = -(-len(shas) // shard_count)
+        shards = [shas[start:start + shard_size] for start in range(0, len(shas), shard_size)]
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            return list(executor.map(lambda pair: getattr(pair[0], method)(pair[1]),
+                                     zip(self._batch_services, shards)))
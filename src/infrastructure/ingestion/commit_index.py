@@ -0,0 +1,69 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from infrastructure.ingestion.branch_history import BranchHistory
+
+# Entrada do índice: (hash, email original, branches que contêm o commit)
+IndexEntry = Tuple[str, str, Tuple[str, ...]]
+
+
+def normalize_email(email: str) -> str:
+    """Normaliza o email usado como chave do índice."""
+    return email.strip().lower()
+
+
+class AuthorCommitIndex:
+    """
+    Índice invertido email normalizado -> commits das branches.
+
+    É montado com uma única caminhada sem diffs (com as branches de cada
+    commit) e reaproveitado enquanto as pontas das refs não mudarem, então
+    cada consulta custa O(commits do autor) em vez de uma caminhada
+    completa por autor.
+    """
+
+    def __init__(self, history: BranchHistory):
+        """
+        Inicializa o índice (montado no primeiro uso).
+
+        Args:
+            history: Leitor de histórico do repositório
+        """
+        self.history = history
+        self._tips: Optional[Dict[str, str]] = None
+        self._entries: Dict[str, List[IndexEntry]] = {}
+
+    def lookup(self, branches: Sequence[str], email: str,
+               exact: bool = True) -> Dict[str, List[str]]:
+        """
+        Retorna os commits de um autor agrupados por branch.
+
+        Args:
+            branches: Branches consideradas
+            email: Email do autor
+            exact: Se True, só aceita o email idêntico; se False, ignora
+                maiúsculas e espaços
+
+        Returns:
+            Dicionário branch -> hashes, na ordem das branches e do git log
+        """
+        self._refresh(branches)
+        by_branch: Dict[str, List[str]] = {branch: [] for branch in self._tips}
+        for sha, raw_email, commit_branches in self._entries.get(normalize_email(email), []):
+            if exact and raw_email != email:
+                continue
+            for branch in commit_branches:
+                by_branch[branch].append(sha)
+        return {branch: shas for branch, shas in by_branch.items() if shas}
+
+    def _refresh(self, branches: Sequence[str]) -> None:
+        """Remonta o índice se as pontas das refs mudaram."""
+        tips = self.history.resolve_tips(branches)
+        if tips == self._tips:
+            return
+        entries: Dict[str, List[IndexEntry]] = {}
+        for record, commit_branches in self.history.iter_commits(list(tips), with_stats=False):
+            entries.setdefault(normalize_email(record.author_email), []).append(
+                (record.sha, record.author_email, commit_branches)
+            )
+        self._entries = entries
+        self._tips = tips
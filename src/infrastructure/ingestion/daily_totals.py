@@ -0,0 +1,100 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from infrastructure.ingestion.log_stream import CommitRecord
+from infrastructure.ingestion.time_buckets import SECONDS_PER_DAY, DayLabelCache
+
+# A chave de cada linha é um único inteiro: dia | email | branch (24 bits cada)
+ID_BITS = 24
+ID_MASK = (1 << ID_BITS) - 1
+# Desloca os dias anteriores a 1970 para o lado positivo
+DAY_BIAS = 1 << 31
+
+
+class DailyTotals:
+    """
+    Totais de commits por (branch, autor, dia), somados commit a commit.
+
+    A memória usada depende só do número de chaves distintas (e de autores),
+    não do número de commits: cada registro é somado e descartado assim que
+    é lido. Cada chave é um inteiro (branch, email e dia codificados) e as
+    medidas ficam em arrays de int64, sem uma tupla e uma lista por linha.
+    """
+
+    def __init__(self, local_time: bool = False):
+        """
+        Inicializa os totais.
+
+        Args:
+            local_time: Se True, o dia é o do fuso original de cada commit;
+                senão, o dia em UTC
+        """
+        self.local_time = local_time
+        self.names: Dict[str, Tuple[int, str]] = {}
+        self._branches: Dict[str, int] = {}
+        self._emails: Dict[str, int] = {}
+        self._slots: Dict[int, int] = {}
+        self._measures = tuple(array('q') for _ in range(4))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, branch: str, record: CommitRecord) -> None:
+        """Soma um commit aos totais de uma branch."""
+        timestamp = record.timestamp + record.tz_offset if self.local_time else record.timestamp
+        branch_id = self._branches.setdefault(branch, len(self._branches))
+        email_id = self._emails.setdefault(record.author_email, len(self._emails))
+        key = ((timestamp // SECONDS_PER_DAY + DAY_BIAS) << 2 * ID_BITS) | (email_id << ID_BITS) | branch_id
+
+        slot = self._slots.get(key)
+        commits, files, insertions, deletions = self._measures
+        if slot is None:
+            self._slots[key] = len(commits)
+            commits.append(1)
+            files.append(record.files)
+            insertions.append(record.insertions)
+            deletions.append(record.deletions)
+        else:
+            commits[slot] += 1
+            files[slot] += record.files
+            insertions[slot] += record.insertions
+            deletions[slot] += record.deletions
+
+        latest = self.names.get(record.author_email)
+        if latest is None or record.timestamp > latest[0]:
+            self.names[record.author_email] = (record.timestamp, record.author_name)
+
+    def add_all(self, rows: Iterable[Tuple[CommitRecord, Tuple[str, ...]]],
+                author_emails: Optional[Set[str]] = None) -> 'DailyTotals':
+        """
+        Soma uma caminhada do histórico.
+
+        Args:
+            rows: Tuplas (registro, branches do commit), como em BranchHistory.iter_commits
+            author_emails: Se informado, só soma commits desses emails
+
+        Returns:
+            Os próprios totais
+        """
+        for record, commit_branches in rows:
+            if author_emails is not None and record.author_email not in author_emails:
+                continue
+            for branch in commit_branches:
+                self.add(branch, record)
+        return self
+
+    def to_rows(self) -> List[Tuple]:
+        """Retorna as linhas (branch, email, dia, commits, arquivos, adições, remoções)."""
+        branches = list(self._branches)
+        emails = list(self._emails)
+        days = DayLabelCache()
+        rows = []
+        for key, slot in self._slots.items():
+            day = ((key >> 2 * ID_BITS) - DAY_BIAS) * SECONDS_PER_DAY
+            rows.append((branches[key & ID_MASK], emails[key >> ID_BITS & ID_MASK], days.label(day),
+                         *(measure[slot] for measure in self._measures)))
+        return rows
+
+    def latest_names(self) -> Dict[str, str]:
+        """Retorna o dicionário email -> nome mais recente."""
+        return {email: name for email, (_, name) in self.names.items()}
@@ -0,0 +1,367 @@
+import binascii
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from infrastructure.ingestion.branch_history import BranchHistory
+from infrastructure.ingestion.log_stream import CommitRecord, build_filter_args
+
+FORMAT_VERSION = 1
+FILE_PREFIX = 'facts-'
+
+# Colunas por commit e seus tipos
+COLUMNS = {
+    'sha': None,  # bytes do hash (S20, ou S32 em repositórios SHA-256)
+    'author_id': np.int32,
+    'timestamp': np.int64,
+    'tz_offset': np.int32,
+    'branch_set': np.int32,
+    'files': np.int32,
+    'insertions': np.int64,
+    'deletions': np.int64,
+}
+
+BRANCH_FRAME_COLUMNS = ['sha', 'author_name', 'author_email', 'branch', 'timestamp',
+                        'tz_offset', 'files', 'insertions', 'deletions']
+
+
+def _pyarrow():
+    """Retorna o módulo pyarrow (com o parquet), ou None se não estiver instalado."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+@dataclass
+class CommitFacts:
+    """
+    Tabela de fatos colunar dos commits (uma linha por commit).
+
+    As colunas são arrays numpy tipados; autores e conjuntos de branches
+    ficam em tabelas de dimensão e são referenciados por índice. O
+    conjunto de branches é um bitmap codificado em dicionário: cada
+    combinação distinta de branches aparece uma vez em `branch_sets`.
+
+    Attributes:
+        sha: Hash binário de cada commit
+        author_id: Índice em `authors`
+        timestamp: Data do commit (committer) em segundos desde epoch
+        tz_offset: Offset do fuso em segundos a leste de UTC
+        branch_set: Índice em `branch_sets`
+        files: Número de arquivos alterados
+        insertions: Linhas adicionadas
+        deletions: Linhas removidas
+        authors: Identidades (nome, email) distintas
+        branches: Nomes das branches, na ordem de análise
+        branch_sets: Índices das branches de cada conjunto
+    """
+    sha: np.ndarray
+    author_id: np.ndarray
+    timestamp: np.ndarray
+    tz_offset: np.ndarray
+    branch_set: np.ndarray
+    files: np.ndarray
+    insertions: np.ndarray
+    deletions: np.ndarray
+    authors: List[Tuple[str, str]]
+    branches: List[str]
+    branch_sets: List[Tuple[int, ...]]
+
+    def __len__(self) -> int:
+        return len(self.sha)
+
+    def sha_hex(self) -> np.ndarray:
+        """Retorna os hashes em hexadecimal (sem passar por bytes Python por linha)."""
+        width = self.sha.dtype.itemsize * 2
+        return np.frombuffer(binascii.hexlify(self.sha.tobytes()), dtype=f'S{width}').astype(f'U{width}')
+
+    @classmethod
+    def from_records(cls, rows: Iterable[Tuple[CommitRecord, Tuple[str, ...]]],
+                     branches: Sequence[str],
+                     author_emails: Optional[Set[str]] = None) -> 'CommitFacts':
+        """
+        Monta a tabela a partir da caminhada do histórico.
+
+        Args:
+            rows: Tuplas (registro, branches do commit), como em BranchHistory.iter_commits
+            branches: Branches analisadas
+            author_emails: Se informado, só mantém commits desses emails
+
+        Returns:
+            CommitFacts: Tabela na ordem do git log
+        """
+        branch_index = {branch: index for index, branch in enumerate(branches)}
+        author_ids: Dict[Tuple[str, str], int] = {}
+        set_ids: Dict[Tuple[str, ...], int] = {}
+        branch_sets: List[Tuple[int, ...]] = []
+        columns: Dict[str, list] = {name: [] for name in COLUMNS}
+
+        for record, commit_branches in rows:
+            if author_emails is not None and record.author_email not in author_emails:
+                continue
+            identity = (record.author_name, record.author_email)
+            author_id = author_ids.setdefault(identity, len(author_ids))
+            set_id = set_ids.get(commit_branches)
+            if set_id is None:
+                set_id = set_ids[commit_branches] = len(branch_sets)
+                branch_sets.append(tuple(branch_index[branch] for branch in commit_branches))
+            columns['sha'].append(bytes.fromhex(record.sha))
+            columns['author_id'].append(author_id)
+            columns['timestamp'].append(record.timestamp)
+            columns['tz_offset'].append(record.tz_offset)
+            columns['branch_set'].append(set_id)
+            columns['files'].append(record.files)
+            columns['insertions'].append(record.insertions)
+            columns['deletions'].append(record.deletions)
+
+        arrays = {name: np.array(columns[name], dtype=dtype)
+                  for name, dtype in COLUMNS.items() if dtype is not None}
+        arrays['sha'] = np.array(columns['sha'], dtype=None if columns['sha'] else 'S20')
+        return cls(**arrays, authors=list(author_ids), branches=list(branches),
+                   branch_sets=branch_sets)
+
+    def select_emails(self, author_emails: Set[str]) -> 'CommitFacts':
+        """Retorna só os commits dos emails informados (comparação exata)."""
+        selected = np.array([email in author_emails for _, email in self.authors], dtype=bool)
+        if selected.all():
+            return self
+        return self._take(selected[self.author_id])
+
+    def _take(self, mask: np.ndarray) -> 'CommitFacts':
+        """Retorna as linhas selecionadas pela máscara, com as mesmas dimensões."""
+        arrays = {name: getattr(self, name)[mask] for name in COLUMNS}
+        return CommitFacts(**arrays, authors=self.authors, branches=self.branches,
+                           branch_sets=self.branch_sets)
+
+    def branch_rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Expande os conjuntos de branches em linhas (commit, branch).
+
+        A ordem é a do git log e, dentro de cada commit, a das branches.
+
+        Returns:
+            Tupla (índice do commit de cada linha, índice da branch em `branches`)
+        """
+        if not len(self):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+        set_sizes = np.array([len(members) for members in self.branch_sets], dtype=np.int64)
+        set_starts = np.concatenate(([0], np.cumsum(set_sizes)[:-1]))
+        set_members = np.array([index for members in self.branch_sets for index in members],
+                               dtype=np.int32)
+
+        counts = set_sizes[self.branch_set]
+        rows = np.repeat(np.arange(len(self)), counts)
+        # Posição de cada linha dentro do seu commit (0, 1, ... por commit)
+        row_starts = np.repeat(np.cumsum(counts) - counts, counts)
+        position = np.arange(len(rows)) - row_starts
+        return rows, set_members[set_starts[self.branch_set[rows]] + position]
+
+    def to_branch_frame(self) -> pd.DataFrame:
+        """
+        Expande a tabela para uma linha por (commit, branch).
+
+        Returns:
+            DataFrame com sha, author_name, author_email, branch, timestamp,
+            tz_offset, files, insertions e deletions, na ordem de `branch_rows`
+        """
+        if not len(self):
+            return pd.DataFrame({name: [] for name in BRANCH_FRAME_COLUMNS})
+        rows, branch_ids = self.branch_rows()
+        author_names = np.array([name for name, _ in self.authors], dtype=object)
+        author_emails = np.array([email for _, email in self.authors], dtype=object)
+        author_ids = self.author_id[rows]
+        return pd.DataFrame({
+            'sha': self.sha_hex()[rows],
+            'author_name': author_names[author_ids],
+            'author_email': author_emails[author_ids],
+            'branch': np.array(self.branches, dtype=object)[branch_ids],
+            'timestamp': self.timestamp[rows],
+            'tz_offset': self.tz_offset[rows],
+            'files': self.files[rows].astype(np.int64),
+            'insertions': self.insertions[rows],
+            'deletions': self.deletions[rows],
+        })
+
+    def save(self, path: Path) -> Path:
+        """
+        Grava a tabela em Parquet (se o pyarrow estiver instalado) ou .npz.
+
+        Args:
+            path: Caminho sem extensão
+
+        Returns:
+            Path: Arquivo gravado
+        """
+        metadata = json.dumps({
+            'version': FORMAT_VERSION,
+            'authors': self.authors,
+            'branches': self.branches,
+            'branch_sets': self.branch_sets,
+        })
+        pyarrow = _pyarrow()
+        target = Path(path).with_suffix('.parquet' if pyarrow else '.npz')
+        temporary = target.with_name(target.name + '.tmp')
+        if pyarrow:
+            # O hash vai como binário de tamanho fixo direto do buffer: a
+            # conversão de arrays numpy `S` cortaria hashes com bytes nulos
+            width = self.sha.dtype.itemsize
+            columns = {name: getattr(self, name) for name in COLUMNS}
+            columns['sha'] = pyarrow.FixedSizeBinaryArray.from_buffers(
+                pyarrow.binary(width), len(self), [None, pyarrow.py_buffer(self.sha.tobytes())]
+            )
+            table = pyarrow.table(columns)
+            table = table.replace_schema_metadata({'git-metrics': metadata})
+            pyarrow.parquet.write_table(table, str(temporary))
+        else:
+            with open(temporary, 'wb') as output:
+                np.savez(output, metadata=np.array(metadata),
+                         **{name: getattr(self, name) for name in COLUMNS})
+        os.replace(temporary, target)
+        return target
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['CommitFacts']:
+        """
+        Lê uma tabela gravada por `save` (.parquet ou .npz).
+
+        Returns:
+            CommitFacts, ou None se o arquivo não existe ou é de outra versão
+        """
+        for target in (Path(path).with_suffix('.parquet'), Path(path).with_suffix('.npz')):
+            if not target.exists():
+                continue
+            if target.suffix == '.parquet':
+                pyarrow = _pyarrow()
+                if pyarrow is None:
+                    continue
+                table = pyarrow.parquet.read_table(str(target))
+                metadata = json.loads(table.schema.metadata[b'git-metrics'])
+                arrays = {name: table.column(name).to_numpy() for name in COLUMNS if name != 'sha'}
+                sha = table.column('sha').combine_chunks()
+                width = sha.type.byte_width
+                arrays['sha'] = np.frombuffer(sha.buffers()[1], dtype=f'S{width}',
+                                              count=len(sha), offset=sha.offset * width).copy()
+            else:
+                with np.load(target) as data:
+                    metadata = json.loads(str(data['metadata']))
+                    arrays = {name: data[name] for name in COLUMNS}
+            if metadata.get('version') != FORMAT_VERSION:
+                return None
+            arrays = {name: arrays[name].astype(dtype) if dtype else arrays[name]
+                      for name, dtype in COLUMNS.items()}
+            return cls(
+                **arrays,
+                authors=[tuple(author) for author in metadata['authors']],
+                branches=metadata['branches'],
+                branch_sets=[tuple(members) for members in metadata['branch_sets']],
+            )
+        return None
+
+
+def _digest(*parts: Iterable[str]) -> str:
+    """Gera uma chave curta para nomes de arquivo."""
+    joined = '\n'.join('\0'.join(part) for part in parts)
+    return hashlib.sha1(joined.encode('utf-8')).hexdigest()[:16]
+
+
+class FactTableStore:
+    """
+    Obtém a tabela de fatos do estado atual das branches.
+
+    A tabela é identificada pelas pontas das refs e pelo conjunto de
+    autores. Com as mesmas pontas, uma nova execução só lê o arquivo
+    (ou reaproveita a tabela em memória); uma tabela com todos os autores
+    também atende consultas de qualquer subconjunto.
+    """
+
+    def __init__(self, history: BranchHistory, directory: Optional[Path] = None):
+        """
+        Inicializa o armazenamento.
+
+        Args:
+            history: Leitor de histórico do repositório
+            directory: Diretório dos arquivos (None para manter só em memória)
+        """
+        self.history = history
+        self.directory = Path(directory) if directory is not None else None
+        self._memory: Dict[Tuple[str, str], CommitFacts] = {}
+
+    def get(self, branches: Sequence[str],
+            author_emails: Optional[Iterable[str]] = None) -> CommitFacts:
+        """
+        Retorna a tabela de fatos das branches.
+
+        Args:
+            branches: Branches analisadas
+            author_emails: Emails dos autores (None para todos)
+
+        Returns:
+            CommitFacts: Commits dos autores, na ordem do git log
+        """
+        tips = self.history.resolve_tips(branches)
+        tips_key = _digest(tips, tips.values())
+        emails = None if author_emails is None else set(author_emails)
+        scope = '*' if emails is None else _digest(sorted(emails))
+
+        for key in dict.fromkeys([(tips_key, scope), (tips_key, '*')]):
+            facts = self._memory.get(key)
+            if facts is None:
+                facts = self._read(key)
+            if facts is not None:
+                self._remember(key, facts)
+                return facts if key[1] == scope else facts.select_emails(emails)
+
+        filter_args = build_filter_args(emails) if emails is not None else None
+        facts = CommitFacts.from_records(
+            self.history.iter_commits(list(tips), filter_args), list(tips), emails
+        )
+        self._remember((tips_key, scope), facts)
+        self._write((tips_key, scope), facts)
+        return facts
+
+    def _remember(self, key: Tuple[str, str], facts: CommitFacts) -> None:
+        """Guarda a tabela em memória, descartando as de outras pontas."""
+        for stale in [other for other in self._memory if other[0] != key[0]]:
+            del self._memory[stale]
+        self._memory[key] = facts
+
+    def _path(self, key: Tuple[str, str]) -> Optional[Path]:
+        """Caminho (sem extensão) do arquivo de uma chave (pontas, autores)."""
+        if self.directory is None:
+            return None
+        scope = 'all' if key[1] == '*' else key[1]
+        return self.directory / f'{FILE_PREFIX}{key[0]}-{scope}'
+
+    def _read(self, key: Tuple[str, str]) -> Optional[CommitFacts]:
+        """Lê a tabela gravada, se existir."""
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            return CommitFacts.load(path)
+        except Exception as e:
+            print(f"Aviso: Não foi possível ler a tabela de fatos {path.name}: {str(e)}")
+            return None
+
+    def _write(self, key: Tuple[str, str], facts: CommitFacts) -> None:
+        """Grava a tabela e remove as gravadas para outras pontas das refs."""
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            facts.save(path)
+            for stale in self.directory.glob(f'{FILE_PREFIX}*'):
+                if not stale.name.startswith(f'{FILE_PREFIX}{key[0]}-'):
+                    stale.unlink()
+        except OSError as e:
+            print(f"Aviso: Não foi possível gravar a tabela de fatos: {str(e)}")
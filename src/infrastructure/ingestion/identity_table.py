@@ -0,0 +1,292 @@
+import os
+import subprocess
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from infrastructure.ingestion.author_index import AuthorEntry
+from infrastructure.ingestion.commit_index import normalize_email
+
+# Tamanho dos n-gramas do índice de busca parcial
+NGRAM_SIZE = 3
+
+# Contatos por chamada do git check-mailmap (limite da linha de comando)
+MAILMAP_BATCH_SIZE = 500
+
+
+def normalize_name(name: str) -> str:
+    """Normaliza um nome para busca: sem acentos, minúsculo e com espaços simples."""
+    if name.isascii():
+        return ' '.join(name.lower().split())
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def ngrams(text: str) -> Set[str]:
+    """Retorna os n-gramas (NGRAM_SIZE caracteres) de um texto normalizado."""
+    return {text[index:index + NGRAM_SIZE] for index in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def mailmap_signature(repo_path: str, mailmap_file: Optional[str] = None) -> Tuple:
+    """
+    Identifica a versão dos arquivos .mailmap do repositório.
+
+    Usa tamanho e data de modificação: muda quando o .mailmap da árvore
+    de trabalho (ou o `mailmap.file` configurado) é editado.
+
+    Args:
+        repo_path: Caminho do repositório
+        mailmap_file: Valor de `mailmap.file` na configuração do git (opcional)
+
+    Returns:
+        Tupla comparável entre chamadas
+    """
+    signature = []
+    for path in (Path(repo_path) / '.mailmap', mailmap_file):
+        if not path:
+            continue
+        path = Path(os.path.expanduser(str(path)))
+        if not path.is_absolute():
+            path = Path(repo_path) / path
+        try:
+            stat = path.stat()
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((str(path), None, None))
+    return tuple(signature)
+
+
+def check_mailmap(repo_path: str, contacts: Sequence[Tuple[str, str]],
+                  git_binary: str = 'git') -> Dict[Tuple[str, str], Tuple[str, str]]:
+    """
+    Resolve (nome, email) pelo .mailmap com o `git check-mailmap`.
+
+    O git aplica todas as fontes configuradas (.mailmap, `mailmap.file`
+    e `mailmap.blob`), então o resultado é o mesmo do `git log --use-mailmap`.
+
+    Args:
+        repo_path: Caminho do repositório
+        contacts: Pares (nome, email) como aparecem nos commits
+        git_binary: Executável do git
+
+    Returns:
+        Dicionário (nome, email) -> (nome canônico, email canônico), só
+        com os contatos alterados pelo mailmap
+    """
+    mapped: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    for start in range(0, len(contacts), MAILMAP_BATCH_SIZE):
+        batch = contacts[start:start + MAILMAP_BATCH_SIZE]
+        result = subprocess.run(
+            [git_binary, 'check-mailmap', *(f'{name} <{email}>' for name, email in batch)],
+            cwd=repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"git check-mailmap falhou: {result.stderr.decode('utf-8', 'replace').strip()}")
+        lines = result.stdout.decode('utf-8', 'replace').splitlines()
+        for contact, line in zip(batch, lines):
+            name, _, email = line.rpartition(' <')
+            resolved = (name, email[:-1] if email.endswith('>') else email)
+            if resolved != contact:
+                mapped[contact] = resolved
+    return mapped
+
+
+@dataclass
+class Identity:
+    """
+    Pessoa do repositório, com todos os emails e nomes consolidados pelo .mailmap.
+
+    Attributes:
+        name (str): Nome canônico (do .mailmap, ou o mais recente)
+        email (str): Email canônico (do .mailmap, ou o do commit)
+        aliases (Tuple[Tuple[str, str], ...]): Pares (nome, email) como
+            aparecem nos commits, do mais recente para o mais antigo
+        commits (int): Número de commits somando todos os emails
+        first_timestamp (int): Data do primeiro commit, em segundos desde epoch
+        last_timestamp (int): Data do último commit, em segundos desde epoch
+    """
+    name: str
+    email: str
+    aliases: Tuple[Tuple[str, str], ...]
+    commits: int
+    first_timestamp: int
+    last_timestamp: int
+
+    @property
+    def emails(self) -> List[str]:
+        """Emails usados nos commits (sem repetição), usados para filtrar o histórico."""
+        return list(dict.fromkeys(email for _, email in self.aliases))
+
+
+class IdentityTable:
+    """
+    Tabela de identidades dos autores com índices para busca.
+
+    É montada uma vez por estado do repositório (pontas das refs e
+    .mailmap) a partir do índice de autores. Cada identidade agrupa os
+    autores pelo email exato resolvido pelo .mailmap: emails que só
+    diferem em maiúsculas são pessoas distintas, a menos que o .mailmap
+    os junte (a análise compara emails exatos). Para a busca, emails e
+    nomes são normalizados (maiúsculas, acentos e espaços) e indexados:
+
+    - por chave exata, para email ou nome completos;
+    - por n-gramas, para busca parcial: só as identidades que têm todos os
+      n-gramas do texto são comparadas, em vez de todos os autores.
+    """
+
+    def __init__(self, entries: Iterable[AuthorEntry],
+                 mailmap: Optional[Dict[Tuple[str, str], Tuple[str, str]]] = None):
+        """
+        Monta a tabela.
+
+        Args:
+            entries: Autores como no índice de autores (um ou mais por email)
+            mailmap: Resolução do .mailmap, como retornada por check_mailmap
+        """
+        mailmap = mailmap or {}
+        groups: Dict[str, List[AuthorEntry]] = {}
+        canonical: Dict[str, Tuple[str, str]] = {}
+        for entry in sorted(entries, key=lambda entry: (-entry.last_timestamp, entry.email)):
+            name, email = mailmap.get((entry.name, entry.email), (entry.name, entry.email))
+            # Sem nome no .mailmap vale o nome mais recente do grupo
+            name = name if name != entry.name else None
+            key = email.strip()
+            groups.setdefault(key, []).append(entry)
+            if key not in canonical or (name is not None and canonical[key][0] is None):
+                canonical[key] = (name, email)
+
+        self.identities: List[Identity] = []
+        for key, group in groups.items():
+            name, email = canonical[key]
+            self.identities.append(Identity(
+                name=name if name is not None else group[0].name,
+                email=email,
+                aliases=tuple(dict.fromkeys((entry.name, entry.email) for entry in group)),
+                commits=sum(entry.commits for entry in group),
+                first_timestamp=min(entry.first_timestamp for entry in group),
+                last_timestamp=max(entry.last_timestamp for entry in group),
+            ))
+
+        self._by_exact_email: Dict[str, int] = {}
+        self._by_email: Dict[str, int] = {}
+        self._by_name: Dict[str, List[int]] = {}
+        by_gram: Dict[str, List[int]] = defaultdict(list)
+        self._keys: List[Tuple[str, ...]] = []
+        for position, identity in enumerate(self.identities):
+            emails = {normalize_email(identity.email), *(normalize_email(email) for email in identity.emails)}
+            names = {normalize_name(identity.name), *(normalize_name(name) for name, _ in identity.aliases)}
+            for email in (identity.email, *identity.emails):
+                self._by_exact_email.setdefault(email.strip(), position)
+            for email in emails:
+                self._by_email.setdefault(email, position)
+            for name in names:
+                self._by_name.setdefault(name, []).append(position)
+            keys = tuple(emails | names)
+            self._keys.append(keys)
+            for gram in set().union(*map(ngrams, keys)):
+                by_gram[gram].append(position)
+        self._by_gram: Dict[str, Set[int]] = {gram: set(positions) for gram, positions in by_gram.items()}
+
+    @classmethod
+    def build(cls, entries: Sequence[AuthorEntry], repo_path: str,
+              git_binary: str = 'git') -> 'IdentityTable':
+        """
+        Monta a tabela resolvendo os autores pelo .mailmap do repositório.
+
+        Args:
+            entries: Autores do índice de autores
+            repo_path: Caminho do repositório
+            git_binary: Executável do git
+
+        Returns:
+            IdentityTable: Tabela de identidades
+        """
+        contacts = list(dict.fromkeys((entry.name, entry.email) for entry in entries))
+        return cls(entries, check_mailmap(repo_path, contacts, git_binary) if contacts else {})
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    def get(self, email: str) -> Optional[Identity]:
+        """
+        Retorna a identidade de um email (de commit ou canônico).
+
+        Args:
+            email: Email; o exato tem prioridade, senão sem diferenciar maiúsculas
+
+        Returns:
+            Identity ou None se o email não aparece no repositório
+        """
+        position = self._by_exact_email.get(email.strip())
+        if position is None:
+            position = self._by_email.get(normalize_email(email))
+        return self.identities[position] if position is not None else None
+
+    def canonical_name(self, email: str, default: Optional[str] = None) -> Optional[str]:
+        """Retorna o nome canônico de um email, ou `default` se ele não aparece no repositório."""
+        identity = self.get(email)
+        return identity.name if identity is not None else default
+
+    def search(self, text: str, limit: Optional[int] = None) -> List[Identity]:
+        """
+        Busca identidades por email ou nome.
+
+        Correspondências exatas (email com as mesmas maiúsculas, email sem
+        diferenciar maiúsculas, depois nome) vêm antes das
+        parciais (o texto contido em algum email ou nome). As parciais
+        seguem a ordem da tabela, do autor mais recente para o mais antigo.
+
+        Args:
+            text: Email, nome ou parte deles
+            limit: Número máximo de resultados (opcional)
+
+        Returns:
+            List[Identity]: Identidades encontradas
+        """
+        email = normalize_email(text)
+        name = normalize_name(text)
+        if not email and not name:
+            return []
+        positions: List[int] = []
+        if text.strip() in self._by_exact_email:
+            positions.append(self._by_exact_email[text.strip()])
+        if email in self._by_email:
+            positions.append(self._by_email[email])
+        positions.extend(self._by_name.get(name, ()))
+
+        if len(name) >= NGRAM_SIZE or len(email) >= NGRAM_SIZE:
+            candidates = self._candidates(email) | self._candidates(name)
+        else:
+            candidates = range(len(self.identities))
+        positions.extend(
+            position for position in sorted(candidates)
+            if any(email in key or name in key for key in self._keys[position])
+        )
+
+        positions = list(dict.fromkeys(positions))
+        if limit is not None:
+            positions = positions[:limit]
+        return [self.identities[position] for position in positions]
+
+    def resolve(self, text: str) -> Optional[Identity]:
+        """Retorna a melhor correspondência de `search`, ou None."""
+        found = self.search(text, limit=1)
+        return found[0] if found else None
+
+    def _candidates(self, text: str) -> Set[int]:
+        """Identidades que contêm todos os n-gramas do texto (interseção das listas)."""
+        grams = ngrams(text)
+        if not grams:
+            return set()
+        postings = sorted((self._by_gram.get(gram, set()) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return candidates
@@ -0,0 +1,238 @@
+import hashlib
+import itertools
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from domain.enums.merge_policy import MergePolicy
+from infrastructure.ingestion.branch_history import BranchHistory
+from infrastructure.ingestion.daily_totals import DailyTotals
+from infrastructure.ingestion.path_filter import PathFilter
+from infrastructure.ingestion.stats_cache import cache_directory
+
+METRICS_FILE_NAME = 'incremental_metrics.sqlite'
+
+_memory_ids = itertools.count()
+
+
+def scope_key(author_emails: Iterable[str]) -> str:
+    """Gera a chave do conjunto de autores analisado."""
+    joined = '\n'.join(sorted(set(author_emails)))
+    return hashlib.sha1(joined.encode('utf-8')).hexdigest()
+
+
+class MetricsStore:
+    """
+    Armazena, por conjunto de autores, as pontas das refs já analisadas e
+    os totais diários por (branch, autor, dia).
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Inicializa o armazenamento.
+
+        Args:
+            path: Caminho do arquivo SQLite (None para um armazenamento só em
+                memória, sem gravar nada no disco)
+        """
+        self.path = Path(path) if path is not None else None
+        self._keeper: Optional[sqlite3.Connection] = None
+        if self.path is None:
+            # Banco em memória compartilhado entre conexões enquanto o armazenamento existir
+            self._uri = f'file:git-metrics-metrics-{next(_memory_ids)}?mode=memory&cache=shared'
+            self._keeper = self._connect()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS ref_tips (
+                    scope TEXT NOT NULL,
+                    ref TEXT NOT NULL,
+                    sha TEXT NOT NULL,
+                    PRIMARY KEY (scope, ref)
+                );
+                CREATE TABLE IF NOT EXISTS daily_rows (
+                    scope TEXT NOT NULL,
+                    branch TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    commits INTEGER NOT NULL,
+                    files INTEGER NOT NULL,
+                    insertions INTEGER NOT NULL,
+                    deletions INTEGER NOT NULL,
+                    PRIMARY KEY (scope, branch, email, day)
+                );
+                CREATE TABLE IF NOT EXISTS author_names (
+                    scope TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    PRIMARY KEY (scope, email)
+                );
+                CREATE TABLE IF NOT EXISTS scopes (
+                    scope TEXT PRIMARY KEY
+                );
+                """
+            )
+
+    @classmethod
+    def for_repository(cls, repo_path: str, git_dir: str,
+                       cache_dir: Optional[str] = None,
+                       path_filter: Optional[PathFilter] = None,
+                       merge_policy: Optional[MergePolicy] = None) -> 'MetricsStore':
+        """Cria o armazenamento no mesmo diretório do cache de estatísticas."""
+        directory = cache_directory(repo_path, git_dir, cache_dir, path_filter, merge_policy)
+        return cls(directory / METRICS_FILE_NAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.path is None:
+            return sqlite3.connect(self._uri, uri=True, timeout=30)
+        connection = sqlite3.connect(str(self.path), timeout=30)
+        connection.execute('PRAGMA journal_mode = WAL')
+        return connection
+
+    def load_tips(self, scope: str) -> Optional[Dict[str, str]]:
+        """
+        Retorna as pontas das refs da última análise.
+
+        Returns:
+            Dicionário ref -> hash, ou None se o conjunto nunca foi analisado
+        """
+        with closing(self._connect()) as connection:
+            known = connection.execute('SELECT 1 FROM scopes WHERE scope = ?', (scope,)).fetchone()
+            if known is None:
+                return None
+            rows = connection.execute('SELECT ref, sha FROM ref_tips WHERE scope = ?', (scope,))
+            return dict(rows.fetchall())
+
+    def load_rows(self, scope: str) -> Tuple[List[Tuple], Dict[str, str]]:
+        """
+        Retorna os totais armazenados.
+
+        Returns:
+            Tupla (linhas (branch, email, dia, commits, arquivos, adições, remoções),
+            dicionário email -> nome mais recente)
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                'SELECT branch, email, day, commits, files, insertions, deletions '
+                'FROM daily_rows WHERE scope = ?', (scope,)
+            ).fetchall()
+            names = dict(connection.execute(
+                'SELECT email, name FROM author_names WHERE scope = ?', (scope,)
+            ).fetchall())
+        return rows, names
+
+    def apply(self, scope: str, tips: Dict[str, str], accumulator: DailyTotals,
+              replace: bool = False) -> None:
+        """
+        Grava as linhas novas e as pontas das refs numa única transação.
+
+        Args:
+            scope: Chave do conjunto de autores
+            tips: Pontas atuais das refs
+            accumulator: Linhas novas somadas
+            replace: Se True, descarta os dados anteriores (reconstrução)
+        """
+        with closing(self._connect()) as connection, connection:
+            if replace:
+                for table in ('ref_tips', 'daily_rows', 'author_names'):
+                    connection.execute(f'DELETE FROM {table} WHERE scope = ?', (scope,))
+            connection.execute('INSERT OR IGNORE INTO scopes VALUES (?)', (scope,))
+            connection.executemany(
+                """
+                INSERT INTO daily_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (scope, branch, email, day) DO UPDATE SET
+                    commits = commits + excluded.commits,
+                    files = files + excluded.files,
+                    insertions = insertions + excluded.insertions,
+                    deletions = deletions + excluded.deletions
+                """,
+                [(scope, *row) for row in accumulator.to_rows()],
+            )
+            connection.executemany(
+                """
+                INSERT INTO author_names VALUES (?, ?, ?, ?)
+                ON CONFLICT (scope, email) DO UPDATE SET
+                    timestamp = excluded.timestamp,
+                    name = excluded.name
+                WHERE excluded.timestamp > author_names.timestamp
+                """,
+                [(scope, email, timestamp, name)
+                 for email, (timestamp, name) in accumulator.names.items()],
+            )
+            connection.execute('DELETE FROM ref_tips WHERE scope = ?', (scope,))
+            connection.executemany(
+                'INSERT INTO ref_tips VALUES (?, ?, ?)',
+                [(scope, ref, sha) for ref, sha in tips.items()],
+            )
+
+
+class IncrementalMetrics:
+    """
+    Atualiza os totais diários a partir das pontas das refs já analisadas.
+
+    Em cada execução só os intervalos `antigo..novo` de cada ref são
+    percorridos. Se alguma ref foi removida ou reescrita (force-push),
+    os totais são reconstruídos a partir do histórico completo.
+    """
+
+    def __init__(self, history: BranchHistory, store: MetricsStore):
+        """
+        Inicializa o atualizador.
+
+        Args:
+            history: Leitor de histórico do repositório
+            store: Armazenamento dos totais
+        """
+        self.history = history
+        self.store = store
+
+    def update(self, branches: Sequence[str], author_emails: Set[str]) -> bool:
+        """
+        Atualiza os totais armazenados para o conjunto de autores.
+
+        Args:
+            branches: Branches analisadas
+            author_emails: Emails dos autores
+
+        Returns:
+            True se foi feita uma reconstrução completa
+        """
+        scope = scope_key(author_emails)
+        tips = self.history.resolve_tips(branches)
+        stored = self.store.load_tips(scope)
+
+        if stored is None or self.history.tips_rewritten(stored, tips):
+            self._rebuild(scope, tips, author_emails)
+            return True
+
+        ranges: Dict[str, List[str]] = {}
+        for ref, sha in tips.items():
+            old = stored.get(ref)
+            if old == sha:
+                continue
+            ranges[ref] = self.history.rev_list([sha] if old is None else [sha, f'^{old}'])
+
+        accumulator = DailyTotals()
+        if ranges:
+            shas = list(dict.fromkeys(sha for ref_shas in ranges.values() for sha in ref_shas))
+            records = self.history.get_records(shas)
+            for ref, ref_shas in ranges.items():
+                for sha in ref_shas:
+                    record = records.get(sha)
+                    if record is not None and record.author_email in author_emails:
+                        accumulator.add(ref, record)
+        self.store.apply(scope, tips, accumulator)
+        return False
+
+    def load(self, author_emails: Set[str]) -> Tuple[List[Tuple], Dict[str, str]]:
+        """Retorna as linhas e nomes armazenados para o conjunto de autores."""
+        return self.store.load_rows(scope_key(author_emails))
+
+    def _rebuild(self, scope: str, tips: Dict[str, str], author_emails: Set[str]) -> None:
+        """Reconstrói os totais percorrendo o histórico completo uma vez."""
+        accumulator = DailyTotals().add_all(self.history.iter_commits(list(tips)), author_emails)
+        self.store.apply(scope, tips, accumulator, replace=True)
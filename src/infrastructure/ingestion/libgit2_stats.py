@@ -0,0 +1,297 @@
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from domain.enums.merge_policy import MergePolicy
+from infrastructure.ingestion.batch_stats import FileStat
+from infrastructure.ingestion.log_stream import CommitRecord
+from infrastructure.ingestion.path_filter import PathFilter
+
+# Entrada de um objeto tree: modo (octal), nome e hash binário de 20 bytes
+TREE_ENTRY = re.compile(rb'(\d+) ([^\0]*)\0(.{20})', re.S)
+TREE_MODE = b'40000'
+GITLINK_MODE = b'160000'
+
+# Entrada de árvore já lida: (modo, hash binário)
+TreeEntry = Tuple[bytes, bytes]
+
+# Árvores lidas mantidas em memória (as dos commits vizinhos se repetem)
+TREE_CACHE_SIZE = 4096
+
+# Bytes verificados para decidir se um arquivo é binário (mesmo limite do git)
+BINARY_CHECK_SIZE = 8000
+
+
+def _pygit2():
+    """Retorna o módulo pygit2, ou falha com uma mensagem de instalação."""
+    try:
+        import pygit2
+    except ImportError:
+        raise RuntimeError("O backend pygit2 requer o pacote pygit2 (pip install pygit2)") from None
+    return pygit2
+
+
+class Libgit2StatsService:
+    """
+    Calcula estatísticas de commits dentro do processo, com a libgit2 (pygit2).
+
+    Mesma interface e semântica do BatchStatsService: diff contra o
+    primeiro pai, sem renomeações, binários com 0 linhas. Os commits e o
+    diff de cada um são lidos do banco de objetos pela libgit2, sem
+    processos git nem pipes. Só essa parte é feita aqui: a caminhada do
+    histórico (git log/rev-list), a resolução das branches e o índice de
+    autores continuam no BranchHistory, executando o git.
+
+    A comparação de árvores é feita aqui, como no `git diff-tree`: só as
+    subárvores com hash diferente são lidas (o diff de árvores da libgit2
+    percorre todas as entradas). A libgit2 só conta as linhas dos pares
+    de arquivos alterados, com o mesmo xdiff do git. Arquivos fora do
+    filtro nem são lidos.
+
+    Diferenças conhecidas em relação ao git: os pathspecs do filtro são
+    avaliados por `PathFilter.matches` (sem as "magic words" do git além
+    de `exclude`) e o atributo `binary`/`-diff` do .gitattributes não é
+    considerado.
+    """
+
+    def __init__(self, repo_path: str, git_binary: str = 'git',
+                 path_filter: Optional[PathFilter] = None,
+                 merge_policy: MergePolicy = MergePolicy.DIFF):
+        """
+        Inicializa o serviço (o repositório é aberto no primeiro uso).
+
+        Args:
+            repo_path: Caminho para o repositório Git
+            git_binary: Não usado; mantido pela interface do BatchStatsService
+            path_filter: Filtro de arquivos aplicado ao numstat (opcional)
+            merge_policy: Se a política não diferencia merges, eles saem sem
+                arquivos nem linhas
+        """
+        self.pygit2 = _pygit2()
+        self.repo_path = Path(repo_path)
+        self.path_filter = path_filter or PathFilter()
+        self.merge_policy = merge_policy
+        self._lock = threading.Lock()
+        self._repo = None
+        self._trees: 'OrderedDict[bytes, FrozenSet[Tuple[bytes, bytes, bytes]]]' = OrderedDict()
+
+    def close(self) -> None:
+        """Libera o repositório aberto."""
+        with self._lock:
+            if self._repo is not None:
+                self._repo.free()
+                self._repo = None
+            self._trees.clear()
+
+    def __enter__(self) -> 'Libgit2StatsService':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def repo(self):
+        """Repositório pygit2 (aberto no primeiro uso)."""
+        if self._repo is None:
+            self._repo = self.pygit2.Repository(str(self.repo_path))
+        return self._repo
+
+    def get_file_stats(self, shas: Sequence[str]) -> Dict[str, List[FileStat]]:
+        """
+        Retorna o numstat por arquivo de cada commit.
+
+        Args:
+            shas: Hashes dos commits
+
+        Returns:
+            Dicionário hash -> lista de (caminho, adições, remoções)
+        """
+        with self._lock:
+            results = {}
+            for sha in shas:
+                commit = self._get_commit(sha)
+                if commit is not None:
+                    results[sha] = self._diff(commit)
+            return results
+
+    def get_records(self, shas: Sequence[str]) -> Dict[str, CommitRecord]:
+        """
+        Retorna os registros completos (cabeçalho e totais) dos commits.
+
+        Args:
+            shas: Hashes dos commits
+
+        Returns:
+            Dicionário hash -> registro
+        """
+        return self.get_records_with_files(shas)[0]
+
+    def get_records_with_files(self, shas: Sequence[str]) -> Tuple[Dict[str, CommitRecord],
+                                                                   Dict[str, List[FileStat]]]:
+        """
+        Retorna os registros completos e o numstat por arquivo dos commits.
+
+        Args:
+            shas: Hashes dos commits
+
+        Returns:
+            Tupla (hash -> registro, hash -> lista de (caminho, adições, remoções))
+        """
+        records: Dict[str, CommitRecord] = {}
+        file_stats: Dict[str, List[FileStat]] = {}
+        with self._lock:
+            for sha in shas:
+                commit = self._get_commit(sha)
+                if commit is None:
+                    continue
+                files = self._diff(commit)
+                record = self._record(sha, commit)
+                record.files = len(files)
+                record.insertions = sum(insertions for _, insertions, _ in files)
+                record.deletions = sum(deletions for _, _, deletions in files)
+                records[sha] = record
+                file_stats[sha] = files
+        return records, file_stats
+
+    def get_message(self, sha: str) -> Optional[str]:
+        """
+        Lê a mensagem de um commit.
+
+        Args:
+            sha: Hash completo do commit
+
+        Returns:
+            Mensagem completa, ou None se o commit não existe
+        """
+        with self._lock:
+            commit = self._get_commit(sha)
+            return commit.raw_message.decode('utf-8', 'replace') if commit is not None else None
+
+    def _get_commit(self, sha: str):
+        """Retorna o objeto commit, ou None se o hash não é um commit do repositório."""
+        obj = self.repo.get(sha)
+        return obj if isinstance(obj, self.pygit2.Commit) else None
+
+    @staticmethod
+    def _record(sha: str, commit) -> CommitRecord:
+        """Converte um commit pygit2 em registro (sem totais)."""
+        author = commit.author
+        return CommitRecord(
+            sha=sha,
+            parents=tuple(str(parent) for parent in commit.parent_ids),
+            author_name=author.raw_name.decode('utf-8', 'replace'),
+            author_email=author.raw_email.decode('utf-8', 'replace'),
+            timestamp=commit.commit_time,
+            tz_offset=commit.commit_time_offset * 60,
+            message=commit.raw_message.decode('utf-8', 'replace'),
+        )
+
+    def _diff(self, commit) -> List[FileStat]:
+        """Numstat do commit contra o primeiro pai (ou contra a árvore vazia, na raiz)."""
+        parent_ids = commit.parent_ids
+        if len(parent_ids) > 1 and not self.merge_policy.diffs_merges:
+            return []
+        old_tree = self.repo[parent_ids[0]].tree_id.raw if parent_ids else None
+        changes: List[Tuple[bytes, Optional[TreeEntry], Optional[TreeEntry]]] = []
+        self._tree_changes(old_tree, commit.tree_id.raw, b'', changes)
+
+        path_filter = self.path_filter
+        files: List[FileStat] = []
+        for raw_path, old, new in changes:
+            path = raw_path.decode('utf-8', 'replace')
+            if path_filter.is_active and not path_filter.matches(path):
+                continue
+            stat = self._file_stat(old, new)
+            if stat is None:
+                if not path_filter.skip_binary:
+                    files.append((path, 0, 0))
+                continue
+            files.append((path, *stat))
+        return files
+
+    def _tree(self, raw_oid: Optional[bytes]) -> FrozenSet[Tuple[bytes, bytes, bytes]]:
+        """
+        Lê uma árvore como conjunto de entradas (modo, nome, hash).
+
+        As árvores lidas ficam num cache LRU: a árvore de um commit é a
+        do pai do próximo commit da caminhada.
+        """
+        if raw_oid is None:
+            return frozenset()
+        tree = self._trees.get(raw_oid)
+        if tree is not None:
+            self._trees.move_to_end(raw_oid)
+            return tree
+        _, data = self.repo.odb.read(self.pygit2.Oid(raw=raw_oid))
+        tree = frozenset(TREE_ENTRY.findall(data))
+        self._trees[raw_oid] = tree
+        if len(self._trees) > TREE_CACHE_SIZE:
+            self._trees.popitem(last=False)
+        return tree
+
+    def _tree_changes(self, old_oid: Optional[bytes], new_oid: Optional[bytes], prefix: bytes,
+                      changes: List[Tuple[bytes, Optional[TreeEntry], Optional[TreeEntry]]]) -> None:
+        """
+        Compara duas árvores como o `diff-tree -r`: só desce nas subárvores alteradas.
+
+        Cada arquivo alterado entra em `changes` como (caminho, entrada antiga, entrada nova).
+        """
+        old_entries = self._tree(old_oid)
+        # Só as entradas que diferem entre as árvores (diferença simétrica dos conjuntos)
+        changed: Dict[bytes, List[Optional[TreeEntry]]] = {}
+        for entry in old_entries ^ self._tree(new_oid):
+            mode, name, oid = entry
+            changed.setdefault(name, [None, None])[entry not in old_entries] = (mode, oid)
+        for name in sorted(changed):
+            old, new = changed[name]
+            old_is_tree = old is not None and old[0] == TREE_MODE
+            new_is_tree = new is not None and new[0] == TREE_MODE
+            if old_is_tree or new_is_tree:
+                self._tree_changes(old[1] if old_is_tree else None, new[1] if new_is_tree else None,
+                                   prefix + name + b'/', changes)
+                old = None if old_is_tree else old
+                new = None if new_is_tree else new
+                if old is None and new is None:
+                    continue
+            changes.append((prefix + name, old, new))
+
+    def _file_stat(self, old: Optional[TreeEntry], new: Optional[TreeEntry]) -> Optional[Tuple[int, int]]:
+        """
+        Retorna (adições, remoções) de um arquivo, ou None se for binário.
+
+        Binário como no git: um dos lados tem um byte nulo nos primeiros
+        8000 bytes ou passa de `max_file_size`.
+        """
+        limit = self.path_filter.max_file_size
+        contents = []
+        for entry in (old, new):
+            if entry is None:
+                contents.append(None)
+            elif entry[0] == GITLINK_MODE:
+                contents.append(b'Subproject commit ' + entry[1].hex().encode('ascii') + b'\n')
+            else:
+                oid = self.pygit2.Oid(raw=entry[1])
+                if limit is not None and self.repo.odb.read_header(oid)[1] > limit:
+                    return None
+                data = self.repo.odb.read(oid)[1]
+                if b'\0' in data[:BINARY_CHECK_SIZE]:
+                    return None
+                contents.append(data)
+        old_data, new_data = contents
+        if old_data is None:
+            return _count_lines(new_data), 0
+        if new_data is None:
+            return 0, _count_lines(old_data)
+        if old[1] == new[1]:
+            return 0, 0
+        _, insertions, deletions = self.pygit2.Patch.create_from(
+            old_data, new_data, context_lines=0, flag=self.pygit2.enums.DiffOption.FORCE_TEXT
+        ).line_stats
+        return insertions, deletions
+
+
+def _count_lines(data: bytes) -> int:
+    """Número de linhas de um arquivo (a última pode não ter quebra de linha)."""
+    return data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
@@ -0,0 +1,319 @@
+import hashlib
+import math
+import re
+import subprocess
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from domain.enums.merge_policy import MergePolicy
+
+# Separadores usados no formato do git log: \x1e inicia cada commit e os
+# campos do cabeçalho são terminados por NUL (mesmo terminador do -z).
+RECORD_START = '\x1e'
+LOG_FORMAT = '%x1e%H%x00%P%x00%an%x00%ae%x00%cd%x00%B'
+HEADER_FIELDS = 6
+
+# Mesma semântica do `commit.stats` do GitPython: sem detecção de renomeação
+# e, com a política de merges padrão, merges diferenciados contra o primeiro pai.
+NUMSTAT_ARGS = ['--numstat', '--no-renames']
+
+# Os campos %an/%ae não passam pelo .mailmap (mesmo comportamento do
+# GitPython); --no-use-mailmap faz o --author comparar com os mesmos valores.
+BASE_ARGS = ['-z', '--date=raw', '--no-use-mailmap', f'--format={LOG_FORMAT}']
+
+CHUNK_SIZE = 1 << 16
+
+
+@dataclass
+class CommitRecord:
+    """
+    Registro bruto de um commit lido do git log.
+
+    Attributes:
+        sha (str): Hash completo do commit
+        parents (Tuple[str, ...]): Hashes dos pais
+        author_name (str): Nome do autor
+        author_email (str): Email do autor
+        timestamp (int): Data do commit (committer) em segundos desde epoch
+        tz_offset (int): Offset do fuso em segundos a leste de UTC
+        message (str): Mensagem completa do commit
+        files (int): Número de arquivos alterados
+        insertions (int): Número de linhas adicionadas
+        deletions (int): Número de linhas removidas
+    """
+    sha: str
+    parents: Tuple[str, ...]
+    author_name: str
+    author_email: str
+    timestamp: int
+    tz_offset: int
+    message: str
+    files: int = 0
+    insertions: int = 0
+    deletions: int = 0
+
+    @property
+    def committed_datetime(self) -> datetime:
+        """Retorna a data do commit com o fuso original."""
+        return datetime.fromtimestamp(self.timestamp, timezone(timedelta(seconds=self.tz_offset)))
+
+
+def parse_raw_date(raw: str) -> Tuple[int, int]:
+    """
+    Converte uma data no formato `--date=raw` (ex: "1700000000 -0300").
+
+    Returns:
+        Tupla (timestamp, offset em segundos)
+    """
+    timestamp, _, zone = raw.partition(' ')
+    offset = 0
+    if len(zone) == 5:
+        sign = -1 if zone[0] == '-' else 1
+        offset = sign * (int(zone[1:3]) * 3600 + int(zone[3:5]) * 60)
+    return int(timestamp), offset
+
+
+def diff_merges_args(merge_policy: MergePolicy) -> List[str]:
+    """Argumento `--diff-merges` do git log/diff-tree para a política de merges."""
+    return ['--diff-merges=first-parent' if merge_policy.diffs_merges else '--diff-merges=off']
+
+
+def merge_walk_args(merge_policy: MergePolicy) -> List[str]:
+    """Argumentos do git log/rev-list que limitam os commits percorridos pela política."""
+    if merge_policy is MergePolicy.SKIP:
+        return ['--no-merges']
+    if merge_policy is MergePolicy.FIRST_PARENT:
+        return ['--first-parent']
+    return []
+
+
+def parse_numstat_value(value: str) -> int:
+    """Converte um valor do numstat; arquivos binários ('-') contam como 0."""
+    return 0 if value == '-' else int(value)
+
+
+class GitLogStream:
+    """
+    Lê commits e suas estatísticas com um único processo `git log --numstat`.
+
+    A saída é consumida de forma incremental, então a memória usada não
+    depende do tamanho do histórico e nenhum `git diff` extra é executado
+    por commit.
+    """
+
+    def __init__(self, repo_path: str, git_binary: str = 'git'):
+        """
+        Inicializa o leitor.
+
+        Args:
+            repo_path: Caminho para o repositório Git
+            git_binary: Executável do git
+        """
+        self.repo_path = Path(repo_path)
+        self.git_binary = git_binary
+
+    def iter_commits(self, revisions: Sequence[str],
+                     extra_args: Optional[Sequence[str]] = None,
+                     with_stats: bool = True,
+                     merge_policy: MergePolicy = MergePolicy.DIFF) -> Iterator[CommitRecord]:
+        """
+        Percorre os commits alcançáveis pelas revisões informadas.
+
+        Args:
+            revisions: Revisões (branches, ranges, hashes) a percorrer
+            extra_args: Argumentos adicionais repassados ao git log
+            with_stats: Se False, não calcula o numstat
+            merge_policy: Define se os merges são diferenciados no numstat
+                (os commits percorridos são definidos por `extra_args`)
+
+        Yields:
+            CommitRecord: Um registro por commit, na ordem do git log
+        """
+        args = [self.git_binary, 'log', *BASE_ARGS]
+        if with_stats:
+            args.extend(NUMSTAT_ARGS)
+            args.extend(diff_merges_args(merge_policy))
+        if extra_args:
+            args.extend(extra_args)
+        args.extend(revisions)
+        args.append('--')
+        yield from self._run(args)
+
+    def _run(self, args: List[str]) -> Iterator[CommitRecord]:
+        """Executa o git e converte a saída em registros."""
+        process = subprocess.Popen(
+            args,
+            cwd=str(self.repo_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            yield from parse_log_stream(iter(lambda: process.stdout.read(CHUNK_SIZE), b''))
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read()
+            process.stderr.close()
+            returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"git log falhou: {stderr.decode('utf-8', 'replace').strip()}")
+
+
+@lru_cache(maxsize=None)
+def git_version(git_binary: str = 'git') -> Tuple[int, ...]:
+    """Retorna a versão do git instalado, ex: (2, 39, 5)."""
+    output = subprocess.run([git_binary, 'version'], stdout=subprocess.PIPE, check=True).stdout
+    match = re.search(rb'(\d+)\.(\d+)(?:\.(\d+))?', output)
+    return tuple(int(part) for part in match.groups(default=b'0')) if match else (0,)
+
+
+def refs_fingerprint(repo_path: str, git_binary: str = 'git') -> str:
+    """
+    Identifica o estado das refs do repositório (branches, tags e remotas).
+
+    É o hash da saída do `git for-each-ref`: muda sempre que alguma ref é
+    criada, removida ou movida.
+
+    Args:
+        repo_path: Caminho do repositório
+        git_binary: Executável do git
+
+    Returns:
+        Hash hexadecimal (sha1) das refs e dos commits apontados
+    """
+    result = subprocess.run(
+        [git_binary, 'for-each-ref', '--format=%(objectname) %(refname)'],
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git for-each-ref falhou: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return hashlib.sha1(result.stdout).hexdigest()
+
+
+def count_commits(repo_path: str, git_binary: str = 'git') -> int:
+    """
+    Conta os commits alcançáveis por todas as refs (`git rev-list --all --count`).
+
+    Args:
+        repo_path: Caminho do repositório
+        git_binary: Executável do git
+
+    Returns:
+        Número de commits
+    """
+    result = subprocess.run(
+        [git_binary, 'rev-list', '--all', '--count'],
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git rev-list falhou: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return int(result.stdout.strip() or 0)
+
+
+def build_filter_args(author_emails: Optional[Iterable[str]] = None,
+                      since: Optional[datetime] = None,
+                      until: Optional[datetime] = None,
+                      git_binary: str = 'git') -> List[str]:
+    """
+    Traduz os filtros de autor e data para argumentos do git log.
+
+    Assim os commits fora do filtro nunca são lidos nem diferenciados.
+    O filtro de autor do git é por substring, então quem chama ainda deve
+    conferir o email exato; as datas são exatas (resolução de segundos).
+
+    Args:
+        author_emails: Emails dos autores
+        since: Data inicial (inclusiva)
+        until: Data final (inclusiva)
+        git_binary: Executável do git
+
+    Returns:
+        Lista de argumentos para o git log
+    """
+    args: List[str] = []
+    emails = sorted(set(author_emails or []))
+    if emails:
+        args.append('--fixed-strings')
+        args.extend(f'--author=<{email}>' for email in emails)
+    if since is not None:
+        # --since interrompe a caminhada no primeiro commit antigo (problema
+        # com relógios fora de ordem); --since-as-filter só filtra (git 2.37+)
+        option = '--since-as-filter' if git_version(git_binary) >= (2, 37) else '--since'
+        args.append(f'{option}=@{math.ceil(since.timestamp())}')
+    if until is not None:
+        args.append(f'--until=@{math.floor(until.timestamp())}')
+    return args
+
+
+def parse_log_stream(chunks: Iterator[bytes]) -> Iterator[CommitRecord]:
+    """
+    Converte a saída de `git log -z` (formato LOG_FORMAT) em registros.
+
+    Args:
+        chunks: Blocos de bytes lidos do processo
+
+    Yields:
+        CommitRecord: Registros completos, assim que são lidos
+    """
+    header: List[str] = []
+    record: Optional[CommitRecord] = None
+    pending = b''
+
+    for chunk in chunks:
+        tokens = (pending + chunk).split(b'\0')
+        pending = tokens.pop()
+        for raw in tokens:
+            token = raw.decode('utf-8', 'replace')
+            if token.startswith(RECORD_START) or (token.startswith('\n' + RECORD_START)):
+                if record is not None:
+                    yield record
+                    record = None
+                header = [token.lstrip('\n')[1:]]
+                continue
+            if record is None:
+                header.append(token)
+                if len(header) == HEADER_FIELDS:
+                    record = _record_from_header(header)
+                continue
+            _add_numstat(record, token)
+
+    if pending:
+        token = pending.decode('utf-8', 'replace')
+        if record is not None:
+            _add_numstat(record, token)
+    if record is not None:
+        yield record
+
+
+def _record_from_header(header: List[str]) -> CommitRecord:
+    """Cria o registro a partir dos campos do cabeçalho."""
+    sha, parents, name, email, raw_date, message = header
+    timestamp, tz_offset = parse_raw_date(raw_date)
+    return CommitRecord(
+        sha=sha,
+        parents=tuple(parents.split()),
+        author_name=name,
+        author_email=email,
+        timestamp=timestamp,
+        tz_offset=tz_offset,
+        message=message,
+    )
+
+
+def _add_numstat(record: CommitRecord, token: str) -> None:
+    """Soma uma linha do numstat (`adições\\tremoções\\tarquivo`) ao registro."""
+    token = token.lstrip('\n')
+    if not token:
+        return
+    parts = token.split('\t', 2)
+    if len(parts) < 3:
+        return
+    record.files += 1
+    record.insertions += parse_numstat_value(parts[0])
+    record.deletions += parse_numstat_value(parts[1])
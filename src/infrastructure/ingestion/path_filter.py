@@ -0,0 +1,122 @@
+import fnmatch
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+# Multiplicadores aceitos em tamanhos (mesmas unidades do `git config`)
+SIZE_UNITS = {'': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+
+
+def parse_size(value: str) -> int:
+    """
+    Converte um tamanho como `500k`, `2M` ou `1048576` em bytes.
+
+    Args:
+        value: Tamanho, com sufixo opcional k/m/g (base 1024)
+
+    Returns:
+        Tamanho em bytes
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*([kmg]?)i?b?\s*', str(value), re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Tamanho inválido: {value}")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).lower()]
+
+
+@dataclass(frozen=True)
+class PathFilter:
+    """
+    Seleção dos arquivos que entram nas estatísticas dos commits.
+
+    Os padrões são pathspecs do git (ex: `src/`, `*.py`, `package-lock.json`)
+    e vão direto para o `git diff-tree`: arquivos excluídos nem chegam a
+    ser diferenciados. Arquivos maiores que `max_file_size` são tratados
+    pelo git como binários (`core.bigFileThreshold`), sem ler o conteúdo.
+    Commits que só alteram arquivos filtrados continuam contando como
+    commits, com zero arquivos e linhas.
+
+    Attributes:
+        include (Tuple[str, ...]): Pathspecs incluídos (vazio para todos)
+        exclude (Tuple[str, ...]): Pathspecs excluídos
+        skip_binary (bool): Se True, arquivos binários (e os maiores que o
+            limite) não contam como arquivos alterados
+        max_file_size (Optional[int]): Tamanho em bytes a partir do qual o
+            arquivo não é diferenciado
+    """
+    include: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()
+    skip_binary: bool = False
+    max_file_size: Optional[int] = None
+
+    @classmethod
+    def from_options(cls, include: Optional[Iterable[str]] = None,
+                     exclude: Optional[Iterable[str]] = None,
+                     skip_binary: bool = False,
+                     max_file_size: Optional[str] = None) -> 'PathFilter':
+        """
+        Cria o filtro a partir das opções da CLI ou da API.
+
+        Args:
+            include: Pathspecs incluídos
+            exclude: Pathspecs excluídos
+            skip_binary: Se True, ignora arquivos binários
+            max_file_size: Limite de tamanho (ex: `1M`), ou None
+
+        Returns:
+            PathFilter: Filtro normalizado (mesmas opções geram a mesma chave)
+        """
+        def normalize(patterns: Optional[Iterable[str]]) -> Tuple[str, ...]:
+            return tuple(sorted({pattern.strip() for pattern in patterns or () if pattern and pattern.strip()}))
+
+        return cls(
+            include=normalize(include),
+            exclude=normalize(exclude),
+            skip_binary=bool(skip_binary),
+            max_file_size=parse_size(max_file_size) if max_file_size not in (None, '') else None,
+        )
+
+    @property
+    def is_active(self) -> bool:
+        """Indica se o filtro altera as estatísticas padrão (todos os arquivos)."""
+        return bool(self.include or self.exclude or self.skip_binary or self.max_file_size is not None)
+
+    @property
+    def key(self) -> str:
+        """Identificador estável do filtro, usado para separar os caches."""
+        options = [self.include, self.exclude, self.skip_binary, self.max_file_size]
+        return hashlib.sha1(json.dumps(options).encode('utf-8')).hexdigest()[:12]
+
+    def config_args(self) -> List[str]:
+        """Argumentos `-c` do git (antes do subcomando)."""
+        if self.max_file_size is None:
+            return []
+        return ['-c', f'core.bigFileThreshold={self.max_file_size}']
+
+    def pathspec(self) -> List[str]:
+        """Pathspecs do git (depois do `--`)."""
+        return [*self.include, *(f':(exclude){pattern}' for pattern in self.exclude)]
+
+    def matches(self, path: str) -> bool:
+        """
+        Indica se um caminho entra nas estatísticas, como o pathspec do git faria.
+
+        Cada padrão casa com o caminho idêntico, com tudo abaixo de um
+        diretório (`vendor/` ou `vendor`) ou como glob, em que `*` também
+        atravessa `/` (ex: `*.min.js` em qualquer diretório).
+
+        Args:
+            path: Caminho relativo à raiz do repositório
+
+        Returns:
+            True se o caminho não é excluído pelos padrões
+        """
+        def match(pattern: str) -> bool:
+            directory = pattern.rstrip('/')
+            return (path == directory or path.startswith(directory + '/')
+                    or fnmatch.fnmatchcase(path, pattern))
+
+        if self.include and not any(match(pattern) for pattern in self.include):
+            return False
+        return not any(match(pattern) for pattern in self.exclude)
@@ -0,0 +1,402 @@
+import posixpath
+import sqlite3
+import tempfile
+from contextlib import closing
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+from infrastructure.ingestion.batch_stats import FileStat
+from infrastructure.ingestion.branch_history import BranchHistory, CACHE_BATCH_SIZE
+from infrastructure.ingestion.log_stream import build_filter_args
+from infrastructure.ingestion.stats_cache import QUERY_CHUNK, cache_directory
+
+INDEX_FILE_NAME = 'path_index.sqlite'
+
+# Diretório usado para arquivos na raiz do repositório
+ROOT_DIRECTORY = '.'
+
+# Extensão usada para arquivos sem extensão
+NO_EXTENSION = 'other'
+
+# Escopo das pontas gravadas quando o índice cobre todos os autores
+ALL_AUTHORS = ''
+
+
+def path_directory(path: str) -> str:
+    """Retorna o diretório de um caminho do repositório ('.' para a raiz)."""
+    return posixpath.dirname(path) or ROOT_DIRECTORY
+
+
+def path_extension(path: str) -> str:
+    """Retorna a extensão (sem ponto, minúscula) do nome do arquivo, ou 'other'."""
+    return posixpath.splitext(posixpath.basename(path))[1][1:].lower() or NO_EXTENSION
+
+
+class PathIndex:
+    """
+    Índice persistente do numstat por arquivo de cada commit.
+
+    Guarda uma linha (commit, arquivo, adições, remoções) por arquivo
+    alterado, com commits, autores e caminhos referenciados por ids
+    inteiros, e índices por arquivo e por (autor, data). É atualizado como
+    o índice de autores: só os commits novos desde as pontas das refs
+    gravadas (`novo --not antigo`) são diferenciados, e refs removidas ou
+    reescritas provocam uma reconstrução.
+
+    As pontas são gravadas por autor: uma atualização com `author_emails`
+    percorre e diferencia só os commits desses autores (filtro de autor
+    no próprio git), então o índice cresce com o que foi consultado e não
+    com o histórico inteiro. Sem autores, o índice cobre todos.
+
+    Cada commit é diferenciado uma única vez: os totais calculados na
+    atualização também vão para o cache de estatísticas do histórico, se
+    houver. Perguntas como linhas por extensão, diretórios mais alterados
+    ou churn por arquivo são respondidas por SQL sobre o índice.
+    """
+
+    def __init__(self, history: BranchHistory, path: Optional[Path] = None):
+        """
+        Inicializa o índice.
+
+        Args:
+            history: Leitor de histórico do repositório
+            path: Caminho do arquivo SQLite (None para um índice temporário em
+                disco, apagado junto com o objeto, que não ocupa memória)
+        """
+        self.history = history
+        self._temporary: Optional[tempfile.TemporaryDirectory] = None
+        if path is None:
+            self._temporary = tempfile.TemporaryDirectory(prefix='git-metrics-paths-')
+            path = Path(self._temporary.name) / INDEX_FILE_NAME
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(
+                """
+                DROP TABLE IF EXISTS path_tips;
+                DROP TABLE IF EXISTS path_index_state;
+                CREATE TABLE IF NOT EXISTS author_tips (
+                    scope TEXT NOT NULL,
+                    ref TEXT NOT NULL,
+                    sha TEXT NOT NULL,
+                    PRIMARY KEY (scope, ref)
+                );
+                CREATE TABLE IF NOT EXISTS indexed_scopes (
+                    scope TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS authors (
+                    id INTEGER PRIMARY KEY,
+                    email TEXT NOT NULL UNIQUE
+                );
+                CREATE TABLE IF NOT EXISTS paths (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    directory TEXT NOT NULL,
+                    extension TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS commits (
+                    id INTEGER PRIMARY KEY,
+                    sha BLOB NOT NULL UNIQUE,
+                    author_id INTEGER NOT NULL,
+                    timestamp INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS commits_by_author ON commits (author_id, timestamp);
+                CREATE INDEX IF NOT EXISTS commits_by_time ON commits (timestamp);
+                CREATE TABLE IF NOT EXISTS file_changes (
+                    commit_id INTEGER NOT NULL,
+                    path_id INTEGER NOT NULL,
+                    insertions INTEGER NOT NULL,
+                    deletions INTEGER NOT NULL,
+                    PRIMARY KEY (commit_id, path_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS file_changes_by_path ON file_changes (path_id);
+                """
+            )
+
+    @classmethod
+    def for_repository(cls, history: BranchHistory, repo_path: str, git_dir: str,
+                       cache_dir: Optional[str] = None) -> 'PathIndex':
+        """Cria o índice no mesmo diretório do cache de estatísticas (do filtro e política do histórico)."""
+        directory = cache_directory(repo_path, git_dir, cache_dir, history.path_filter, history.merge_policy)
+        return cls(history, directory / INDEX_FILE_NAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.path), timeout=30)
+        connection.execute('PRAGMA journal_mode = WAL')
+        return connection
+
+    def update(self, branches: Sequence[str], author_emails: Optional[Collection[str]] = None) -> int:
+        """
+        Indexa os commits novos das branches.
+
+        Args:
+            branches: Branches consideradas
+            author_emails: Indexa só os commits destes autores (None para todos)
+
+        Returns:
+            Número de commits percorridos
+        """
+        tips = self.history.resolve_tips(branches)
+        scopes = [ALL_AUTHORS] if author_emails is None else sorted(set(author_emails))
+        stored = self._load_tips([ALL_AUTHORS, *scopes])
+        if stored.get(ALL_AUTHORS) == tips:
+            return 0
+
+        # Autores com as mesmas pontas gravadas são percorridos juntos; um
+        # autor ainda não indexado parte das pontas do índice completo
+        groups: Dict[Optional[Tuple[Tuple[str, str], ...]], List[str]] = {}
+        for scope in scopes:
+            old = stored.get(scope, stored.get(ALL_AUTHORS))
+            if old == tips:
+                continue
+            groups.setdefault(tuple(sorted(old.items())) if old is not None else None, []).append(scope)
+
+        walked = 0
+        batch_size = CACHE_BATCH_SIZE * self.history.jobs
+        for old_tips, group in groups.items():
+            old = dict(old_tips) if old_tips is not None else None
+            if old is None or self.history.tips_rewritten(old, tips):
+                self._clear(group)
+                revisions = list(dict.fromkeys(tips.values()))
+            else:
+                revisions = [*dict.fromkeys(tips.values()), '--not', *old.values()]
+
+            # O --author do git é por substring: commits de outros autores
+            # que passam no filtro também são indexados, sem prejuízo
+            filter_args = [] if group == [ALL_AUTHORS] else build_filter_args(group)
+            shas = self.history.rev_list(revisions, filter_args) if tips else []
+            for start in range(0, len(shas), batch_size):
+                self._ingest(shas[start:start + batch_size])
+            self._save_tips(group, tips)
+            walked += len(shas)
+        return walked
+
+    def _ingest(self, shas: List[str]) -> None:
+        """Diferencia e grava um lote de commits (os já indexados são ignorados)."""
+        with closing(self._connect()) as connection:
+            known = set()
+            for start in range(0, len(shas), QUERY_CHUNK):
+                chunk = [bytes.fromhex(sha) for sha in shas[start:start + QUERY_CHUNK]]
+                rows = connection.execute(
+                    f"SELECT sha FROM commits WHERE sha IN ({','.join('?' * len(chunk))})", chunk
+                )
+                known.update(sha.hex() for sha, in rows)
+        missing = [sha for sha in shas if sha not in known]
+        if not missing:
+            return
+
+        records, file_stats = self.history.get_records_with_files(missing)
+        if self.history.stats_cache is not None:
+            self.history.stats_cache.put_many(records.values())
+
+        with closing(self._connect()) as connection, connection:
+            author_ids = self._ids(connection, 'authors', 'email',
+                                   {record.author_email: () for record in records.values()})
+            paths = {path: (path_directory(path), path_extension(path))
+                     for files in file_stats.values() for path, _, _ in files}
+            path_ids = self._ids(connection, 'paths', 'path', paths, ('directory', 'extension'))
+            connection.executemany(
+                'INSERT OR IGNORE INTO commits (sha, author_id, timestamp) VALUES (?, ?, ?)',
+                [(bytes.fromhex(sha), author_ids[record.author_email], record.timestamp)
+                 for sha, record in records.items()],
+            )
+            commit_ids = self._ids(connection, 'commits', 'sha',
+                                   {bytes.fromhex(sha): () for sha in records}, insert=False)
+            connection.executemany(
+                """
+                INSERT INTO file_changes VALUES (?, ?, ?, ?)
+                ON CONFLICT (commit_id, path_id) DO UPDATE SET
+                    insertions = insertions + excluded.insertions,
+                    deletions = deletions + excluded.deletions
+                """,
+                [(commit_ids[bytes.fromhex(sha)], path_ids[path], insertions, deletions)
+                 for sha, files in file_stats.items() for path, insertions, deletions in files],
+            )
+
+    @staticmethod
+    def _ids(connection: sqlite3.Connection, table: str, key: str,
+             values: Dict[object, tuple], extra_columns: Tuple[str, ...] = (),
+             insert: bool = True) -> Dict[object, int]:
+        """Insere (se `insert`) as chaves ausentes de uma tabela e retorna chave -> id."""
+        columns = (key, *extra_columns)
+        if insert:
+            connection.executemany(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                [(value, *extra) for value, extra in values.items()],
+            )
+        ids: Dict[object, int] = {}
+        keys = list(values)
+        for start in range(0, len(keys), QUERY_CHUNK):
+            chunk = keys[start:start + QUERY_CHUNK]
+            rows = connection.execute(
+                f"SELECT {key}, id FROM {table} WHERE {key} IN ({','.join('?' * len(chunk))})", chunk
+            )
+            ids.update(rows)
+        return ids
+
+    def _load_tips(self, scopes: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        """Retorna as pontas indexadas de cada escopo (autor ou ALL_AUTHORS) já montado."""
+        scopes = list(dict.fromkeys(scopes))
+        placeholders = ','.join('?' * len(scopes))
+        with closing(self._connect()) as connection:
+            tips: Dict[str, Dict[str, str]] = {
+                scope: {} for scope, in connection.execute(
+                    f'SELECT scope FROM indexed_scopes WHERE scope IN ({placeholders})', scopes)
+            }
+            rows = connection.execute(
+                f'SELECT scope, ref, sha FROM author_tips WHERE scope IN ({placeholders})', scopes)
+            for scope, ref, sha in rows:
+                tips[scope][ref] = sha
+        return tips
+
+    def _save_tips(self, scopes: Sequence[str], tips: Dict[str, str]) -> None:
+        with closing(self._connect()) as connection, connection:
+            placeholders = ','.join('?' * len(scopes))
+            connection.execute(f'DELETE FROM author_tips WHERE scope IN ({placeholders})', list(scopes))
+            connection.executemany('INSERT OR IGNORE INTO indexed_scopes VALUES (?)',
+                                   [(scope,) for scope in scopes])
+            connection.executemany('INSERT INTO author_tips VALUES (?, ?, ?)',
+                                   [(scope, ref, sha) for scope in scopes for ref, sha in tips.items()])
+
+    def _clear(self, scopes: Sequence[str]) -> None:
+        """Descarta os commits indexados dos autores (reconstrução); ALL_AUTHORS descarta tudo."""
+        with closing(self._connect()) as connection, connection:
+            if ALL_AUTHORS in scopes:
+                for table in ('author_tips', 'indexed_scopes', 'file_changes', 'commits'):
+                    connection.execute(f'DELETE FROM {table}')
+                return
+            placeholders = ','.join('?' * len(scopes))
+            authors = f'SELECT id FROM authors WHERE email IN ({placeholders})'
+            connection.execute(
+                f'DELETE FROM file_changes WHERE commit_id IN '
+                f'(SELECT id FROM commits WHERE author_id IN ({authors}))', list(scopes))
+            connection.execute(f'DELETE FROM commits WHERE author_id IN ({authors})', list(scopes))
+            connection.execute(f'DELETE FROM author_tips WHERE scope IN ({placeholders})', list(scopes))
+            connection.execute(f'DELETE FROM indexed_scopes WHERE scope IN ({placeholders})', list(scopes))
+            # O índice completo deixa de cobrir esses autores
+            connection.execute('DELETE FROM author_tips WHERE scope = ?', (ALL_AUTHORS,))
+            connection.execute('DELETE FROM indexed_scopes WHERE scope = ?', (ALL_AUTHORS,))
+
+    def get_file_stats(self, shas: Sequence[str]) -> Dict[str, List[FileStat]]:
+        """
+        Retorna o numstat por arquivo de vários commits.
+
+        Os commits indexados são lidos do índice; os demais são
+        diferenciados pelo git (sem serem gravados).
+
+        Args:
+            shas: Hashes completos
+
+        Returns:
+            Dicionário hash -> lista de (caminho, adições, remoções)
+        """
+        shas = list(dict.fromkeys(shas))
+        found: Dict[str, List[FileStat]] = {}
+        with closing(self._connect()) as connection:
+            for start in range(0, len(shas), QUERY_CHUNK):
+                chunk = [bytes.fromhex(sha) for sha in shas[start:start + QUERY_CHUNK]]
+                placeholders = ','.join('?' * len(chunk))
+                for sha, in connection.execute(f'SELECT sha FROM commits WHERE sha IN ({placeholders})', chunk):
+                    found[sha.hex()] = []
+                rows = connection.execute(
+                    f"""
+                    SELECT c.sha, p.path, f.insertions, f.deletions
+                    FROM commits c
+                    JOIN file_changes f ON f.commit_id = c.id
+                    JOIN paths p ON p.id = f.path_id
+                    WHERE c.sha IN ({placeholders})
+                    ORDER BY c.id, p.path
+                    """,
+                    chunk,
+                )
+                for sha, path, insertions, deletions in rows:
+                    found[sha.hex()].append((path, insertions, deletions))
+        missing = [sha for sha in shas if sha not in found]
+        if missing:
+            found.update(self.history.get_file_stats(missing))
+        return found
+
+    def lines_by_extension(self, author_emails: Optional[Collection[str]] = None,
+                           since: Optional[int] = None,
+                           until: Optional[int] = None) -> List[Tuple]:
+        """
+        Soma as alterações por autor e extensão de arquivo.
+
+        Args:
+            author_emails: Emails dos autores (None para todos)
+            since: Timestamp inicial, inclusivo (opcional)
+            until: Timestamp final, exclusivo (opcional)
+
+        Returns:
+            Tuplas (email, extensão, commits, arquivos, adições, remoções),
+            por email e mais linhas alteradas primeiro
+        """
+        return self._aggregate('a.email, p.extension', author_emails, since, until,
+                               order='a.email, lines DESC, p.extension')
+
+    def top_directories(self, author_emails: Optional[Collection[str]] = None,
+                        since: Optional[int] = None, until: Optional[int] = None,
+                        limit: Optional[int] = None) -> List[Tuple]:
+        """
+        Retorna os diretórios com mais linhas alteradas.
+
+        Returns:
+            Tuplas (diretório, commits, arquivos, adições, remoções)
+        """
+        return self._aggregate('p.directory', author_emails, since, until,
+                               order='lines DESC, p.directory', limit=limit)
+
+    def path_churn(self, author_emails: Optional[Collection[str]] = None,
+                   since: Optional[int] = None, until: Optional[int] = None,
+                   limit: Optional[int] = None) -> List[Tuple]:
+        """
+        Retorna os arquivos com mais linhas alteradas (churn).
+
+        Returns:
+            Tuplas (caminho, commits, alterações, adições, remoções); cada
+            commit altera o arquivo uma vez, então commits == alterações
+        """
+        return self._aggregate('p.path', author_emails, since, until,
+                               order='lines DESC, p.path', limit=limit)
+
+    def _aggregate(self, group: str, author_emails: Optional[Collection[str]],
+                   since: Optional[int], until: Optional[int], order: str,
+                   limit: Optional[int] = None) -> List[Tuple]:
+        """Agrupa as alterações indexadas pelas colunas informadas."""
+        conditions: List[str] = []
+        params: List[object] = []
+        if since is not None:
+            conditions.append('c.timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('c.timestamp < ?')
+            params.append(until)
+
+        with closing(self._connect()) as connection:
+            joins = ''
+            if author_emails is not None:
+                if not author_emails:
+                    return []
+                connection.execute('CREATE TEMP TABLE selected_authors (email TEXT PRIMARY KEY)')
+                connection.executemany('INSERT OR IGNORE INTO selected_authors VALUES (?)',
+                                       [(email,) for email in author_emails])
+                joins = 'JOIN selected_authors s ON s.email = a.email'
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            query = f"""
+                SELECT {group}, COUNT(DISTINCT c.id), COUNT(*),
+                       SUM(f.insertions), SUM(f.deletions),
+                       SUM(f.insertions) + SUM(f.deletions) AS lines
+                FROM file_changes f
+                JOIN commits c ON c.id = f.commit_id
+                JOIN authors a ON a.id = c.author_id
+                JOIN paths p ON p.id = f.path_id
+                {joins}
+                {where}
+                GROUP BY {group}
+                ORDER BY {order}
+            """
+            if limit is not None:
+                query += ' LIMIT ?'
+                params.append(limit)
+            return [row[:-1] for row in connection.execute(query, params)]
@@ -0,0 +1,48 @@
+import os
+from enum import Enum
+from typing import Optional, Union
+
+from domain.enums.merge_policy import MergePolicy
+from infrastructure.ingestion.batch_stats import BatchStatsService
+from infrastructure.ingestion.path_filter import PathFilter
+
+# Variável de ambiente com o backend padrão
+BACKEND_ENV = 'GIT_METRICS_BACKEND'
+
+
+class StatsBackend(Enum):
+    """
+    Implementação usada para ler os commits e calcular o numstat.
+    """
+    GIT = 'git'  # Processos git persistentes (diff-tree/cat-file), padrão
+    PYGIT2 = 'pygit2'  # Diff de cada commit pela libgit2 dentro do processo; a caminhada usa o git
+
+    @classmethod
+    def default(cls) -> 'StatsBackend':
+        """Backend configurado em GIT_METRICS_BACKEND (padrão: git)."""
+        return cls(os.environ.get(BACKEND_ENV) or cls.GIT.value)
+
+    def __str__(self) -> str:
+        return self.value
+
+
+def create_stats_service(backend: StatsBackend, repo_path: str, git_binary: str = 'git',
+                         path_filter: Optional[PathFilter] = None,
+                         merge_policy: MergePolicy = MergePolicy.DIFF) -> Union[BatchStatsService, 'Libgit2StatsService']:
+    """
+    Cria o serviço de estatísticas em lote do backend.
+
+    Args:
+        backend: Backend escolhido
+        repo_path: Caminho para o repositório Git
+        git_binary: Executável do git
+        path_filter: Filtro de arquivos aplicado ao numstat (opcional)
+        merge_policy: Política de merges
+
+    Returns:
+        Serviço com a interface do BatchStatsService
+    """
+    if backend is StatsBackend.PYGIT2:
+        from infrastructure.ingestion.libgit2_stats import Libgit2StatsService
+        return Libgit2StatsService(repo_path, git_binary, path_filter, merge_policy)
+    return BatchStatsService(repo_path, git_binary, path_filter, merge_policy)
@@ -0,0 +1,194 @@
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+from domain.enums.merge_policy import MergePolicy
+from infrastructure.ingestion.log_stream import CommitRecord
+from infrastructure.ingestion.path_filter import PathFilter
+
+# Diretório alternativo para os caches (um arquivo por repositório)
+CACHE_DIR_ENV = 'GIT_METRICS_CACHE_DIR'
+CACHE_FILE_NAME = 'commit_stats.sqlite'
+SCHEMA_VERSION = 1
+
+# Limite de parâmetros por consulta (SQLITE_MAX_VARIABLE_NUMBER antigo é 999)
+QUERY_CHUNK = 500
+
+
+def cache_directory(repo_path: str, git_dir: str, cache_dir: Optional[str] = None,
+                    path_filter: Optional[PathFilter] = None,
+                    merge_policy: Optional[MergePolicy] = None) -> Path:
+    """
+    Retorna o diretório onde ficam os caches de um repositório.
+
+    Com um filtro de arquivos ativo ou outra política de merges, as
+    estatísticas mudam: os caches ficam em subdiretórios próprios
+    (`filter-<chave>`, `merges-<política>`).
+
+    Args:
+        repo_path: Caminho do repositório
+        git_dir: Diretório .git do repositório
+        cache_dir: Diretório alternativo (padrão: GIT_METRICS_CACHE_DIR)
+        path_filter: Filtro de arquivos aplicado às estatísticas (opcional)
+        merge_policy: Política de merges (opcional)
+
+    Returns:
+        Path: `<git_dir>/git-metrics` ou um subdiretório de cache_dir
+    """
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV)
+    if cache_dir:
+        key = hashlib.sha1(str(Path(repo_path).resolve()).encode('utf-8')).hexdigest()[:16]
+        directory = Path(cache_dir) / key
+    else:
+        directory = Path(git_dir) / 'git-metrics'
+    if path_filter is not None and path_filter.is_active:
+        directory = directory / f'filter-{path_filter.key}'
+    if merge_policy is not None and merge_policy is not MergePolicy.DIFF:
+        directory = directory / f'merges-{merge_policy.value}'
+    return directory
+
+
+class CommitStatsCache:
+    """
+    Cache persistente (SQLite) das estatísticas de cada commit.
+
+    As estatísticas de um commit nunca mudam para um mesmo hash, então
+    podem ser reaproveitadas entre execuções da CLI e chamadas da web.
+    O arquivo fica em `<git_dir>/git-metrics/` ou, se definido, no
+    diretório apontado por GIT_METRICS_CACHE_DIR.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Inicializa o cache.
+
+        Args:
+            path: Caminho do arquivo SQLite
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS commit_stats (
+                    sha TEXT PRIMARY KEY,
+                    author_name TEXT NOT NULL,
+                    author_email TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    tz_offset INTEGER NOT NULL,
+                    files INTEGER NOT NULL,
+                    insertions INTEGER NOT NULL,
+                    deletions INTEGER NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    @classmethod
+    def for_repository(cls, repo_path: str, git_dir: str,
+                       cache_dir: Optional[str] = None,
+                       path_filter: Optional[PathFilter] = None,
+                       merge_policy: MergePolicy = MergePolicy.DIFF) -> 'CommitStatsCache':
+        """
+        Cria o cache no local padrão para um repositório.
+
+        As políticas que diferenciam os merges (diff e first-parent) geram as
+        mesmas estatísticas por commit e compartilham o cache.
+
+        Args:
+            repo_path: Caminho do repositório
+            git_dir: Diretório .git do repositório
+            cache_dir: Diretório alternativo (padrão: GIT_METRICS_CACHE_DIR)
+            path_filter: Filtro de arquivos das estatísticas (um cache por filtro)
+            merge_policy: Política de merges das estatísticas
+
+        Returns:
+            CommitStatsCache: Cache do repositório
+        """
+        policy = None if merge_policy.diffs_merges else merge_policy
+        return cls(cache_directory(repo_path, git_dir, cache_dir, path_filter, policy) / CACHE_FILE_NAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma conexão (uma por operação, seguro entre threads)."""
+        connection = sqlite3.connect(str(self.path), timeout=30)
+        connection.execute('PRAGMA journal_mode = WAL')
+        return connection
+
+    def get_many(self, shas: Sequence[str]) -> Dict[str, CommitRecord]:
+        """
+        Busca as estatísticas de vários commits.
+
+        Args:
+            shas: Hashes completos
+
+        Returns:
+            Dicionário hash -> registro (sem mensagem e pais) dos commits encontrados
+        """
+        found = {}
+        with closing(self._connect()) as connection:
+            for start in range(0, len(shas), QUERY_CHUNK):
+                chunk = shas[start:start + QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = connection.execute(
+                    'SELECT sha, author_name, author_email, timestamp, tz_offset, '
+                    f'files, insertions, deletions FROM commit_stats WHERE sha IN ({placeholders})',
+                    chunk,
+                )
+                for sha, name, email, timestamp, tz_offset, files, insertions, deletions in rows:
+                    found[sha] = CommitRecord(
+                        sha=sha,
+                        parents=(),
+                        author_name=name,
+                        author_email=email,
+                        timestamp=timestamp,
+                        tz_offset=tz_offset,
+                        message='',
+                        files=files,
+                        insertions=insertions,
+                        deletions=deletions,
+                    )
+        return found
+
+    def put_many(self, records: Iterable[CommitRecord]) -> None:
+        """
+        Grava as estatísticas de vários commits.
+
+        Args:
+            records: Registros com estatísticas calculadas
+        """
+        rows = [
+            (r.sha, r.author_name, r.author_email, r.timestamp, r.tz_offset,
+             r.files, r.insertions, r.deletions)
+            for r in records
+        ]
+        if not rows:
+            return
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO commit_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+
+    def size(self) -> Dict[str, int]:
+        """
+        Retorna o tamanho atual do cache.
+
+        Returns:
+            Dicionário com o número de commits e o tamanho em bytes
+        """
+        with closing(self._connect()) as connection:
+            entries = connection.execute('SELECT COUNT(*) FROM commit_stats').fetchone()[0]
+        size_bytes = sum(
+            path.stat().st_size
+            for path in self.path.parent.glob(self.path.name + '*')
+            if path.is_file()
+        )
+        return {'commits': entries, 'bytes': size_bytes}
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute('DELETE FROM commit_stats')
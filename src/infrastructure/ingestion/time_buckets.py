@@ -0,0 +1,61 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+
+# 1970-01-01 foi uma quinta-feira: somando 3 o resto por 7 vale 0 na segunda
+EPOCH_WEEKDAY_SHIFT = 3
+
+
+def epoch_days(timestamps: np.ndarray, tz_offsets: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Converte timestamps (segundos desde epoch) em número de dias desde epoch.
+
+    Args:
+        timestamps: Timestamps em segundos (int64)
+        tz_offsets: Offsets em segundos a leste de UTC; se informado, o dia
+            é o do fuso original (senão, o dia em UTC)
+
+    Returns:
+        Array int64 com o dia de cada timestamp
+    """
+    seconds = timestamps if tz_offsets is None else timestamps + tz_offsets
+    return np.floor_divide(seconds, SECONDS_PER_DAY).astype(np.int64)
+
+
+def day_values(days: np.ndarray) -> np.ndarray:
+    """Converte números de dia em datetime64 (resolução de segundos, aceita pelo pandas)."""
+    return days.astype('datetime64[D]').astype('datetime64[s]')
+
+
+def week_values(days: np.ndarray) -> np.ndarray:
+    """Retorna a segunda-feira (início da semana ISO) de cada dia, como datetime64."""
+    return day_values(days - (days + EPOCH_WEEKDAY_SHIFT) % 7)
+
+
+def month_labels(days: np.ndarray) -> np.ndarray:
+    """Retorna o mês ('AAAA-MM') de cada dia, formatando só os meses distintos."""
+    months, inverse = np.unique(days.astype('datetime64[D]').astype('datetime64[M]'),
+                                return_inverse=True)
+    return np.datetime_as_string(months, unit='M').astype(object)[inverse.reshape(-1)]
+
+
+def day_labels(values: np.ndarray) -> np.ndarray:
+    """Formata valores datetime64 como 'AAAA-MM-DD', sem passar por strftime."""
+    return np.datetime_as_string(values.astype('datetime64[D]'), unit='D').astype(object)
+
+
+class DayLabelCache:
+    """Formata o dia UTC de timestamps, uma única vez por dia distinto."""
+
+    def __init__(self):
+        self._labels: Dict[int, str] = {}
+
+    def label(self, timestamp: int) -> str:
+        """Retorna o dia UTC ('AAAA-MM-DD') do timestamp."""
+        day = timestamp // SECONDS_PER_DAY
+        label = self._labels.get(day)
+        if label is None:
+            label = self._labels[day] = str(np.datetime64(day, 'D'))
+        return label
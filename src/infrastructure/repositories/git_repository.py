@@ -1,14 +1,28 @@
+from array import array
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Collection, Iterator, List, Optional, Dict, Set, Tuple
 
 from git import Repo
 from git.objects.commit import Commit as GitCommit
 
-from domain.entities.commit import Commit
+from domain.entities.commit import CommitBatch
 from domain.entities.author import Author
-from domain.enums.environment_type import EnvironmentType
+from domain.enums.merge_policy import MergePolicy
 from application.interfaces.repository_interface import GitRepositoryInterface
+from infrastructure.ingestion.log_stream import GitLogStream, CommitRecord, build_filter_args
+from infrastructure.ingestion.branch_history import BranchHistory
+from infrastructure.ingestion.batch_stats import FileStat
+from infrastructure.ingestion.stats_cache import CommitStatsCache, cache_directory
+from infrastructure.ingestion.incremental_metrics import IncrementalMetrics, MetricsStore
+from infrastructure.ingestion.author_index import AuthorIndex, AuthorEntry
+from infrastructure.ingestion.identity_table import IdentityTable, mailmap_signature
+from infrastructure.ingestion.commit_index import AuthorCommitIndex
+from infrastructure.ingestion.fact_table import CommitFacts, FactTableStore
+from infrastructure.ingestion.daily_totals import DailyTotals
+from infrastructure.ingestion.path_index import PathIndex
+from infrastructure.ingestion.path_filter import PathFilter
+from infrastructure.ingestion.stats_backend import StatsBackend
 
 class GitRepository(GitRepositoryInterface):
     """
@@ -16,25 +30,94 @@ class GitRepository(GitRepositoryInterface):
     Segue o princípio de Responsabilidade Única (SOLID).
     """
     
-    def __init__(self, repo_path: str):
+    def __init__(self, repo_path: str, use_cache: bool = True, cache_dir: Optional[str] = None,
+                 jobs: int = 1, path_filter: Optional[PathFilter] = None,
+                 merge_policy: MergePolicy = MergePolicy.DIFF,
+                 backend: Optional[StatsBackend] = None):
         """
         Inicializa o repositório Git.
         
         Args:
             repo_path: Caminho para o repositório Git
+            use_cache: Se True, usa o cache persistente de estatísticas
+            cache_dir: Diretório alternativo para o cache (opcional)
+            jobs: Número de processos git em paralelo para calcular estatísticas
+            path_filter: Arquivos considerados nas estatísticas (padrão: todos);
+                cada filtro tem seus próprios caches
+            merge_policy: Tratamento dos commits de merge (padrão: diferenciar
+                contra o primeiro pai); cada política tem seus próprios caches
+            backend: Implementação que lê os commits e calcula o numstat
+                (padrão: GIT_METRICS_BACKEND, ou processos git)
         """
         self.repo_path = Path(repo_path).resolve()
         if not (self.repo_path / ".git").exists():
             raise ValueError(f"Não é um repositório git: {repo_path}")
         self.repo = Repo(str(self.repo_path))
+        self.log_stream = GitLogStream(str(self.repo_path))
+        self.path_filter = path_filter or PathFilter()
+        self.merge_policy = merge_policy
+        self.backend = backend or StatsBackend.default()
+        self.stats_cache = (
+            CommitStatsCache.for_repository(str(self.repo_path), self.repo.git_dir, cache_dir,
+                                            self.path_filter, self.merge_policy)
+            if use_cache else None
+        )
+        self.history = BranchHistory(str(self.repo_path), self.log_stream,
+                                     stats_cache=self.stats_cache, jobs=jobs,
+                                     path_filter=self.path_filter, merge_policy=self.merge_policy,
+                                     backend=self.backend)
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.author_index = (
+            AuthorIndex.for_repository(self.history, str(self.repo_path), self.repo.git_dir, cache_dir)
+            if use_cache else AuthorIndex(self.history)
+        )
+        self.path_index = (
+            PathIndex.for_repository(self.history, str(self.repo_path), self.repo.git_dir, cache_dir)
+            if use_cache else PathIndex(self.history)
+        )
+        self.commit_index = AuthorCommitIndex(self.history)
+        self.fact_store = FactTableStore(
+            self.history,
+            cache_directory(str(self.repo_path), self.repo.git_dir, cache_dir,
+                            self.path_filter, self.merge_policy)
+            if use_cache else None
+        )
+        self._incremental_metrics: Optional[IncrementalMetrics] = None
         self._author_cache: Dict[str, Author] = {}
+        self._identity_table: Optional[IdentityTable] = None
+        self._identity_key: Optional[Tuple] = None
+
+    @property
+    def incremental_metrics(self) -> IncrementalMetrics:
+        """
+        Atualizador dos totais incrementais (criado no primeiro uso).
+        
+        Sem cache, os totais ficam só em memória (nada é gravado no disco).
+        """
+        if self._incremental_metrics is None:
+            store = (
+                MetricsStore.for_repository(str(self.repo_path), self.repo.git_dir, self.cache_dir,
+                                            self.path_filter, self.merge_policy)
+                if self.use_cache else MetricsStore()
+            )
+            self._incremental_metrics = IncrementalMetrics(self.history, store)
+        return self._incremental_metrics
 
     def get_commits(self,
                    authors: Optional[List[Author]] = None,
                    since: Optional[datetime] = None,
-                   until: Optional[datetime] = None) -> List[Commit]:
+                   until: Optional[datetime] = None) -> CommitBatch:
         """
-        Retorna lista de commits do repositório.
+        Retorna os commits do repositório, um por (commit, branch).
+        
+        Os commits ficam num CommitBatch colunar: cada commit é guardado uma
+        vez, autores e branches por id, e as mensagens só são lidas do git
+        quando `Commit.message` é acessado. A caminhada não calcula diffs:
+        as estatísticas de todos os commits do lote são calculadas (ou lidas
+        do cache) de uma vez, no primeiro acesso a `files_changed`,
+        `insertions` ou `deletions`. Quem só conta commits ou lê autor e
+        data nunca dispara um diff.
         
         Args:
             authors: Lista opcional de autores para filtrar
@@ -42,39 +125,149 @@ class GitRepository(GitRepositoryInterface):
             until: Data final opcional
             
         Returns:
-            List[Commit]: Lista de commits encontrados
+            CommitBatch: Sequência de Commit, agrupada por branch
         """
-        commits = []
         author_emails = {author.email for author in authors} if authors else None
+        branches = self.get_branches()
+        batch = CommitBatch(message_loader=self._load_message, stats_loader=self._load_stats)
+        rows_by_branch: Dict[str, array] = {branch: array('i') for branch in branches}
         
-        for branch in self.get_branches():
-            try:
-                environment = EnvironmentType.from_branch(branch)
-                for git_commit in self.repo.iter_commits(branch):
-                    # Filtra por autor se especificado
-                    if author_emails and git_commit.author.email not in author_emails:
-                        continue
-                        
-                    # Filtra por data se especificado
-                    commit_date = git_commit.committed_datetime
-                    if since and commit_date < since:
-                        continue
-                    if until and commit_date > until:
-                        continue
-                    
-                    # Cria ou obtém o autor do cache
-                    author = self._get_or_create_author(git_commit)
-                    
-                    # Cria o objeto Commit
-                    commit = self._create_commit(git_commit, author, branch, environment)
-                    commits.append(commit)
-                    
-            except Exception as e:
-                # Log error but continue processing other branches
-                print(f"Erro ao processar branch {branch}: {str(e)}")
-                continue
+        try:
+            # Cada commit é lido uma única vez, com a lista de branches que o contêm;
+            # os filtros de autor e data são aplicados pelo próprio git
+            for record, commit_branches in self.iter_commit_records(author_emails, since, until,
+                                                                    with_stats=False):
+                # O filtro de autor do git é por substring; confere o email exato
+                if author_emails and record.author_email not in author_emails:
+                    continue
+                
+                # Cria ou obtém o autor do cache
+                author = self._get_or_create_author_from(record.author_name, record.author_email)
                 
-        return commits
+                # Guarda o commit uma vez e uma entrada por branch que o contém
+                row = batch.add_commit(record.sha, author, record.timestamp, record.tz_offset)
+                for branch in commit_branches:
+                    rows_by_branch[branch].append(row)
+                    
+        except Exception as e:
+            # Log error but return what was processed
+            print(f"Erro ao processar o histórico: {str(e)}")
+        
+        for branch in branches:
+            for row in rows_by_branch[branch]:
+                batch.add_entry(row, branch)
+        return batch
+
+    def _load_message(self, sha: str) -> Optional[str]:
+        """Lê a mensagem de um commit (sem espaços nas pontas) sob demanda."""
+        message = self.history.batch_stats.get_message(sha)
+        return message.strip() if message is not None else None
+
+    def _load_stats(self, shas: List[str]) -> Dict[str, Tuple[int, int, int]]:
+        """Calcula (ou lê do cache) as estatísticas de vários commits em lote."""
+        records = self.history.get_records(shas)
+        return {sha: (record.files, record.insertions, record.deletions)
+                for sha, record in records.items()}
+
+    def iter_commit_records(self,
+                            author_emails: Optional[Set[str]] = None,
+                            since: Optional[datetime] = None,
+                            until: Optional[datetime] = None,
+                            with_stats: bool = True) -> Iterator[Tuple[CommitRecord, Tuple[str, ...]]]:
+        """
+        Percorre uma única vez os commits de todas as branches.
+        
+        Os filtros são repassados ao git log, então commits fora deles nunca
+        são lidos nem diferenciados. O filtro de autor do git é por
+        substring: quem chama deve conferir o email exato.
+        
+        Args:
+            author_emails: Emails dos autores para filtrar (opcional)
+            since: Data inicial opcional
+            until: Data final opcional
+            with_stats: Se False, não calcula o numstat (registros com totais zerados)
+        
+        Yields:
+            Tupla (registro do commit, branches que contêm o commit)
+        """
+        filter_args = build_filter_args(author_emails, since, until)
+        yield from self.history.iter_commits(self.get_branches(), filter_args, with_stats)
+
+    def get_commit_facts(self, author_emails: Optional[Set[str]] = None) -> CommitFacts:
+        """
+        Retorna a tabela de fatos colunar dos commits de todas as branches.
+        
+        Com as mesmas pontas das refs, a tabela é lida do cache em vez de
+        percorrer o histórico.
+        
+        Args:
+            author_emails: Emails dos autores (None para todos)
+            
+        Returns:
+            CommitFacts: Uma linha por commit, com as branches que o contêm
+        """
+        return self.fact_store.get(self.get_branches(), author_emails)
+
+    def get_daily_totals(self, author_emails: Optional[Set[str]] = None,
+                         local_time: bool = False) -> DailyTotals:
+        """
+        Soma os commits de todas as branches por (branch, autor, dia) durante a caminhada.
+        
+        Nenhuma linha por commit é guardada: a memória usada depende do
+        número de dias, autores e branches distintos, não do tamanho do
+        histórico.
+        
+        Args:
+            author_emails: Emails dos autores (None para todos)
+            local_time: Se True, o dia é o do fuso original de cada commit
+            
+        Returns:
+            DailyTotals: Totais diários e nome mais recente de cada email
+        """
+        totals = DailyTotals(local_time)
+        return totals.add_all(self.history.stream_commits(self.get_branches()), author_emails)
+
+    def get_file_stats(self, shas: List[str]) -> Dict[str, List[FileStat]]:
+        """
+        Retorna o numstat por arquivo de vários commits em lote.
+        
+        Commits já indexados são lidos do índice de arquivos; os demais
+        são calculados pelo git.
+        
+        Args:
+            shas: Hashes dos commits (repetidos são calculados uma vez)
+            
+        Returns:
+            Dicionário hash -> lista de (caminho, adições, remoções)
+        """
+        return self.path_index.get_file_stats(shas)
+
+    def get_path_index(self, author_emails: Optional[Collection[str]] = None) -> PathIndex:
+        """
+        Atualiza o índice de arquivos com os commits novos de todas as branches.
+        
+        Só os commits ainda não indexados são diferenciados; os totais
+        calculados também alimentam o cache de estatísticas.
+        
+        Args:
+            author_emails: Indexa só os commits destes autores (None para todos)
+            
+        Returns:
+            PathIndex: Índice pronto para consultas por extensão, diretório e arquivo
+        """
+        self.path_index.update(self.get_branches(), author_emails)
+        return self.path_index
+
+    def get_cache_size(self) -> Optional[Dict[str, int]]:
+        """
+        Retorna o tamanho do cache de estatísticas.
+        
+        Returns:
+            Dicionário com commits e bytes do cache, ou None se desativado
+        """
+        if self.stats_cache is None:
+            return None
+        return self.stats_cache.size()
 
     def get_branches(self) -> List[str]:
         """
@@ -91,21 +284,41 @@ class GitRepository(GitRepositoryInterface):
         Retorna lista de autores que contribuíram com o repositório.
         
         Returns:
-            List[Author]: Lista de autores
-        """
-        authors = {}
-        # Itera por todas as branches para encontrar todos os autores
-        for branch in self.get_branches():
-            try:
-                for commit in self.repo.iter_commits(branch):
-                    email = commit.author.email
-                    if email not in authors:
-                        authors[email] = self._get_or_create_author(commit)
-            except Exception as e:
-                print(f"Aviso: Não foi possível analisar a branch {branch} para autores: {str(e)}")
-                continue
-        
-        return list(authors.values())
+            List[Author]: Lista de autores, do mais recente para o mais antigo
+        """
+        return [self._get_or_create_author_from(entry.name, entry.email)
+                for entry in self.get_author_summaries()]
+
+    def get_author_summaries(self) -> List[AuthorEntry]:
+        """
+        Retorna os autores com número de commits e primeira/última data.
+        
+        Usa o índice de autores, atualizado apenas com os commits novos
+        desde a última chamada.
+        
+        Returns:
+            List[AuthorEntry]: Um registro por email
+        """
+        return self.author_index.get_authors(self.get_branches())
+
+    def get_identity_table(self) -> IdentityTable:
+        """
+        Retorna a tabela de identidades dos autores, consolidada pelo .mailmap.
+        
+        É remontada só quando as pontas das refs ou o .mailmap mudam; as
+        buscas na tabela não executam o git.
+        
+        Returns:
+            IdentityTable: Identidades com índices por email, nome e n-gramas
+        """
+        tips = self.history.resolve_tips(self.get_branches())
+        mailmap_file = self.repo.config_reader().get_value('mailmap', 'file', '')
+        key = (tuple(tips.items()), mailmap_signature(str(self.repo_path), mailmap_file))
+        if self._identity_table is None or key != self._identity_key:
+            entries = self.author_index.get_authors_at(tips)
+            self._identity_table = IdentityTable.build(entries, str(self.repo_path), self.history.git_binary)
+            self._identity_key = key
+        return self._identity_table
 
     def get_recent_author(self) -> Author:
         """
@@ -127,41 +340,25 @@ class GitRepository(GitRepositoryInterface):
         Returns:
             Author: Objeto Author
         """
-        email = commit.author.email
-        if email not in self._author_cache:
-            self._author_cache[email] = Author(
-                name=commit.author.name,
-                email=email
-            )
-        return self._author_cache[email]
+        return self._get_or_create_author_from(commit.author.name, commit.author.email)
 
-    def _create_commit(self, git_commit: GitCommit, 
-                      author: Author, branch: str,
-                      environment: EnvironmentType) -> Commit:
+    def _get_or_create_author_from(self, name: str, email: str) -> Author:
         """
-        Cria um objeto Commit a partir de um commit do Git.
+        Obtém um autor do cache pelo email ou cria um novo.
         
         Args:
-            git_commit: Commit do Git
-            author: Autor do commit
-            branch: Nome da branch
-            environment: Tipo do ambiente
+            name: Nome do autor
+            email: Email do autor
             
         Returns:
-            Commit: Objeto Commit
-        """
-        stats = git_commit.stats.total
-        return Commit(
-            hash=git_commit.hexsha[:8],
-            author=author,
-            date=git_commit.committed_datetime,
-            branch=branch,
-            environment=str(environment),
-            files_changed=stats['files'],
-            insertions=stats['insertions'],
-            deletions=stats['deletions'],
-            message=git_commit.message.strip()
-        )
+            Author: Objeto Author
+        """
+        if email not in self._author_cache:
+            self._author_cache[email] = Author(
+                name=name,
+                email=email
+            )
+        return self._author_cache[email]
 
     def get_commits_by_author(self, author: Author) -> List[GitCommit]:
         """
@@ -173,13 +370,14 @@ class GitRepository(GitRepositoryInterface):
         Returns:
             List[GitCommit]: Lista de commits do autor
         """
+        # O índice é montado uma vez por estado das refs; cada consulta só
+        # visita os commits do autor
+        by_branch = self.commit_index.lookup(self.get_branches(), author.email)
+        git_commits: Dict[str, GitCommit] = {}
         commits = []
-        for branch in self.get_branches():
-            try:
-                for commit in self.repo.iter_commits(branch):
-                    if commit.author.email == author.email:
-                        commits.append(commit)
-            except Exception as e:
-                print(f"Aviso: Não foi possível analisar a branch {branch}: {str(e)}")
-                continue
+        for shas in by_branch.values():
+            for sha in shas:
+                if sha not in git_commits:
+                    git_commits[sha] = GitCommit(self.repo, bytes.fromhex(sha))
+                commits.append(git_commits[sha])
         return commits 
\ No newline at end of file
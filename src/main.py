@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
 
@@ -6,9 +7,12 @@ import typer
 from rich.console import Console
 
 from infrastructure.repositories.git_repository import GitRepository
+from infrastructure.ingestion.path_filter import PathFilter
+from infrastructure.ingestion.stats_backend import StatsBackend
 from application.queries.get_commit_statistics_query import CommitStatisticsQuery
 from application.commands.generate_excel_report_command import GenerateExcelReportCommand
 from domain.entities.author import Author
+from domain.enums.merge_policy import MergePolicy
 from application.commands.analyze_repository import AnalyzeRepositoryCommand
 
 app = typer.Typer()
@@ -35,6 +39,78 @@ def analyze(
         "--author",
         "-a",
         help="Email do autor para filtrar (pode ser usado múltiplas vezes)"
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Ignora o cache de estatísticas e recalcula tudo pelo git"
+    ),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Atualiza os totais da última análise percorrendo apenas os commits novos"
+    ),
+    streaming: bool = typer.Option(
+        False,
+        "--streaming",
+        help="Soma os commits por dia durante a leitura do histórico (memória limitada, para históricos muito grandes)"
+    ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Número de processos git em paralelo para calcular as estatísticas"
+    ),
+    paths: bool = typer.Option(
+        False,
+        "--paths",
+        help="Inclui as abas por arquivo (linhas por extensão, diretórios e churn); indexa todos os commits dos autores"
+    ),
+    month: Optional[str] = typer.Option(
+        None,
+        "--month",
+        help="Mês (AAAA-MM) da aba de diretórios mais alterados (padrão: mês atual)"
+    ),
+    top: int = typer.Option(
+        20,
+        "--top",
+        min=1,
+        help="Número de diretórios e arquivos nas abas de diretórios e churn"
+    ),
+    include: Optional[List[str]] = typer.Option(
+        None,
+        "--include",
+        help="Pathspec dos arquivos considerados nas estatísticas (pode ser usado múltiplas vezes)"
+    ),
+    exclude: Optional[List[str]] = typer.Option(
+        None,
+        "--exclude",
+        help="Pathspec dos arquivos ignorados, ex: vendor/ ou package-lock.json (pode ser usado múltiplas vezes)"
+    ),
+    skip_binary: bool = typer.Option(
+        False,
+        "--skip-binary",
+        help="Não conta arquivos binários (nem os maiores que --max-file-size) como arquivos alterados"
+    ),
+    max_file_size: Optional[str] = typer.Option(
+        None,
+        "--max-file-size",
+        help="Não diferencia arquivos maiores que este tamanho, ex: 1M (contam como binários)"
+    ),
+    merges: MergePolicy = typer.Option(
+        MergePolicy.DIFF,
+        "--merges",
+        case_sensitive=False,
+        help="Commits de merge: diff (contra o primeiro pai), skip (ignora), "
+             "first-parent (só a linha principal de cada branch) ou no-diff (contam sem linhas)"
+    ),
+    backend: Optional[StatsBackend] = typer.Option(
+        None,
+        "--backend",
+        case_sensitive=False,
+        help="Cálculo das estatísticas: git (processos git) ou pygit2 (diff dos commits pela libgit2 "
+             "no próprio processo; a caminhada usa o git); padrão: GIT_METRICS_BACKEND ou git"
     )
 ):
     """
@@ -44,6 +120,19 @@ def analyze(
         path: Caminho do repositório Git (via opção --path)
         repository_path: Caminho do repositório Git (via argumento posicional)
         author_emails: Lista de emails dos autores para filtrar
+        no_cache: Se True, não usa o cache persistente de estatísticas
+        incremental: Se True, reaproveita os totais da última análise
+        streaming: Se True, agrega durante a caminhada sem guardar os commits
+        jobs: Número de processos git em paralelo
+        paths: Se True, inclui as métricas por arquivo no relatório
+        month: Mês dos diretórios mais alterados
+        top: Tamanho dos rankings por diretório e arquivo
+        include: Pathspecs dos arquivos considerados
+        exclude: Pathspecs dos arquivos ignorados
+        skip_binary: Se True, ignora arquivos binários
+        max_file_size: Tamanho máximo dos arquivos diferenciados
+        merges: Política de tratamento dos commits de merge
+        backend: Implementação que calcula as estatísticas
     """
     try:
         # Usa --path se fornecido, senão usa o argumento posicional
@@ -55,38 +144,47 @@ def analyze(
         # Valida o caminho
         repo_path = validate_path(repo_path)
         
+        if month:
+            try:
+                datetime.strptime(month, "%Y-%m")
+            except ValueError:
+                raise typer.BadParameter(f"Mês inválido (use AAAA-MM): {month}")
+        
+        # Filtro de arquivos, repassado ao git (arquivos excluídos não são diferenciados)
+        try:
+            path_filter = PathFilter.from_options(include, exclude, skip_binary, max_file_size)
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+        
         # Inicializa o repositório
-        repository = GitRepository(repo_path)
+        repository = GitRepository(repo_path, use_cache=not no_cache, jobs=jobs, path_filter=path_filter,
+                                   merge_policy=merges, backend=backend)
         
         # Se não foram especificados autores, usa todos do repositório
         if not author_emails:
             authors = repository.get_authors()
         else:
-            # Filtra apenas os autores especificados
-            all_authors = {author.email: author.name for author in repository.get_authors()}
+            # Resolve cada autor na tabela de identidades (email ou nome, exato ou parcial)
+            identities = repository.get_identity_table()
             authors = []
             
             for email in author_emails:
-                if email in all_authors:
-                    authors.append(Author(name=all_authors[email], email=email))
-                else:
-                    # Procura por correspondência parcial
-                    found = False
-                    for repo_email, name in all_authors.items():
-                        if email.lower() in repo_email.lower() or email.lower() in name.lower():
-                            authors.append(Author(name=name, email=repo_email))
-                            found = True
-                            break
-                    
-                    if not found:
-                        console.print(f"[yellow]Aviso: Autor '{email}' não encontrado no repositório[/yellow]")
+                identity = identities.resolve(email)
+                if identity is None:
+                    console.print(f"[yellow]Aviso: Autor '{email}' não encontrado no repositório[/yellow]")
+                    continue
+                # Todos os emails da pessoa consolidados pelo .mailmap entram na análise
+                authors.extend(Author(name=identity.name, email=alias) for alias in identity.emails)
+            
+            authors = list(dict.fromkeys(authors))
         
         if not authors:
             console.print("[red]Erro: Nenhum autor válido encontrado[/red]")
             raise typer.Exit(1)
         
         # Executa a análise
-        command = AnalyzeRepositoryCommand(repository)
+        command = AnalyzeRepositoryCommand(repository, incremental=incremental, streaming=streaming,
+                                           path_month=month, path_top=top, include_paths=paths)
         excel_path = command.execute(authors)
         
         # Exibe resultado
@@ -94,6 +192,10 @@ def analyze(
         console.print(f"\nArquivos gerados:")
         console.print(f"1. Relatório Excel: {excel_path}")
         
+        cache_size = repository.get_cache_size()
+        if cache_size is not None:
+            console.print(f"\nCache de estatísticas: {cache_size['commits']} commits ({cache_size['bytes'] / 1024:.1f} KB)")
+        
     except Exception as e:
         console.print(f"[red]Erro: {str(e)}[/red]")
         raise typer.Exit(1)
@@ -0,0 +1,136 @@
+"""
+Controle de admissão das análises do servidor web.
+"""
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Sequence, Tuple
+
+from infrastructure.ingestion.log_stream import count_commits
+from web.jobs import Job, JobQueue, QueueFull
+
+# Contagens de commits guardadas (por repositório e estado das refs)
+COMMIT_COUNT_CACHE_SIZE = 64
+
+
+class AdmissionRejected(Exception):
+    """
+    Análise recusada porque a fila está cheia.
+
+    Attributes:
+        retry_after (int): Segundos sugeridos antes de tentar de novo
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Decide se uma nova análise entra na fila e estima a memória dela.
+
+    A memória estimada é `base_memory + commits * memory_per_commit` e é
+    usada pela fila de jobs para não executar ao mesmo tempo análises
+    que, somadas, passam do orçamento; a contagem de commits é feita no
+    worker, quando o job sai da fila. Quando já há `max_queued` análises
+    esperando, a análise é recusada com um tempo sugerido para tentar de
+    novo, calculado pela duração média das últimas análises.
+    """
+
+    def __init__(self, jobs: JobQueue, max_queued: int = 16, base_memory: int = 32 << 20,
+                 memory_per_commit: int = 2 << 10, retry_after: int = 30):
+        """
+        Inicializa o controle de admissão.
+
+        Args:
+            jobs: Fila de jobs que executa as análises
+            max_queued: Análises esperando na fila além das em execução
+            base_memory: Memória estimada de uma análise sem commits, em bytes
+            memory_per_commit: Memória estimada por commit do repositório, em bytes
+            retry_after: Espera sugerida em segundos enquanto não há histórico de duração
+        """
+        self.jobs = jobs
+        self.max_queued = max_queued
+        self.base_memory = base_memory
+        self.memory_per_commit = memory_per_commit
+        self.default_retry_after = retry_after
+        self._lock = threading.Lock()
+        self._commit_counts: 'OrderedDict[Tuple[str, str], int]' = OrderedDict()
+        self.admitted = 0
+        self.rejected = 0
+
+    def estimate(self, repository: str, refs: str) -> int:
+        """
+        Estima a memória de uma análise do repositório.
+
+        Args:
+            repository: Caminho do repositório
+            refs: Estado das refs (refs_fingerprint); a contagem de commits
+                é refeita só quando ele muda
+
+        Returns:
+            Memória estimada em bytes
+        """
+        key = (repository, refs)
+        with self._lock:
+            commits = self._commit_counts.get(key)
+        if commits is None:
+            commits = count_commits(repository)
+            with self._lock:
+                self._commit_counts[key] = commits
+                while len(self._commit_counts) > COMMIT_COUNT_CACHE_SIZE:
+                    self._commit_counts.popitem(last=False)
+        return self.base_memory + commits * self.memory_per_commit
+
+    def admit(self, repository: str, refs: str, stages: Sequence[str] = ()) -> Job:
+        """
+        Admite uma nova análise na fila, reservando a vaga.
+
+        O limite é verificado e o job registrado atomicamente pela fila; a
+        memória é estimada depois, no worker (ver JobQueue.create).
+
+        Args:
+            repository: Caminho do repositório
+            refs: Estado das refs (refs_fingerprint)
+            stages: Etapas previstas da análise
+
+        Returns:
+            Job: Job registrado (aguardando `JobQueue.start`)
+
+        Raises:
+            AdmissionRejected: Se a fila já tem `max_queued` análises esperando
+        """
+        try:
+            job = self.jobs.create(stages, estimate=lambda: self.estimate(repository, refs),
+                                   max_pending=self.max_queued)
+        except QueueFull as e:
+            with self._lock:
+                self.rejected += 1
+            raise AdmissionRejected(str(e), self.retry_after()) from None
+        with self._lock:
+            self.admitted += 1
+        return job
+
+    def retry_after(self) -> int:
+        """Segundos sugeridos até haver vaga: duração média × rodadas de workers na fila."""
+        duration = self.jobs.average_duration()
+        if duration is None:
+            return self.default_retry_after
+        rounds = math.ceil((self.jobs.pending + 1) / max(1, self.jobs.max_workers))
+        return max(1, math.ceil(duration * rounds))
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidade da fila e contadores para monitoramento."""
+        with self._lock:
+            admitted, rejected = self.admitted, self.rejected
+        return {
+            'queue_depth': self.jobs.pending,
+            'running': self.jobs.running,
+            'max_concurrent': self.jobs.max_workers,
+            'max_queued': self.max_queued,
+            'memory_in_use': self.jobs.memory_in_use,
+            'memory_budget': self.jobs.memory_budget,
+            'admitted': admitted,
+            'rejected': rejected,
+        }
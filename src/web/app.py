@@ -1,6 +1,7 @@
 from flask import Flask, render_template, request, jsonify, send_file
 from flask_cors import CORS
 import os
+import re
 import sys
 import json
 import shutil
@@ -11,13 +12,39 @@ from git import Repo, InvalidGitRepositoryError
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from application.commands.analyze_repository import AnalyzeRepositoryCommand
-from application.queries.repository_metrics import RepositoryMetricsQuery
 from infrastructure.repositories.git_repository import GitRepository
+from infrastructure.ingestion.path_filter import PathFilter
+from infrastructure.ingestion.log_stream import refs_fingerprint
 from domain.entities.author import Author
+from domain.enums.merge_policy import MergePolicy
+from web.config import Config
+from web.jobs import JobQueue
+from web.admission import AdmissionController, AdmissionRejected
+from web.result_cache import AnalysisKey, ResultCache
+from web.single_flight import SingleFlight
 
 app = Flask(__name__)
 CORS(app)
 
+# Análises executam em segundo plano, num pool limitado de workers e com orçamento de memória
+jobs = JobQueue(max_workers=Config.MAX_CONCURRENT_ANALYSES, max_finished=Config.FINISHED_JOBS,
+                memory_budget=Config.MEMORY_BUDGET)
+
+# Limite da fila e estimativa de memória de cada análise nova
+admission = AdmissionController(jobs, max_queued=Config.MAX_QUEUED_ANALYSES,
+                                base_memory=Config.ANALYSIS_BASE_MEMORY,
+                                memory_per_commit=Config.MEMORY_PER_COMMIT,
+                                retry_after=Config.RETRY_AFTER)
+
+# Pedidos iguais simultâneos compartilham a mesma análise; limite de análises por repositório
+flights = SingleFlight(jobs, per_repository=Config.ANALYSES_PER_REPOSITORY)
+
+# Resultados por estado do repositório: refs iguais e mesmos autores e filtros não recalculam
+results = ResultCache(max_entries=Config.RESULT_CACHE_SIZE, ttl=Config.RESULT_CACHE_TTL)
+
+# Etapas de uma análise, na ordem em que são executadas ('paths' só com métricas por arquivo)
+ANALYSIS_STAGES = ('repository', 'paths', 'metrics', 'report')
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -26,10 +53,15 @@ def index():
 def analyze():
     data = request.json
     repo_path = data.get('repository_path')
-    author_emails = data.get('authors', [])
+    author_emails = [email.strip() for email in data.get('authors', []) if email.strip()]
+    use_cache = data.get('use_cache', True)
+    month = data.get('month')
+    include_paths = bool(data.get('path_metrics', False))
     
     if not repo_path or not author_emails:
         return jsonify({'error': 'Repository path and at least one author email are required'}), 400
+    if month and not re.fullmatch(r'\d{4}-(0[1-9]|1[0-2])', month):
+        return jsonify({'error': f'Invalid month (expected YYYY-MM): {month}'}), 400
     
     try:
         # Verifica se o diretório existe
@@ -39,27 +71,98 @@ def analyze():
         if not (repo_path / '.git').exists():
             return jsonify({'error': f'Not a git repository: {repo_path}'}), 400
             
-        # Inicializa o repositório
-        repo = GitRepository(str(repo_path))
+        # Filtro de arquivos (pathspecs do git, binários e arquivos grandes)
+        try:
+            path_filter = PathFilter.from_options(
+                data.get('include'), data.get('exclude'),
+                data.get('skip_binary', False), data.get('max_file_size')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Tratamento dos commits de merge (diff, skip, first-parent ou no-diff)
+        try:
+            merge_policy = MergePolicy(data.get('merges') or MergePolicy.DIFF.value)
+        except ValueError:
+            return jsonify({'error': f"Invalid merges policy: {data.get('merges')}"}), 400
         
         # Cria a lista de autores com os emails fornecidos
         author_list = [Author(name=email.split('@')[0], email=email) for email in author_emails]
         
-        # Executa a análise
-        command = AnalyzeRepositoryCommand(repo)
-        query = RepositoryMetricsQuery(repo)
+        # A etapa de métricas por arquivo só existe quando elas são pedidas
+        stages = [name for name in ANALYSIS_STAGES if include_paths or name != 'paths']
         
-        # Gera o relatório Excel
-        excel_path = command.execute(author_list)
+        # Resultado já calculado com as mesmas refs, autores e filtros
+        # (sem o cache persistente, o pedido também não usa o de resultados)
+        key = AnalysisKey.create(str(repo_path), refs_fingerprint(str(repo_path)), author_emails,
+                                 path_filter.key, merge_policy.value, month, include_paths, bool(use_cache))
+        cached = results.get(key) if use_cache else None
+        if cached is not None and Path(cached['excel_path']).exists():
+            job = jobs.completed(cached, stages=stages)
+            return jsonify({
+                'success': True,
+                'job_id': job.id,
+                'status': job.status.value,
+                'status_url': f'/jobs/{job.id}',
+                'cached': True
+            })
+        if cached is not None:
+            results.discard(key)
         
-        # Obtém as métricas para o gráfico
-        metrics = query.execute(author_list)
+        def run_analysis(stage):
+            # Estado das refs no início da análise: o job pode ter esperado na fila
+            stage('repository')
+            refs = refs_fingerprint(str(repo_path))
+            
+            # Inicializa o repositório
+            repo = GitRepository(str(repo_path), use_cache=use_cache, path_filter=path_filter,
+                                 merge_policy=merge_policy)
+            
+            # Uma sessão: as métricas são calculadas uma vez para o relatório e para o JSON
+            command = AnalyzeRepositoryCommand(repo, path_month=month, include_paths=include_paths)
+            session = command.create_session(author_list)
+            
+            # Métricas por arquivo, se pedidas (a indexação preenche o cache usado pelas demais)
+            if include_paths:
+                stage('paths')
+                session.path_metrics
+            
+            # Métricas para os gráficos
+            stage('metrics')
+            session.metrics
+            
+            # Gera o relatório Excel com as mesmas métricas
+            stage('report')
+            excel_path = command.write_report(session)
+            
+            result = {
+                'excel_path': excel_path,
+                'metrics': session.metrics,
+                'path_metrics': session.path_metrics,
+                'cache': repo.get_cache_size()
+            }
+            # Só guarda se as refs não se moveram durante a análise
+            if use_cache and refs_fingerprint(str(repo_path)) == refs:
+                results.put(key._replace(refs=refs), result)
+            return result
         
+        # Enfileira a análise (ou junta o pedido à análise igual em andamento);
+        # o progresso e o resultado ficam em /jobs/<id>
+        try:
+            job, attached = flights.submit(
+                str(repo_path), key, run_analysis, stages=stages,
+                admit=lambda stages: admission.admit(key.repository, key.refs, stages)
+            )
+        except AdmissionRejected as e:
+            response = jsonify({'error': f'{e}, retry in {e.retry_after}s', 'retry_after': e.retry_after})
+            return response, 429, {'Retry-After': str(e.retry_after)}
         return jsonify({
             'success': True,
-            'excel_path': excel_path,
-            'metrics': metrics
-        })
+            'job_id': job.id,
+            'status': job.status.value,
+            'status_url': f'/jobs/{job.id}',
+            'attached': attached
+        }), 202
         
     except Exception as e:
         import traceback
@@ -68,6 +171,22 @@ def analyze():
         print(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job not found: {job_id}'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/status')
+def server_status():
+    # Estado da fila e do cache de resultados, para monitoramento
+    return jsonify({
+        'admission': admission.stats(),
+        'single_flight': flights.stats(),
+        'result_cache': results.stats()
+    })
+
 @app.route('/save-report', methods=['POST'])
 def save_report():
     data = request.json
@@ -153,11 +272,17 @@ def list_authors():
         try:
             # Inicializa o repositório
             repo = GitRepository(repository_path)
-            # Obtém a lista de autores
-            authors = repo.get_authors()
+            # Obtém a lista de autores (índice atualizado só com os commits novos)
+            authors = repo.get_author_summaries()
             
             # Converte os autores para dicionário
-            authors_list = [{'name': author.name, 'email': author.email} for author in authors]
+            authors_list = [{
+                'name': author.name,
+                'email': author.email,
+                'commits': author.commits,
+                'first_commit': author.first_commit.isoformat(),
+                'last_commit': author.last_commit.isoformat()
+            } for author in authors]
             
             return jsonify({
                 'success': True,
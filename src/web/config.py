@@ -4,6 +4,7 @@ Configurações para o servidor web.
 import os
 from pathlib import Path
 from flask import Flask
+from infrastructure.ingestion.path_filter import parse_size
 
 class Config:
     """Configurações da aplicação web."""
@@ -29,6 +30,28 @@ class Config:
     PORT = int(os.getenv('GIT_METRICS_PORT', '5000'))
     DEBUG_SERVER = os.getenv('GIT_METRICS_DEBUG', 'False').lower() == 'true'
     
+    # Fila de análises: análises executando ao mesmo tempo e jobs concluídos mantidos para consulta
+    MAX_CONCURRENT_ANALYSES = int(os.getenv('GIT_METRICS_MAX_ANALYSES', '2'))
+    FINISHED_JOBS = int(os.getenv('GIT_METRICS_FINISHED_JOBS', '100'))
+    
+    # Controle de admissão: análises esperando na fila além das em execução
+    # (acima disso, 429 com Retry-After) e espera sugerida sem histórico de duração
+    MAX_QUEUED_ANALYSES = int(os.getenv('GIT_METRICS_MAX_QUEUED', '16'))
+    RETRY_AFTER = int(os.getenv('GIT_METRICS_RETRY_AFTER', '30'))
+    
+    # Orçamento de memória das análises em execução (0 desativa) e estimativa por
+    # análise: base + bytes por commit do repositório
+    MEMORY_BUDGET = parse_size(os.getenv('GIT_METRICS_MEMORY_BUDGET', '2G'))
+    ANALYSIS_BASE_MEMORY = parse_size(os.getenv('GIT_METRICS_ANALYSIS_BASE_MEMORY', '32M'))
+    MEMORY_PER_COMMIT = parse_size(os.getenv('GIT_METRICS_MEMORY_PER_COMMIT', '2k'))
+    
+    # Análises executando ao mesmo tempo no mesmo repositório (as iguais são compartilhadas)
+    ANALYSES_PER_REPOSITORY = int(os.getenv('GIT_METRICS_ANALYSES_PER_REPOSITORY', '1'))
+    
+    # Cache dos resultados das análises: número de resultados e validade em segundos
+    RESULT_CACHE_SIZE = int(os.getenv('GIT_METRICS_RESULT_CACHE_SIZE', '32'))
+    RESULT_CACHE_TTL = float(os.getenv('GIT_METRICS_RESULT_CACHE_TTL', '600'))
+    
     @staticmethod
     def init_app(app: Flask):
         """
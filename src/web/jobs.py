@@ -0,0 +1,374 @@
+"""
+Fila de análises em segundo plano do servidor web.
+"""
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+# Função que executa um job; recebe o callback que marca o início de cada etapa
+JobFunction = Callable[[Callable[[str], None]], Any]
+
+# Durações dos últimos jobs usadas para estimar a espera na fila
+DURATION_SAMPLES = 20
+
+
+class QueueFull(Exception):
+    """
+    Job recusado porque a fila já tem o máximo de jobs aguardando.
+
+    Attributes:
+        pending (int): Jobs aguardando no momento da recusa
+    """
+
+    def __init__(self, pending: int):
+        super().__init__(f'Too many analyses queued ({pending})')
+        self.pending = pending
+
+
+class JobStatus(Enum):
+    """
+    Situação de um job na fila.
+    """
+    QUEUED = 'queued'  # Aguardando um worker livre
+    RUNNING = 'running'  # Em execução
+    DONE = 'done'  # Concluído, com resultado
+    FAILED = 'failed'  # Terminou com erro
+
+    @property
+    def finished(self) -> bool:
+        """Indica se o job já terminou (com ou sem erro)."""
+        return self in (JobStatus.DONE, JobStatus.FAILED)
+
+    def __str__(self) -> str:
+        return self.value
+
+
+@dataclass
+class JobStage:
+    """
+    Etapa de um job, com os horários de início e fim.
+
+    Attributes:
+        name (str): Identificador da etapa
+        started_at (Optional[float]): Início, em segundos desde epoch
+        finished_at (Optional[float]): Fim, em segundos desde epoch
+    """
+    name: str
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        """pending, running ou done."""
+        if self.finished_at is not None:
+            return 'done'
+        return 'running' if self.started_at is not None else 'pending'
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {'name': self.name, 'status': self.status, 'elapsed': elapsed}
+
+
+@dataclass
+class Job:
+    """
+    Análise enfileirada, com o progresso por etapa e o resultado.
+
+    Attributes:
+        id (str): Identificador do job
+        stages (List[JobStage]): Etapas, na ordem de execução
+        status (JobStatus): Situação atual
+        created_at (float): Criação, em segundos desde epoch
+        started_at (Optional[float]): Início da execução
+        finished_at (Optional[float]): Fim da execução
+        result (Any): Resultado da função (quando concluído)
+        error (Optional[str]): Mensagem de erro (quando falhou)
+        memory (int): Memória estimada do job em bytes (0: desconhecida ou
+            ainda não estimada)
+        estimate (Optional[Callable[[], int]]): Estima a memória do job; é
+            chamada no worker, antes da execução
+    """
+    id: str
+    stages: List[JobStage]
+    memory: int = 0
+    estimate: Optional[Callable[[], int]] = field(default=None, repr=False, compare=False)
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def current_stage(self) -> Optional[str]:
+        """Etapa em execução, ou None."""
+        for stage in self.stages:
+            if stage.status == 'running':
+                return stage.name
+        return None
+
+    @property
+    def progress(self) -> float:
+        """Fração das etapas concluídas (0 a 1)."""
+        if self.status is JobStatus.DONE:
+            return 1.0
+        if not self.stages:
+            return 0.0
+        done = sum(1 for stage in self.stages if stage.finished_at is not None)
+        return round(done / len(self.stages), 3)
+
+    def start_stage(self, name: str) -> None:
+        """Conclui a etapa em execução e inicia a etapa `name`."""
+        now = time.time()
+        for stage in self.stages:
+            if stage.started_at is not None and stage.finished_at is None:
+                stage.finished_at = now
+        for stage in self.stages:
+            if stage.name == name and stage.started_at is None:
+                stage.started_at = now
+                return
+        self.stages.append(JobStage(name, started_at=now))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Estado do job para a resposta JSON (o resultado só quando concluído)."""
+        data = {
+            'job_id': self.id,
+            'status': self.status.value,
+            'stage': self.current_stage,
+            'progress': self.progress,
+            'stages': [stage.to_dict() for stage in self.stages],
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'memory_estimate': self.memory,
+        }
+        if self.status is JobStatus.DONE:
+            data['result'] = self.result
+        if self.status is JobStatus.FAILED:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """
+    Executa jobs num pool limitado de threads e guarda o estado de cada um.
+
+    Os jobs esperam na fila, em ordem de chegada, até haver um worker
+    livre. Com `memory_budget`, a memória do job é estimada já no worker
+    (fora da thread de quem enfileirou) e ele continua aguardando até a
+    memória estimada dos jobs em execução mais a dele caber no orçamento.
+    Um job maior que o orçamento inteiro executa sozinho. Os jobs
+    concluídos ficam disponíveis para consulta até passarem de
+    `max_finished` (os mais antigos são descartados primeiro).
+    """
+
+    def __init__(self, max_workers: int = 2, max_finished: int = 100,
+                 memory_budget: Optional[int] = None):
+        """
+        Inicializa a fila.
+
+        Args:
+            max_workers: Número máximo de jobs executando ao mesmo tempo
+            max_finished: Número de jobs concluídos mantidos para consulta
+            memory_budget: Soma máxima da memória estimada dos jobs em
+                execução, em bytes (None ou 0: sem limite)
+        """
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self.memory_budget = memory_budget or None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='git-metrics-job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Sinalizada quando um job termina e libera memória do orçamento
+        self._memory_released = threading.Condition(self._lock)
+        self._pending: Deque[Tuple[Job, JobFunction, Optional[Callable[[Job], None]]]] = deque()
+        self._active = 0
+        self._memory_in_use = 0
+        self._durations: Deque[float] = deque(maxlen=DURATION_SAMPLES)
+
+    def submit(self, function: JobFunction, stages: Sequence[str] = ()) -> Job:
+        """
+        Enfileira um job.
+
+        Args:
+            function: Função executada no worker; recebe um callback
+                `stage(nome)` que marca o início de cada etapa
+            stages: Etapas previstas, para o cálculo do progresso
+
+        Returns:
+            Job: Job enfileirado
+        """
+        job = self.create(stages)
+        self.start(job, function)
+        return job
+
+    def create(self, stages: Sequence[str] = (), estimate: Optional[Callable[[], int]] = None,
+               max_pending: Optional[int] = None) -> Job:
+        """
+        Registra um job na fila sem executá-lo (ver `start`).
+
+        A verificação do limite e o registro acontecem sob a mesma trava:
+        pedidos simultâneos não passam juntos pela última vaga.
+
+        Args:
+            stages: Etapas previstas, para o cálculo do progresso
+            estimate: Estima a memória do job em bytes, para o orçamento;
+                chamada no worker, antes da execução (opcional)
+            max_pending: Recusa o job se já houver este número de jobs
+                aguardando (None: sem limite)
+
+        Returns:
+            Job: Job aguardando, já consultável
+
+        Raises:
+            QueueFull: Se a fila já tem `max_pending` jobs aguardando
+        """
+        job = Job(id=uuid.uuid4().hex, stages=[JobStage(name) for name in stages], estimate=estimate)
+        with self._lock:
+            if max_pending is not None:
+                pending = self._count(JobStatus.QUEUED)
+                if pending >= max_pending:
+                    raise QueueFull(pending)
+            self._jobs[job.id] = job
+        return job
+
+    def start(self, job: Job, function: JobFunction,
+              on_finish: Optional[Callable[[Job], None]] = None) -> None:
+        """
+        Coloca um job criado por `create` na fila de execução.
+
+        Args:
+            job: Job registrado
+            function: Função executada no worker (ver `submit`)
+            on_finish: Chamado no worker depois que o job termina, com o
+                resultado ou o erro já registrados (opcional)
+        """
+        with self._lock:
+            self._pending.append((job, function, on_finish))
+        self._dispatch()
+
+    def completed(self, result: Any, stages: Sequence[str] = ()) -> Job:
+        """
+        Registra um job já concluído (ex: resultado vindo do cache).
+
+        Args:
+            result: Resultado do job
+            stages: Etapas, marcadas como concluídas
+
+        Returns:
+            Job: Job concluído, consultável como os demais
+        """
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, stages=[JobStage(name, now, now) for name in stages],
+                  status=JobStatus.DONE, started_at=now, finished_at=now, result=result)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Retorna o job, ou None se ele não existe (ou já foi descartado)."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def pending(self) -> int:
+        """Número de jobs aguardando um worker (ou memória no orçamento)."""
+        with self._lock:
+            return self._count(JobStatus.QUEUED)
+
+    @property
+    def running(self) -> int:
+        """Número de jobs em execução."""
+        with self._lock:
+            return self._count(JobStatus.RUNNING)
+
+    def _count(self, status: JobStatus) -> int:
+        """Conta os jobs na situação informada (com a trava adquirida)."""
+        return sum(1 for job in self._jobs.values() if job.status is status)
+
+    @property
+    def memory_in_use(self) -> int:
+        """Memória estimada dos jobs em execução, em bytes."""
+        with self._lock:
+            return self._memory_in_use
+
+    def average_duration(self) -> Optional[float]:
+        """Duração média dos últimos jobs executados, em segundos (None sem histórico)."""
+        with self._lock:
+            return sum(self._durations) / len(self._durations) if self._durations else None
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Encerra o pool (os jobs em execução terminam se `wait`)."""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, function: JobFunction,
+             on_finish: Optional[Callable[[Job], None]] = None) -> None:
+        """Estima a memória, espera o orçamento e executa o job, registrando o resultado ou o erro."""
+        self._reserve_memory(job)
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = function(job.start_stage)
+            job.status = JobStatus.DONE
+        except Exception as e:
+            print(f"Erro no job {job.id}: {str(e)}")
+            print(traceback.format_exc())
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        finally:
+            job.finished_at = time.time()
+            for stage in job.stages:
+                if stage.started_at is not None and stage.finished_at is None:
+                    stage.finished_at = job.finished_at
+            with self._lock:
+                self._active -= 1
+                self._memory_in_use -= job.memory
+                self._durations.append(job.finished_at - job.started_at)
+                self._memory_released.notify_all()
+            self._prune()
+            if on_finish is not None:
+                on_finish(job)
+            self._dispatch()
+
+    def _reserve_memory(self, job: Job) -> None:
+        """
+        Estima a memória do job e espera até ela caber no orçamento.
+
+        Roda no worker: a estimativa (que pode percorrer o histórico) não
+        atrasa quem enfileirou o job. Sem outros jobs com memória
+        reservada, o job executa mesmo que passe do orçamento.
+        """
+        if job.estimate is not None:
+            try:
+                job.memory = job.estimate()
+            except Exception as e:
+                print(f"Aviso: Não foi possível estimar a memória do job {job.id}: {str(e)}")
+        with self._memory_released:
+            while (self.memory_budget is not None and self._memory_in_use
+                   and self._memory_in_use + job.memory > self.memory_budget):
+                self._memory_released.wait()
+            self._memory_in_use += job.memory
+
+    def _dispatch(self) -> None:
+        """Envia ao pool os próximos jobs da fila enquanto houver workers livres."""
+        with self._lock:
+            while self._pending and self._active < self.max_workers:
+                job, function, on_finish = self._pending.popleft()
+                self._active += 1
+                self._executor.submit(self._run, job, function, on_finish)
+
+    def _prune(self) -> None:
+        """Descarta os jobs concluídos mais antigos além de `max_finished`."""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.status.finished]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job_id]
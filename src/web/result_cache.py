@@ -0,0 +1,133 @@
+"""
+Cache dos resultados das análises do servidor web.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+
+class AnalysisKey(NamedTuple):
+    """
+    Identifica o resultado de uma análise.
+
+    Attributes:
+        repository (str): Caminho resolvido do repositório
+        refs (str): Hash das pontas de todas as refs (refs_fingerprint)
+        authors (Tuple[str, ...]): Emails dos autores, sem espaços nas pontas e ordenados
+        filters (Tuple): Opções da análise (filtro de arquivos, política de
+            merges, mês das métricas por arquivo, uso do cache persistente)
+    """
+    repository: str
+    refs: str
+    authors: Tuple[str, ...]
+    filters: Tuple
+
+    @classmethod
+    def create(cls, repository: str, refs: str, author_emails: Iterable[str], *filters) -> 'AnalysisKey':
+        """Monta a chave; a ordem dos emails não importa, as maiúsculas sim (a análise compara o email exato)."""
+        authors = tuple(sorted({email.strip() for email in author_emails}))
+        return cls(repository, refs, authors, tuple(filters))
+
+
+class ResultCache:
+    """
+    Cache LRU com expiração dos resultados das análises.
+
+    A chave inclui o hash das refs do repositório: quando alguma ref se
+    move, a chave muda e os resultados antigos daquele repositório são
+    descartados no próximo `put`. Entradas mais antigas que `ttl`
+    segundos expiram e, acima de `max_entries`, as menos usadas saem
+    primeiro.
+    """
+
+    def __init__(self, max_entries: int = 32, ttl: Optional[float] = 600):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Número máximo de resultados guardados (0 desativa o cache)
+            ttl: Validade de cada resultado em segundos (None: sem expiração)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[AnalysisKey, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: AnalysisKey) -> Optional[Any]:
+        """
+        Retorna o resultado guardado, ou None.
+
+        Args:
+            key: Chave da análise
+
+        Returns:
+            Resultado, ou None se ausente ou expirado
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: AnalysisKey, value: Any) -> None:
+        """
+        Guarda um resultado.
+
+        Descarta os resultados do mesmo repositório calculados com outras
+        refs e, se passar do limite, os menos usados.
+
+        Args:
+            key: Chave da análise
+            value: Resultado
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            stale = [other for other in self._entries
+                     if other.repository == key.repository and other.refs != key.refs]
+            for other in stale:
+                del self._entries[other]
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self.evictions += len(stale)
+
+    def discard(self, key: AnalysisKey) -> None:
+        """Remove um resultado (ex: o relatório Excel dele foi apagado)."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove todos os resultados (os contadores são mantidos)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do cache para monitoramento."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,105 @@
+"""
+Deduplicação das análises simultâneas do servidor web.
+"""
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, Optional, Sequence, Tuple
+
+from web.jobs import Job, JobFunction, JobQueue, JobStatus
+
+
+class SingleFlight:
+    """
+    Coordena as análises em andamento na fila de jobs.
+
+    - Pedidos com a mesma chave enquanto uma análise está em andamento
+      recebem o mesmo job, em vez de percorrer o histórico de novo.
+    - Cada repositório tem no máximo `per_repository` análises executando
+      ao mesmo tempo; as demais esperam na fila do repositório (sem ocupar
+      um worker) e são enviadas ao pool quando uma termina.
+    """
+
+    def __init__(self, jobs: JobQueue, per_repository: int = 1):
+        """
+        Inicializa o coordenador.
+
+        Args:
+            jobs: Fila de jobs que executa as análises
+            per_repository: Análises executando ao mesmo tempo por repositório
+        """
+        self.jobs = jobs
+        self.per_repository = max(1, per_repository)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Job] = {}
+        self._running: Dict[str, int] = {}
+        self._waiting: Dict[str, Deque[Tuple[Job, JobFunction, Hashable]]] = {}
+        self.attached = 0
+
+    def submit(self, repository: str, key: Hashable, function: JobFunction,
+               stages: Sequence[str] = (),
+               admit: Optional[Callable[[Sequence[str]], Job]] = None) -> Tuple[Job, bool]:
+        """
+        Enfileira a análise, ou junta o pedido à análise igual em andamento.
+
+        Args:
+            repository: Repositório analisado (unidade do limite de concorrência)
+            key: Chave da análise; pedidos com a mesma chave compartilham o job
+            function: Função executada no worker (ver JobQueue.submit)
+            stages: Etapas previstas, para o cálculo do progresso
+            admit: Chamado com as etapas só quando um job novo é necessário,
+                sob a trava do coordenador; registra e retorna o job (ex:
+                AdmissionController.admit) ou levanta exceção para recusá-lo
+
+        Returns:
+            Tupla (job, True se o pedido foi juntado a um job existente)
+        """
+        with self._lock:
+            job = self._in_flight.get(key)
+            if job is not None and job.status is not JobStatus.FAILED:
+                self.attached += 1
+                return job, True
+
+            # Pedidos iguais simultâneos esperam aqui: só o primeiro cria (e reserva) o job
+            job = admit(stages) if admit is not None else self.jobs.create(stages)
+            self._in_flight[key] = job
+            if self._running.get(repository, 0) < self.per_repository:
+                self._running[repository] = self._running.get(repository, 0) + 1
+                start = True
+            else:
+                self._waiting.setdefault(repository, deque()).append((job, function, key))
+                start = False
+        if start:
+            self._start(repository, job, function, key)
+        return job, False
+
+    def _start(self, repository: str, job: Job, function: JobFunction, key: Hashable) -> None:
+        """Envia o job ao pool; ao terminar, libera a vaga do repositório."""
+        self.jobs.start(job, function, lambda finished: self._finish(repository, key, finished))
+
+    def _finish(self, repository: str, key: Hashable, job: Job) -> None:
+        """Remove o job dos em andamento e envia o próximo que espera pelo repositório."""
+        with self._lock:
+            if self._in_flight.get(key) is job:
+                del self._in_flight[key]
+            waiting = self._waiting.get(repository)
+            if waiting:
+                following = waiting.popleft()
+                if not waiting:
+                    del self._waiting[repository]
+            else:
+                following = None
+                self._running[repository] -= 1
+                if not self._running[repository]:
+                    del self._running[repository]
+        if following is not None:
+            self._start(repository, *following)
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores para monitoramento."""
+        with self._lock:
+            return {
+                'in_flight': len(self._in_flight),
+                'waiting_repository': sum(len(waiting) for waiting in self._waiting.values()),
+                'per_repository': self.per_repository,
+                'attached': self.attached,
+            }
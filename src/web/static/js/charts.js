@@ -1061,6 +1061,65 @@ function updateMetricsVisibility(chartId) {
 }
 
 // Atualizar os estilos dos filtros de métricas quando ativos/inativos
+// Escapa textos vindos do repositório (caminhos, extensões) antes de montar HTML
+function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, char => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    }[char]));
+}
+
+// Monta uma tabela simples a partir de linhas e das colunas [chave, título]
+function buildMetricsTable(rows, columns) {
+    if (!rows || rows.length === 0) {
+        return '<p class="text-muted mb-0">Nenhuma alteração encontrada.</p>';
+    }
+    return `
+        <div class="table-responsive">
+            <table class="table table-sm table-striped table-bordered mb-0">
+                <thead>
+                    <tr>${columns.map(([, title, numeric]) =>
+                        `<th${numeric ? ' class="text-center"' : ''}>${title}</th>`).join('')}</tr>
+                </thead>
+                <tbody>
+                    ${rows.map(row => `
+                        <tr>${columns.map(([key, , numeric]) => numeric
+                            ? `<td class="text-center">${Number(row[key]).toLocaleString()}</td>`
+                            : `<td>${escapeHtml(row[key])}</td>`).join('')}</tr>
+                    `).join('')}
+                </tbody>
+            </table>
+        </div>
+    `;
+}
+
+// Cria as tabelas de métricas por arquivo (extensão, diretórios do mês e churn)
+function createPathTables(pathMetrics) {
+    // Sem métricas por arquivo (não pedidas na análise), o card fica oculto
+    document.querySelector('.path-metrics').style.display = pathMetrics ? '' : 'none';
+    if (!pathMetrics) {
+        return;
+    }
+    const lines = [
+        ['linhas_adicionadas', 'Adicionadas', true],
+        ['linhas_removidas', 'Removidas', true],
+        ['total_linhas', 'Total de Linhas', true]
+    ];
+    document.getElementById('directoriesMonth').textContent = pathMetrics.mes;
+    document.getElementById('extensionTable').innerHTML = buildMetricsTable(
+        pathMetrics.linhas_por_extensao,
+        [['nome_autor', 'Autor'], ['extensao', 'Extensão'], ['total_commits', 'Commits', true],
+         ['arquivos', 'Arquivos', true], ...lines]
+    );
+    document.getElementById('directoriesTable').innerHTML = buildMetricsTable(
+        pathMetrics.diretorios_mes,
+        [['diretorio', 'Diretório'], ['total_commits', 'Commits', true], ['arquivos', 'Arquivos', true], ...lines]
+    );
+    document.getElementById('churnTable').innerHTML = buildMetricsTable(
+        pathMetrics.churn_por_arquivo,
+        [['arquivo', 'Arquivo'], ['total_commits', 'Commits', true], ...lines]
+    );
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     const style = document.createElement('style');
     style.textContent = `
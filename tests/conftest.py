@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+
+class RepoBuilder:
+    """Monta um repositório git de teste com autores e datas controlados."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True)
+        self.git('init', '-q', '-b', 'main')
+
+    def git(self, *args: str, env: Optional[Dict[str, str]] = None) -> str:
+        full_env = {**os.environ, 'GIT_CONFIG_NOSYSTEM': '1', 'HOME': str(self.path), **(env or {})}
+        result = subprocess.run(['git', *args], cwd=self.path, env=full_env, check=True,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return result.stdout.decode('utf-8').strip()
+
+    def commit(self, email: str, timestamp: int, files: Dict[str, Union[str, bytes, None]],
+               name: Optional[str] = None, message: str = 'commit') -> str:
+        """Grava os arquivos (None remove) e cria um commit com autor e data de commit dados."""
+        for path, content in files.items():
+            target = self.path / path
+            if content is None:
+                self.git('rm', '-q', '--', path)
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(content, bytes):
+                target.write_bytes(content)
+            else:
+                target.write_text(content)
+            self.git('add', '--', path)
+        name = name or email.split('@')[0]
+        date = f'@{timestamp} +0000'
+        self.git('commit', '-q', '--allow-empty', '-m', message, env={
+            'GIT_AUTHOR_NAME': name, 'GIT_AUTHOR_EMAIL': email, 'GIT_AUTHOR_DATE': date,
+            'GIT_COMMITTER_NAME': name, 'GIT_COMMITTER_EMAIL': email, 'GIT_COMMITTER_DATE': date,
+        })
+        return self.git('rev-parse', 'HEAD')
+
+
+@pytest.fixture
+def repo_builder(tmp_path):
+    return RepoBuilder(tmp_path / 'repo')
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Mantém os caches persistentes dos testes fora do ambiente do usuário."""
+    monkeypatch.setenv('GIT_METRICS_CACHE_DIR', str(tmp_path / 'cache'))
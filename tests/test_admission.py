@@ -0,0 +1,76 @@
+import threading
+
+from web import admission as admission_module
+from web.admission import AdmissionController, AdmissionRejected
+from web.jobs import JobQueue
+
+
+def test_concurrent_admits_never_pass_the_queue_limit():
+    jobs = JobQueue(max_workers=1)
+    controller = AdmissionController(jobs, max_queued=2)
+    barrier = threading.Barrier(10)
+    outcomes = []
+
+    def request(index):
+        barrier.wait()
+        try:
+            outcomes.append(controller.admit(f'/repo{index}', 'refs'))
+        except AdmissionRejected:
+            outcomes.append(None)
+
+    threads = [threading.Thread(target=request, args=(index,)) for index in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(1 for job in outcomes if job is not None) == 2
+    assert jobs.pending == 2
+    assert controller.stats()['rejected'] == 8
+
+
+def test_commits_are_counted_in_the_worker(monkeypatch):
+    counted_in = []
+
+    def count_commits(repository):
+        counted_in.append(threading.current_thread().name)
+        return 1000
+
+    monkeypatch.setattr(admission_module, 'count_commits', count_commits)
+    jobs = JobQueue(max_workers=1, memory_budget=1 << 30)
+    controller = AdmissionController(jobs, base_memory=100, memory_per_commit=10)
+
+    job = controller.admit('/repo', 'refs')
+    assert counted_in == [] and job.memory == 0
+    done = threading.Event()
+    jobs.start(job, lambda stage: None, lambda finished: done.set())
+    assert done.wait(5)
+    assert job.memory == 100 + 1000 * 10
+    assert counted_in and counted_in[0].startswith('git-metrics-job')
+    jobs.shutdown()
+
+
+def test_jobs_wait_for_memory_in_the_budget():
+    jobs = JobQueue(max_workers=2, memory_budget=100)
+    started = threading.Semaphore(0)
+    release = threading.Event()
+
+    def analysis(stage):
+        started.release()
+        release.wait(5)
+
+    created = [jobs.create(estimate=lambda: 60) for _ in range(2)]
+    finished = threading.Semaphore(0)
+    for job in created:
+        jobs.start(job, analysis, lambda job: finished.release())
+
+    # Dois workers livres, mas 60 + 60 passa do orçamento: o segundo espera na fila
+    assert started.acquire(timeout=5)
+    assert not started.acquire(timeout=0.3)
+    assert [job.status.value for job in created].count('queued') == 1
+    assert jobs.memory_in_use == 60
+
+    release.set()
+    assert finished.acquire(timeout=5) and finished.acquire(timeout=5)
+    assert jobs.memory_in_use == 0
+    jobs.shutdown()
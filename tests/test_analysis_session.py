@@ -0,0 +1,48 @@
+import pytest
+from openpyxl import load_workbook
+
+from application.commands.analyze_repository import AnalyzeRepositoryCommand
+from domain.entities.author import Author
+from infrastructure.repositories.git_repository import GitRepository
+
+BASE = 1_700_000_000
+
+
+@pytest.fixture
+def repository(repo_builder):
+    repo_builder.commit('ana@x.com', BASE, {'src/app.py': 'a\nb\n'})
+    repo_builder.commit('bob@x.com', BASE + 60, {'docs/guide.md': 'g\n'})
+    repo_builder.commit('ana@x.com', BASE + 120, {'src/app.py': 'a\nc\n'})
+    return GitRepository(str(repo_builder.path), use_cache=False)
+
+
+@pytest.fixture
+def command(repository, tmp_path):
+    def create(**options):
+        command = AnalyzeRepositoryCommand(repository, path_month='2023-11', **options)
+        command.output_dir = tmp_path / 'reports'
+        return command
+    return create
+
+
+def test_metrics_do_not_index_paths_unless_asked(repository, command, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('path index built without being asked for')
+
+    monkeypatch.setattr(repository, 'get_path_index', fail)
+    session = command().create_session([Author(name='ana', email='ana@x.com')])
+    assert session.has_data
+    assert session.path_metrics is None
+
+    sheets = load_workbook(command().write_report(session)).sheetnames
+    assert 'Churn por Arquivo' not in sheets
+
+
+def test_path_metrics_only_for_requested_authors(repository, command):
+    session = command(include_paths=True).create_session([Author(name='ana', email='ana@x.com')])
+    churn = session.path_metrics['churn_por_arquivo']
+    assert [row['arquivo'] for row in churn] == ['src/app.py']
+    assert repository.path_index.lines_by_extension(['bob@x.com']) == []
+
+    sheets = load_workbook(command(include_paths=True).write_report(session)).sheetnames
+    assert {'Linhas por Extensão', 'Churn por Arquivo'} <= set(sheets)
@@ -0,0 +1,38 @@
+import dataclasses
+from datetime import datetime, timezone
+
+import pytest
+
+from domain.entities.author import Author
+from domain.entities.commit import Commit
+
+AUTHOR = Author(name='ana', email='ana@x.com')
+DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_commit_without_stats_or_loader_fails_at_construction():
+    with pytest.raises(TypeError):
+        Commit('abc12345', AUTHOR, DATE, 'main', 'PRD')
+    with pytest.raises(TypeError):
+        Commit('abc12345', AUTHOR, DATE, 'main', 'PRD', files_changed=1)
+
+
+def test_stats_loader_runs_on_first_access():
+    calls = []
+    commit = Commit('abc12345', AUTHOR, DATE, 'main', 'PRD',
+                    stats_loader=lambda: calls.append(1) or (2, 3, 4))
+    assert not commit.stats_loaded and not calls
+    assert commit.total_lines == 7
+    assert calls == [1]
+
+
+def test_commit_is_still_a_dataclass():
+    commit = Commit('abc12345', AUTHOR, DATE, 'main', 'PRD', 1, 2, 3, message='msg')
+    assert [field.name for field in dataclasses.fields(commit)] == [
+        'hash', 'author', 'date', 'branch', 'environment',
+        'files_changed', 'insertions', 'deletions', 'message']
+    assert dataclasses.asdict(commit)['insertions'] == 2
+    changed = dataclasses.replace(commit, insertions=10)
+    assert changed.total_lines == 13 and changed.message == 'msg'
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        commit.hash = 'other'
@@ -0,0 +1,27 @@
+from infrastructure.repositories.git_repository import GitRepository
+
+BASE = 1_700_000_000
+
+
+def build(repo_builder, mailmap=None):
+    repo_builder.commit('Foo@x.com', BASE, {'a.txt': 'a\n'}, name='Foo')
+    repo_builder.commit('foo@x.com', BASE + 60, {'b.txt': 'b\n'}, name='foo')
+    if mailmap is not None:
+        (repo_builder.path / '.mailmap').write_text(mailmap)
+    return GitRepository(str(repo_builder.path), use_cache=False).get_identity_table()
+
+
+def test_case_variant_emails_stay_separate_without_mailmap(repo_builder):
+    identities = build(repo_builder)
+    assert len(identities) == 2
+    assert identities.resolve('Foo@x.com').emails == ['Foo@x.com']
+    assert identities.resolve('foo@x.com').emails == ['foo@x.com']
+    assert identities.get('Foo@x.com').name == 'Foo'
+
+
+def test_mailmap_joins_case_variant_emails(repo_builder):
+    identities = build(repo_builder, 'Foo <foo@x.com> <Foo@x.com>\n')
+    assert len(identities) == 1
+    identity = identities.resolve('Foo@x.com')
+    assert identity.email == 'foo@x.com'
+    assert sorted(identity.emails) == ['Foo@x.com', 'foo@x.com']
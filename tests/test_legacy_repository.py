@@ -0,0 +1,26 @@
+import os
+
+from domain.entities.author import Author
+from infrastructure.git_repository import GitRepository
+
+BASE = 1_700_000_000
+
+
+def cache_files(tmp_path):
+    root = tmp_path / 'cache'
+    return [name for _, _, names in os.walk(root) for name in names] if root.exists() else []
+
+
+def test_path_index_is_created_on_first_use(repo_builder, tmp_path):
+    repo_builder.commit('ana@x.com', BASE, {'a.py': 'a\nb\n'})
+    repository = GitRepository(str(repo_builder.path))
+    assert cache_files(tmp_path) == []
+    assert repository.get_lines_changed_by_author(Author(name='ana', email='ana@x.com')) == 2
+    assert cache_files(tmp_path)
+
+
+def test_path_index_is_temporary_without_cache(repo_builder, tmp_path):
+    repo_builder.commit('ana@x.com', BASE, {'a.py': 'a\nb\n'})
+    repository = GitRepository(str(repo_builder.path), use_cache=False)
+    assert repository.get_lines_changed_by_author(Author(name='ana', email='ana@x.com')) == 2
+    assert cache_files(tmp_path) == []
@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from domain.entities.author import Author
+from infrastructure.ingestion.log_stream import build_filter_args
+from infrastructure.repositories.git_repository import GitRepository
+
+DAY = 86400
+BASE = 1_700_000_000
+
+# Emails que contêm outro email como substring (falsos positivos do --author do git)
+EMAILS = ['bob@x.com', 'jimbob@x.com', 'bob@x.com.br', 'Bob@x.com', 'ana@x.com']
+
+
+@pytest.fixture
+def repository(repo_builder):
+    """
+    Histórico com autores que se sobrepõem por substring e relógios fora de
+    ordem: datas de commit que voltam no tempo em relação ao pai.
+    """
+    offsets = [0, 5, 2, 9, 1, 12, 3, 20, 4, 15, 6, 30, 7, 25, 8]
+    for index, offset in enumerate(offsets):
+        email = EMAILS[index % len(EMAILS)]
+        repo_builder.commit(email, BASE + offset * DAY, {f'file{index % 4}.txt': f'{index}\n'})
+    repo_builder.git('checkout', '-q', '-b', 'feature', 'HEAD~6')
+    for index, offset in enumerate([40, 1, 35, 2]):
+        email = EMAILS[(index * 2) % len(EMAILS)]
+        repo_builder.commit(email, BASE + offset * DAY, {'feature.txt': f'{index}\n'})
+    repo_builder.git('checkout', '-q', 'main')
+    return GitRepository(str(repo_builder.path), use_cache=False)
+
+
+def python_filtered(repository, emails, since, until):
+    """Filtro de referência: caminhada completa, email exato e datas em Python."""
+    selected = set()
+    for record, branches in repository.iter_commit_records(with_stats=False):
+        if emails and record.author_email not in emails:
+            continue
+        if since is not None and record.timestamp < since.timestamp():
+            continue
+        if until is not None and record.timestamp > until.timestamp():
+            continue
+        selected.update((record.sha[:8], branch) for branch in branches)
+    return selected
+
+
+def pushed_down(repository, emails, since, until):
+    authors = [Author(name=email, email=email) for email in emails] if emails else None
+    return {(commit.hash[:8], commit.branch) for commit in repository.get_commits(authors, since, until)}
+
+
+def at(days: float) -> datetime:
+    return datetime.fromtimestamp(BASE + days * DAY, tz=timezone.utc)
+
+
+@pytest.mark.parametrize('emails', [[], ['bob@x.com'], ['Bob@x.com'], ['jimbob@x.com', 'ana@x.com'],
+                                    ['bob@x.com.br'], ['nobody@x.com']])
+@pytest.mark.parametrize('since,until', [(None, None), (at(3), None), (None, at(8)),
+                                         (at(2), at(12)), (at(5), at(5)), (at(2.5), at(3.5))])
+def test_pushed_down_filters_match_python_filtering(repository, emails, since, until):
+    assert pushed_down(repository, emails, since, until) == python_filtered(repository, emails, since, until)
+
+
+def test_author_substring_is_rechecked_exactly(repository):
+    commits = repository.get_commits([Author(name='bob', email='bob@x.com')])
+    assert commits
+    assert {commit.author.email for commit in commits} == {'bob@x.com'}
+
+
+def test_since_keeps_commits_behind_clock_skew(repository):
+    # Commits com data >= since atrás de um pai mais novo não podem ser cortados
+    since = at(4)
+    dates = sorted(commit.date.timestamp() for commit in repository.get_commits(since=since))
+    assert dates[0] >= since.timestamp()
+    assert len(dates) == len(python_filtered(repository, [], since, None))
+
+
+def test_build_filter_args_bounds_are_inclusive_seconds():
+    args = build_filter_args(['b@x.com', 'a@x.com', 'a@x.com'],
+                             since=datetime.fromtimestamp(BASE + 0.5, tz=timezone.utc),
+                             until=datetime.fromtimestamp(BASE + 10.5, tz=timezone.utc))
+    assert args[:3] == ['--fixed-strings', '--author=<a@x.com>', '--author=<b@x.com>']
+    assert args[3].endswith(f'=@{BASE + 1}')
+    assert args[4] == f'--until=@{BASE + 10}'
@@ -0,0 +1,104 @@
+from contextlib import closing
+
+import pytest
+
+from infrastructure.ingestion import branch_history
+from infrastructure.ingestion.branch_history import BranchHistory
+from infrastructure.ingestion.path_index import PathIndex
+
+BASE = 1_700_000_000
+
+EMAILS = ['bob@x.com', 'jimbob@x.com', 'ana@x.com']
+
+
+@pytest.fixture
+def repo(repo_builder):
+    """Três autores (um é substring de outro) alterando arquivos em dois diretórios e uma branch."""
+    for index in range(12):
+        email = EMAILS[index % len(EMAILS)]
+        repo_builder.commit(email, BASE + index * 60, {
+            f'src/file{index % 4}.py': f'{index}\n' * (index + 1),
+            f'docs/readme{index % 2}.md': f'{index}\n',
+        })
+    repo_builder.git('checkout', '-q', '-b', 'feature', 'HEAD~4')
+    repo_builder.commit('ana@x.com', BASE + 1000, {'src/feature.py': 'a\nb\n'})
+    repo_builder.git('checkout', '-q', 'main')
+    return repo_builder
+
+
+def index_for(repo, jobs=1):
+    return PathIndex(BranchHistory(str(repo.path), jobs=jobs))
+
+
+def indexed_authors(index):
+    with closing(index._connect()) as connection:
+        return {email for email, in connection.execute(
+            'SELECT DISTINCT a.email FROM commits c JOIN authors a ON a.id = c.author_id')}
+
+
+def aggregates(index, emails):
+    return (index.lines_by_extension(emails), index.top_directories(emails), index.path_churn(emails))
+
+
+def test_scoped_update_indexes_only_requested_authors(repo):
+    index = index_for(repo)
+    index.update(['main', 'feature'], ['ana@x.com'])
+    assert indexed_authors(index) == {'ana@x.com'}
+
+    full = index_for(repo)
+    full.update(['main', 'feature'])
+    assert aggregates(index, ['ana@x.com']) == aggregates(full, ['ana@x.com'])
+
+
+def test_author_substring_is_indexed_without_changing_results(repo):
+    index = index_for(repo)
+    index.update(['main', 'feature'], ['bob@x.com'])
+    full = index_for(repo)
+    full.update(['main', 'feature'])
+    assert aggregates(index, ['bob@x.com']) == aggregates(full, ['bob@x.com'])
+
+
+def test_scoped_update_is_incremental_per_author(repo):
+    index = index_for(repo)
+    index.update(['main', 'feature'], ['ana@x.com'])
+    assert index.update(['main', 'feature'], ['ana@x.com']) == 0
+
+    repo.commit('ana@x.com', BASE + 2000, {'src/new.py': 'x\n'})
+    assert index.update(['main', 'feature'], ['ana@x.com']) == 1
+    # Outro autor ainda não foi indexado: percorre o histórico dele
+    assert index.update(['main', 'feature'], ['bob@x.com']) > 0
+    assert indexed_authors(index) >= {'ana@x.com', 'bob@x.com'}
+
+    full = index_for(repo)
+    full.update(['main', 'feature'])
+    assert aggregates(index, EMAILS[::2]) == aggregates(full, EMAILS[::2])
+
+
+def test_rewritten_branch_rebuilds_the_author(repo):
+    index = index_for(repo)
+    index.update(['main', 'feature'], ['ana@x.com'])
+    repo.git('reset', '-q', '--hard', 'HEAD~3')
+    repo.commit('ana@x.com', BASE + 3000, {'src/rewritten.py': 'r\n'})
+    index.update(['main', 'feature'], ['ana@x.com'])
+
+    full = index_for(repo)
+    full.update(['main', 'feature'])
+    assert aggregates(index, ['ana@x.com']) == aggregates(full, ['ana@x.com'])
+
+
+def test_update_shards_across_jobs(repo, monkeypatch):
+    monkeypatch.setattr(branch_history, 'MIN_SHARD_SIZE', 2)
+    sharded = index_for(repo, jobs=3)
+    sharded.update(['main', 'feature'])
+    single = index_for(repo)
+    single.update(['main', 'feature'])
+    assert aggregates(sharded, None) == aggregates(single, None)
+
+
+def test_index_without_path_is_temporary_file(repo):
+    index = index_for(repo)
+    path = index.path
+    index.update(['main'])
+    assert path.exists()
+    del index
+    assert not path.exists()
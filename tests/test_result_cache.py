@@ -0,0 +1,110 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from web.result_cache import AnalysisKey, ResultCache
+
+BASE = 1_700_000_000
+
+
+def test_key_keeps_email_case_and_ignores_order_and_whitespace():
+    key = AnalysisKey.create('/repo', 'refs', [' b@x.com', 'a@x.com', 'a@x.com '], 'filter', True)
+    assert key.authors == ('a@x.com', 'b@x.com')
+    assert key == AnalysisKey.create('/repo', 'refs', ['b@x.com', 'a@x.com'], 'filter', True)
+    assert key != AnalysisKey.create('/repo', 'refs', ['B@x.com', 'a@x.com'], 'filter', True)
+    assert key != AnalysisKey.create('/repo', 'refs', ['b@x.com', 'a@x.com'], 'filter', False)
+
+
+def test_put_drops_results_of_other_refs():
+    cache = ResultCache()
+    old = AnalysisKey.create('/repo', 'old', ['a@x.com'])
+    new = old._replace(refs='new')
+    cache.put(old, 1)
+    cache.put(new, 2)
+    assert cache.get(old) is None
+    assert cache.get(new) == 2
+
+
+class FakeSession:
+    path_metrics = {'linhas_por_extensao': []}
+    metrics = {'autores': []}
+
+
+class FakeCommand:
+    """Análise instantânea; `on_report` simula algo acontecendo durante o job."""
+    on_report = None
+
+    def __init__(self, repository, **options):
+        self.repository = repository
+
+    def create_session(self, authors, **options):
+        return FakeSession()
+
+    def write_report(self, session):
+        if FakeCommand.on_report is not None:
+            FakeCommand.on_report()
+        path = self.repository.repo_path / 'report.xlsx'
+        path.write_text('report')
+        return str(path)
+
+
+class FakeRepository:
+    def __init__(self, repo_path, **options):
+        self.repo_path = Path(repo_path)
+
+    def get_cache_size(self):
+        return None
+
+
+@pytest.fixture
+def web(monkeypatch, repo_builder):
+    from web import app as web_app
+
+    repo_builder.commit('a@x.com', BASE, {'a.txt': 'a\n'})
+    monkeypatch.setattr(web_app, 'GitRepository', FakeRepository)
+    monkeypatch.setattr(web_app, 'AnalyzeRepositoryCommand', FakeCommand)
+    monkeypatch.setattr(FakeCommand, 'on_report', None)
+    web_app.results.clear()
+    yield web_app, repo_builder
+    web_app.results.clear()
+
+
+def analyze(web_app, repo, **options):
+    client = web_app.app.test_client()
+    response = client.post('/analyze', json={'repository_path': str(repo.path), 'authors': ['a@x.com'],
+                                              **options})
+    data = response.get_json()
+    job = web_app.jobs.get(data['job_id'])
+    deadline = time.time() + 10
+    while not job.status.finished and time.time() < deadline:
+        time.sleep(0.01)
+    return job, data
+
+
+def test_result_is_stored_under_refs_read_when_the_job_starts(web, monkeypatch):
+    web_app, repo = web
+    fingerprints = iter(['at-request'])
+    real = web_app.refs_fingerprint
+    monkeypatch.setattr(web_app, 'refs_fingerprint', lambda path: next(fingerprints, None) or real(path))
+
+    job, _ = analyze(web_app, repo)
+    assert job.status.value == 'done'
+    assert [key.refs for key in web_app.results._entries] == [real(str(repo.path))]
+
+
+def test_result_is_not_stored_when_refs_move_during_the_job(web):
+    web_app, repo = web
+    FakeCommand.on_report = lambda: repo.commit('a@x.com', BASE + 1, {'b.txt': 'b\n'})
+
+    job, _ = analyze(web_app, repo)
+    assert job.status.value == 'done'
+    assert len(web_app.results) == 0
+
+
+def test_result_cache_is_skipped_without_persistent_cache(web):
+    web_app, repo = web
+    analyze(web_app, repo, use_cache=False)
+    assert len(web_app.results) == 0
+    _, data = analyze(web_app, repo, use_cache=False)
+    assert 'cached' not in data
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from web.jobs import JobQueue
+from web.single_flight import SingleFlight
+
+REQUESTS = 12
+
+
+class StubRunner:
+    """Análise falsa: conta as execuções e a concorrência por repositório até ser liberada."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.lock = threading.Lock()
+        self.runs = 0
+        self.running = 0
+        self.peak = 0
+
+    def __call__(self, stage):
+        with self.lock:
+            self.runs += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.started.release()
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+        return 'result'
+
+
+def submit_together(flights, requests):
+    """Envia os pedidos (repositório, chave, função) ao mesmo tempo, presos numa barreira."""
+    barrier = threading.Barrier(len(requests))
+    outcomes = [None] * len(requests)
+
+    def request(index, repository, key, function):
+        barrier.wait()
+        outcomes[index] = flights.submit(repository, key, function, stages=('analysis',))
+
+    threads = [threading.Thread(target=request, args=(index, *arguments))
+               for index, arguments in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def wait_finished(jobs_list):
+    deadline = time.time() + 5
+    while not all(job.status.finished for job in jobs_list) and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_identical_requests_share_one_analysis():
+    jobs = JobQueue(max_workers=4)
+    flights = SingleFlight(jobs, per_repository=1)
+    runner = StubRunner()
+
+    outcomes = submit_together(flights, [('/repo', 'key', runner)] * REQUESTS)
+    assert runner.started.acquire(timeout=5)
+    runner.release.set()
+    wait_finished([job for job, _ in outcomes])
+
+    assert len({job.id for job, _ in outcomes}) == 1
+    assert sum(1 for _, attached in outcomes if not attached) == 1
+    assert runner.runs == 1
+    assert outcomes[0][0].result == 'result'
+    assert flights.stats()['attached'] == REQUESTS - 1
+    assert flights.stats()['in_flight'] == 0
+    jobs.shutdown()
+
+
+def test_per_repository_cap_holds_under_concurrent_requests():
+    jobs = JobQueue(max_workers=4)
+    flights = SingleFlight(jobs, per_repository=2)
+    runner = StubRunner()
+
+    # Chaves diferentes do mesmo repositório: análises distintas, no máximo 2 ao mesmo tempo
+    outcomes = submit_together(flights, [('/repo', f'key{index % 6}', runner) for index in range(REQUESTS)])
+    assert runner.started.acquire(timeout=5) and runner.started.acquire(timeout=5)
+    assert not runner.started.acquire(timeout=0.3)
+    assert flights.stats()['waiting_repository'] == 4
+
+    runner.release.set()
+    wait_finished([job for job, _ in outcomes])
+    assert len({job.id for job, _ in outcomes}) == 6
+    assert runner.runs == 6
+    assert runner.peak == 2
+    jobs.shutdown()
@@ -0,0 +1,124 @@
+import subprocess
+
+import pytest
+
+from domain.enums.merge_policy import MergePolicy
+from infrastructure.ingestion.batch_stats import BatchStatsService
+from infrastructure.ingestion.branch_history import BranchHistory
+from infrastructure.ingestion.path_filter import PathFilter
+from infrastructure.ingestion.stats_backend import StatsBackend
+
+pytest.importorskip('pygit2')
+
+from infrastructure.ingestion.libgit2_stats import Libgit2StatsService  # noqa: E402
+
+BASE = 1_700_000_000
+
+FILTERS = [
+    PathFilter(),
+    PathFilter.from_options(exclude=['vendor/', '*.lock']),
+    PathFilter.from_options(include=['src/']),
+    PathFilter.from_options(skip_binary=True),
+    PathFilter.from_options(max_file_size='1k'),
+]
+
+
+def identity(email, timestamp):
+    date = f'@{timestamp} +0000'
+    return {'GIT_AUTHOR_NAME': 'dev', 'GIT_AUTHOR_EMAIL': email, 'GIT_AUTHOR_DATE': date,
+            'GIT_COMMITTER_NAME': 'dev', 'GIT_COMMITTER_EMAIL': email, 'GIT_COMMITTER_DATE': date}
+
+
+@pytest.fixture(scope='module')
+def repo(tmp_path_factory):
+    """Histórico com merges (limpo e alterado à mão), binários, arquivos grandes, vendor e submódulo."""
+    from conftest import RepoBuilder
+
+    root = tmp_path_factory.mktemp('parity')
+    library = RepoBuilder(root / 'library')
+    library.commit('lib@x.com', BASE, {'lib.txt': 'v1\n'})
+    library_v2 = library.commit('lib@x.com', BASE + 1, {'lib.txt': 'v2\n'})
+
+    repo = RepoBuilder(root / 'repo')
+    repo.commit('ana@x.com', BASE + 10, {
+        'src/app.py': 'a\nb\nc\n',
+        'vendor/dep.js': 'x\n' * 10,
+        'yarn.lock': 'lock\n',
+        'logo.png': b'\x89PNG\x00\x01\x02' * 10,
+        'big.txt': 'line of text\n' * 200,
+    })
+    submodule_env = identity('ana@x.com', BASE + 20)
+    repo.git('-c', 'protocol.file.allow=always', 'submodule', 'add', '-q',
+             str(library.path), 'modules/library', env=submodule_env)
+    repo.git('-C', 'modules/library', 'checkout', '-q', 'HEAD~1')
+    repo.git('add', 'modules/library')
+    repo.git('commit', '-q', '-m', 'submodule', env=submodule_env)
+
+    repo.git('checkout', '-q', '-b', 'feature')
+    repo.commit('bob@x.com', BASE + 30, {'src/app.py': 'a\nB\nc\n', 'logo.png': b'\x89PNG\x00\x03' * 12})
+    repo.commit('bob@x.com', BASE + 40, {'src/feature.py': 'f\n', 'yarn.lock': 'lock2\n'})
+    repo.git('checkout', '-q', 'main')
+    repo.commit('ana@x.com', BASE + 50, {'src/app.py': 'a\nb\nc\nd\n', 'big.txt': None})
+    repo.git('-C', 'modules/library', 'checkout', '-q', library_v2)
+    repo.git('add', 'modules/library')
+    repo.git('commit', '-q', '-m', 'bump', env=identity('ana@x.com', BASE + 55))
+
+    # Merge alterado à mão (o diff contra o primeiro pai inclui a alteração)
+    merge_env = identity('ana@x.com', BASE + 60)
+    try:
+        repo.git('merge', '-q', '--no-ff', '--no-commit', 'feature', env=merge_env)
+    except subprocess.CalledProcessError:
+        pass
+    (repo.path / 'src/app.py').write_text('a\nresolved\nc\nd\ne\n')
+    repo.git('add', '-A')
+    repo.git('commit', '-q', '-m', 'merge', env=merge_env)
+
+    repo.git('checkout', '-q', '-b', 'side', 'HEAD~1')
+    repo.commit('bob@x.com', BASE + 70, {'docs/guide.md': 'doc\n', 'vendor/dep.js': 'y\n' * 3})
+    repo.git('checkout', '-q', 'main')
+    repo.commit('ana@x.com', BASE + 80, {'src/app.py': 'final\n'})
+    repo.git('merge', '-q', '--no-ff', 'side', '-m', 'clean merge', env=identity('ana@x.com', BASE + 90))
+    return repo
+
+
+def all_shas(repo):
+    return repo.git('rev-list', '--all').split()
+
+
+@pytest.mark.parametrize('merge_policy', list(MergePolicy), ids=str)
+@pytest.mark.parametrize('path_filter', FILTERS, ids=lambda f: f.key if f.is_active else 'all')
+def test_pygit2_numstat_matches_git(repo, path_filter, merge_policy):
+    shas = all_shas(repo)
+    with BatchStatsService(str(repo.path), path_filter=path_filter, merge_policy=merge_policy) as git_service, \
+            Libgit2StatsService(str(repo.path), path_filter=path_filter, merge_policy=merge_policy) as libgit2:
+        git_records, git_files = git_service.get_records_with_files(shas)
+        records, files = libgit2.get_records_with_files(shas)
+
+    assert set(records) == set(git_records) == set(shas)
+    for sha in shas:
+        assert sorted(files.get(sha, [])) == sorted(git_files.get(sha, [])), sha
+        expected, actual = git_records[sha], records[sha]
+        assert (actual.files, actual.insertions, actual.deletions) == \
+               (expected.files, expected.insertions, expected.deletions), sha
+        assert (actual.author_email, actual.timestamp, actual.parents) == \
+               (expected.author_email, expected.timestamp, expected.parents), sha
+
+
+@pytest.mark.parametrize('merge_policy', list(MergePolicy), ids=str)
+def test_branch_history_matches_between_backends(repo, merge_policy):
+    def walk(backend):
+        history = BranchHistory(str(repo.path), merge_policy=merge_policy, backend=backend)
+        return sorted((record.sha, record.files, record.insertions, record.deletions, branches)
+                      for record, branches in history.iter_commits(['main', 'feature', 'side']))
+
+    assert walk(StatsBackend.PYGIT2) == walk(StatsBackend.GIT)
+
+
+def test_history_covers_merges_binaries_and_submodules(repo):
+    # Garante que o repositório da paridade exercita os casos difíceis
+    with BatchStatsService(str(repo.path)) as service:
+        records, files = service.get_records_with_files(all_shas(repo))
+    changed = {path for stats in files.values() for path, _, _ in stats}
+    assert sum(1 for record in records.values() if len(record.parents) > 1) == 2
+    assert {'logo.png', 'modules/library'} <= changed
+    assert ('logo.png', 0, 0) in [stat for stats in files.values() for stat in stats]